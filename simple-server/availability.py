@@ -0,0 +1,279 @@
+"""In-memory availability index for department appointment slots.
+
+The index is built once from the ``departments`` and ``bookings`` collections
+and answers schedule, available-times and availability questions without
+going back to MongoDB. For every department and date in the horizon it keeps a
+compact ``bytearray`` with one state byte per slot of the day; ``grid()``
+returns the whole horizon as a ``slot_grid.SlotGrid`` for range queries.
+"""
+
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Booking statuses that hold a slot
+ACTIVE_STATUSES = ("booked", "confirmed")
+
+SLOT_MINUTES = 30
+
+# Slot states
+CLOSED = 0
+FREE = 1
+BOOKED = 2
+
+
+def parse_hhmm(value: str) -> int:
+    """Converts an ``HH:MM`` string into minutes since midnight."""
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def weekday_index(day: str) -> int:
+    """Returns the ``date.weekday()`` index of an English weekday name."""
+    try:
+        return _WEEKDAY_INDEX[day.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Invalid day: {day}")
+
+
+_WEEKDAY_INDEX = {name.lower(): i for i, name in enumerate(DAYS)}
+
+
+class AvailabilityIndex:
+    """Slot states per department and date over a rolling horizon.
+
+    Args:
+        start_date: First date covered by the index.
+        horizon_days: Number of consecutive dates covered.
+        slot_minutes: Length of a bookable slot.
+    """
+
+    def __init__(self, start_date: date, horizon_days: int = 7, slot_minutes: int = SLOT_MINUTES):
+        self.start_date = start_date
+        self.horizon_days = horizon_days
+        self.slot_minutes = slot_minutes
+        self.slots_per_day = 24 * 60 // slot_minutes
+        self.version = 0
+        # Cluster time the index was read at; change streams start from it
+        self.operation_time = None
+        self._labels = [
+            f"{m // 60:02d}:{m % 60:02d}" for m in range(0, 24 * 60, slot_minutes)
+        ]
+        # department_id -> {"name": str, "days": [day names in document order],
+        #                   "hours": 7 lists of (start_slot, end_slot)}
+        self._departments: Dict[Any, Dict[str, Any]] = {}
+        # casefolded name -> department_id
+        self._ids_by_name: Dict[str, Any] = {}
+        # booking_id -> (department_id, date, slot)
+        self._bookings: Dict[Any, Tuple[Any, date, int]] = {}
+        # (department_id, date) -> Counter of booked slots
+        self._booked: Dict[Tuple[Any, date], Counter] = defaultdict(Counter)
+        # (department_id, date) -> materialised slot states
+        self._grid: Dict[Tuple[Any, date], bytearray] = {}
+        # SlotGrid of the whole horizon, and the version it was computed at
+        self._slot_grid = None
+        self._slot_grid_version = None
+
+    @classmethod
+    def build(
+        cls,
+        departments: Iterable[Dict[str, Any]],
+        bookings: Iterable[Dict[str, Any]],
+        start_date: date,
+        horizon_days: int = 7,
+        slot_minutes: int = SLOT_MINUTES,
+    ) -> "AvailabilityIndex":
+        index = cls(start_date, horizon_days, slot_minutes)
+        for department in departments:
+            index.upsert_department(department)
+        for booking in bookings:
+            index.add_booking(booking)
+        return index
+
+    @property
+    def end_date(self) -> date:
+        """First date after the horizon."""
+        return self.start_date + timedelta(days=self.horizon_days)
+
+    def covers(self, day: date) -> bool:
+        return self.start_date <= day < self.end_date
+
+    def dates(self) -> List[date]:
+        return [self.start_date + timedelta(days=i) for i in range(self.horizon_days)]
+
+    def next_date(self, day: str) -> date:
+        """Date a weekday, relative day or date refers to, from the start date on.
+
+        A bare weekday is its next occurrence, today included, like the
+        original slot loops. See ``normalization.parse_day``.
+        """
+        from normalization import parse_day
+
+        return parse_day(day, self.start_date)
+
+    def label(self, slot: int) -> str:
+        return self._labels[slot]
+
+    # Departments
+
+    def upsert_department(self, department: Dict[str, Any]):
+        department_id = department["_id"]
+        previous = self._departments.get(department_id)
+        if previous and self._ids_by_name.get(previous["name"].casefold()) == department_id:
+            del self._ids_by_name[previous["name"].casefold()]
+        hours: List[List[Tuple[int, int]]] = [[] for _ in DAYS]
+        days: List[str] = []
+        for oh in department.get("operating_hours") or []:
+            weekday = weekday_index(oh["day_of_week"])
+            start = parse_hhmm(oh["start_time"]) // self.slot_minutes
+            end = -(-parse_hhmm(oh["end_time"]) // self.slot_minutes)
+            hours[weekday].append((start, end))
+            if DAYS[weekday] not in days:
+                days.append(DAYS[weekday])
+        self._departments[department_id] = {
+            "name": department["name"],
+            "days": days,
+            "hours": hours,
+        }
+        self._ids_by_name[department["name"].casefold()] = department_id
+        self._invalidate(department_id)
+
+    def remove_department(self, department_id):
+        department = self._departments.pop(department_id, None)
+        if department and self._ids_by_name.get(department["name"].casefold()) == department_id:
+            del self._ids_by_name[department["name"].casefold()]
+        self._invalidate(department_id)
+
+    def department_ids(self) -> List[Any]:
+        return list(self._departments)
+
+    def department_name(self, department_id) -> Optional[str]:
+        department = self._departments.get(department_id)
+        return department["name"] if department else None
+
+    def department_id(self, name: str):
+        """Looks up a department by name, ignoring case and surrounding spaces."""
+        return self._ids_by_name.get(name.strip().casefold())
+
+    def department_days(self, department_id) -> List[str]:
+        """Weekdays a department is open, in the order of its operating hours."""
+        department = self._departments.get(department_id)
+        return list(department["days"]) if department else []
+
+    # Bookings
+
+    def add_booking(self, booking: Dict[str, Any]) -> bool:
+        """Records an active booking. Returns ``False`` when it does not hold a slot."""
+        booking_id = booking.get("_id")
+        if booking_id is not None and booking_id in self._bookings:
+            self.remove_booking(booking_id)
+        booking_time = booking.get("booking_time")
+        if booking.get("status") not in ACTIVE_STATUSES or not isinstance(booking_time, datetime):
+            return False
+        day = booking_time.date()
+        if not self.covers(day):
+            return False
+        slot = (booking_time.hour * 60 + booking_time.minute) // self.slot_minutes
+        key = (booking["department_id"], day)
+        self._booked[key][slot] += 1
+        if booking_id is not None:
+            self._bookings[booking_id] = (booking["department_id"], day, slot)
+        self._update_slot(key, slot)
+        return True
+
+    def remove_booking(self, booking_id) -> bool:
+        entry = self._bookings.pop(booking_id, None)
+        if entry is None:
+            return False
+        department_id, day, slot = entry
+        key = (department_id, day)
+        counter = self._booked[key]
+        counter[slot] -= 1
+        if counter[slot] <= 0:
+            del counter[slot]
+        self._update_slot(key, slot)
+        return True
+
+    # Lookups
+
+    def slot_states(self, department_id, day: date) -> bytearray:
+        """Slot states of a department on a date (``CLOSED``, ``FREE`` or ``BOOKED``)."""
+        key = (department_id, day)
+        states = self._grid.get(key)
+        if states is None:
+            states = bytearray(self.slots_per_day)
+            department = self._departments.get(department_id)
+            if department:
+                for start, end in department["hours"][day.weekday()]:
+                    states[start:end] = b"\x01" * (end - start)
+                for slot in self._booked.get(key, ()):
+                    if states[slot] == FREE:
+                        states[slot] = BOOKED
+            self._grid[key] = states
+        return states
+
+    def free_slots(self, department_id, day: date) -> List[str]:
+        states = self.slot_states(department_id, day)
+        return [self._labels[i] for i, state in enumerate(states) if state == FREE]
+
+    def booked_slots(self, department_id, day: date) -> List[str]:
+        states = self.slot_states(department_id, day)
+        return [self._labels[i] for i, state in enumerate(states) if state == BOOKED]
+
+    def booked_slots_by_department(self) -> Dict[str, List[str]]:
+        """Active bookings within the horizon as ``%Y-%m-%d %H:%M:%S`` strings per department name."""
+        booked: Dict[str, List[str]] = {
+            department["name"]: [] for department in self._departments.values()
+        }
+        for (department_id, day), counter in self._booked.items():
+            name = self.department_name(department_id)
+            if name is None:
+                continue
+            for slot in counter:
+                booked[name].append(f"{day.isoformat()} {self._labels[slot]}:00")
+        for slots in booked.values():
+            slots.sort()
+        return booked
+
+    def operating_hours(self) -> List[Tuple[Any, int, int, int]]:
+        """Opening hours as ``(department_id, weekday, start minute, end minute)``, rounded out to slots."""
+        return [
+            (department_id, weekday, start * self.slot_minutes, end * self.slot_minutes)
+            for department_id, department in self._departments.items()
+            for weekday, ranges in enumerate(department["hours"])
+            for start, end in ranges
+        ]
+
+    def booking_offsets(self) -> List[Tuple[Any, int]]:
+        """Booked slots as ``(department_id, minutes since the start date)``."""
+        return [
+            (department_id, (day - self.start_date).days * 24 * 60 + slot * self.slot_minutes)
+            for (department_id, day), counter in self._booked.items()
+            for slot in counter
+        ]
+
+    def grid(self):
+        """Slot states of every department over the horizon, recomputed after changes."""
+        from slot_grid import SlotGrid
+
+        if self._slot_grid is None or self._slot_grid_version != self.version:
+            self._slot_grid = SlotGrid.from_index(self)
+            self._slot_grid_version = self.version
+        return self._slot_grid
+
+    def is_free(self, department_id, booking_time: datetime) -> bool:
+        slot = (booking_time.hour * 60 + booking_time.minute) // self.slot_minutes
+        return self.slot_states(department_id, booking_time.date())[slot] == FREE
+
+    def _update_slot(self, key, slot: int):
+        states = self._grid.get(key)
+        if states is not None and states[slot] != CLOSED:
+            states[slot] = BOOKED if self._booked[key].get(slot) else FREE
+        self.version += 1
+
+    def _invalidate(self, department_id):
+        for key in [k for k in self._grid if k[0] == department_id]:
+            del self._grid[key]
+        self.version += 1
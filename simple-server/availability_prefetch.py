@@ -0,0 +1,79 @@
+"""Speculative availability lookups driven by what the caller says.
+
+As soon as a transcription, interim ones included, names a department, the
+answers the model is likely to ask for next (free times on the days
+mentioned, next free slot, open dates) are computed in the background into
+the call's ``AvailabilityTools`` cache. The tool call then returns from the
+cache; on a miss it computes the answer itself as before, without waiting for
+the prefetch.
+"""
+
+import asyncio
+from typing import Optional, Set
+
+from loguru import logger
+
+from pipecat.frames.frames import CancelFrame, EndFrame, InterimTranscriptionFrame, TranscriptionFrame
+from pipecat.observers.base_observer import BaseObserver, FramePushed
+
+from availability import DAYS
+from normalization import days_in
+from response_cache import departments_in
+
+
+class AvailabilityPrefetcher(BaseObserver):
+    """Prefetches tool answers for the departments and days the caller names.
+
+    Args:
+        enricher: Connected ``DataEnricher`` owning the availability index.
+        tools: The call's ``AvailabilityTools``, whose cache is filled.
+        max_pending: Most lookups running at once; further mentions are skipped.
+    """
+
+    def __init__(self, enricher, tools, max_pending: int = 4):
+        super().__init__()
+        self._enricher = enricher
+        self._tools = tools
+        self._max_pending = max_pending
+        self._last_frame_id: Optional[int] = None
+        self._tasks: Set[asyncio.Task] = set()
+        # (department_id, date, index identity, index version) already prefetched
+        self._done: Set[tuple] = set()
+
+    async def on_push_frame(self, data: FramePushed):
+        frame = data.frame
+        if isinstance(frame, (EndFrame, CancelFrame)):
+            for task in self._tasks:
+                task.cancel()
+            return
+        if not isinstance(frame, (TranscriptionFrame, InterimTranscriptionFrame)) or not frame.text:
+            return
+        # Each push between two processors is reported; look at a frame once
+        if frame.id == self._last_frame_id or len(self._tasks) >= self._max_pending:
+            return
+        self._last_frame_id = frame.id
+        task = asyncio.create_task(self._prefetch(frame.text))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _prefetch(self, text: str):
+        try:
+            index = await self._enricher.get_availability_index()
+            days = [d for d in days_in(text, index.start_date) if index.covers(d)][:2] or [None]
+            for department_id in departments_in(index, text)[:2]:
+                for target_date in days:
+                    key = (department_id, target_date, id(index), index.version)
+                    if key in self._done:
+                        continue
+                    self._done.add(key)
+                    day = None
+                    if target_date is not None:
+                        # The model passes a weekday for the coming week and a date further out
+                        weekday = DAYS[target_date.weekday()]
+                        day = weekday if index.next_date(weekday) == target_date else target_date.isoformat()
+                    await self._tools.prefetch(index.department_name(department_id), day)
+                    logger.debug(f"Prefetched availability of {index.department_name(department_id)} ({day or 'any day'})")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Availability prefetch failed: {e}")
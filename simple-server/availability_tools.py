@@ -0,0 +1,219 @@
+"""LLM tools for looking up availability on demand.
+
+Instead of preloading every schedule into the system prompt, the model calls
+these tools for the slice it needs. Answers come from the shared availability
+index and are cached for a short TTL, keyed on the index version so a new
+booking is reflected immediately.
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from availability import DAYS, AvailabilityIndex
+from prompt_builder import free_ranges
+from ttl_cache import TTLCache
+
+TOOL_SCHEMAS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "list_departments",
+            "description": "List the departments of the medical center and the weekdays they are open.",
+            "parameters": {"type": "object", "properties": {}},
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_available_times",
+            "description": "Get the free appointment time ranges of a department on a given day.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "department": {"type": "string"},
+                    "day": {
+                        "type": "string",
+                        "description": "Weekday (e.g. Monday), relative day (e.g. tomorrow) or date as YYYY-MM-DD.",
+                    },
+                },
+                "required": ["department", "day"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_next_free_slot",
+            "description": "Get the earliest free appointment slot of a department.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "department": {"type": "string"},
+                    "from_date": {
+                        "type": "string",
+                        "description": "Only look from this date on, as YYYY-MM-DD (e.g. the Monday of next week).",
+                    },
+                },
+                "required": ["department"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_available_dates",
+            "description": "List the dates of the coming weeks on which a department has free appointment slots.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "department": {"type": "string"},
+                    "weeks": {"type": "integer", "description": "Number of weeks to look ahead (default 2)."},
+                },
+                "required": ["department"],
+            },
+        },
+    },
+]
+
+
+class AvailabilityTools:
+    """Availability tool handlers backed by a ``DataEnricher``.
+
+    Args:
+        enricher: Connected ``DataEnricher`` owning the availability index.
+        ttl: Seconds a tool answer is cached (``AVAILABILITY_TOOLS_TTL``, default 30).
+    """
+
+    def __init__(self, enricher, ttl: Optional[float] = None):
+        self._enricher = enricher
+        self.cache = TTLCache(ttl or float(os.getenv("AVAILABILITY_TOOLS_TTL", "30")))
+
+    def register(self, llm):
+        llm.register_function("list_departments", self.list_departments)
+        llm.register_function("get_available_times", self.get_available_times)
+        llm.register_function("get_next_free_slot", self.get_next_free_slot)
+        llm.register_function("get_available_dates", self.get_available_dates)
+
+    async def list_departments(self, function_name, tool_call_id, args, llm, context, result_callback):
+        await result_callback(await self._cached("departments", self._departments))
+
+    async def get_available_times(self, function_name, tool_call_id, args, llm, context, result_callback):
+        department = args.get("department", "")
+        day = args.get("day", "")
+        await result_callback(
+            await self._cached(("times", department.casefold(), day.casefold()), self._times, department, day)
+        )
+
+    async def get_next_free_slot(self, function_name, tool_call_id, args, llm, context, result_callback):
+        department = args.get("department", "")
+        from_date = args.get("from_date") or ""
+        await result_callback(
+            await self._cached(("next", department.casefold(), from_date), self._next_free_slot, department, from_date)
+        )
+
+    async def get_available_dates(self, function_name, tool_call_id, args, llm, context, result_callback):
+        department = args.get("department", "")
+        weeks = args.get("weeks") or 2
+        await result_callback(
+            await self._cached(("dates", department.casefold(), weeks), self._available_dates, department, weeks)
+        )
+
+    async def prefetch(self, department: str, day: Optional[str] = None):
+        """Computes the answers the model is likely to ask for next about a department.
+
+        Uses the same cache keys as the tool handlers, with the arguments the
+        model is told to pass: the department name, and an English weekday or
+        an ISO date.
+        """
+        department_key = department.casefold()
+        if day:
+            index = await self._enricher.get_availability_index()
+            for value in (day, index.next_date(day).isoformat()):
+                await self._cached(("times", department_key, value.casefold()), self._times, department, value)
+        else:
+            await self._cached(("next", department_key, ""), self._next_free_slot, department, "")
+        await self._cached(("dates", department_key, 2), self._available_dates, department, 2)
+
+    async def _cached(self, key, compute, *args) -> Dict[str, Any]:
+        index = await self._enricher.get_availability_index()
+        versioned_key = (key, id(index), index.version)
+        result = self.cache.get(versioned_key)
+        if result is None:
+            try:
+                result = compute(index, *args)
+            except ValueError as e:
+                result = {"error": str(e)}
+            except Exception as e:
+                logger.error(f"Availability tool failed for {key}: {e}")
+                result = {"error": "Availability lookup failed, please try again."}
+            self.cache.set(versioned_key, result)
+        return result
+
+    def _departments(self, index: AvailabilityIndex) -> Dict[str, Any]:
+        return {
+            "departments": [
+                {"name": index.department_name(d), "open_days": index.department_days(d)}
+                for d in index.department_ids()
+            ]
+        }
+
+    def _department(self, index: AvailabilityIndex, name: str):
+        department_id = index.department_id(name)
+        if department_id is None:
+            raise ValueError(f"Unknown department: {name}")
+        return department_id
+
+    def _times(self, index: AvailabilityIndex, department: str, day: str) -> Dict[str, Any]:
+        department_id = self._department(index, department)
+        target_date = index.next_date(day)
+        if not index.covers(target_date):
+            raise ValueError(f"Availability is only known until {index.dates()[-1].isoformat()}")
+        return {
+            "department": index.department_name(department_id),
+            "date": target_date.isoformat(),
+            "day": DAYS[target_date.weekday()],
+            "available": [
+                f"{start}-{end}" for start, end in free_ranges(index, department_id, target_date, datetime.now())
+            ],
+        }
+
+    def _next_free_slot(self, index: AvailabilityIndex, department: str, from_date: str = "") -> Dict[str, Any]:
+        department_id = self._department(index, department)
+        after = datetime.now()
+        if from_date:
+            start = datetime.combine(index.next_date(from_date), datetime.min.time())
+            # Slots starting after the minute before midnight, i.e. the whole day
+            after = max(after, start - timedelta(minutes=1))
+        slot = index.grid().next_free(department_id, after)
+        if slot is None:
+            return {"department": index.department_name(department_id), "available": False}
+        return {
+            "department": index.department_name(department_id),
+            "date": slot.date().isoformat(),
+            "day": DAYS[slot.weekday()],
+            "time": slot.strftime("%H:%M"),
+        }
+
+    def _available_dates(self, index: AvailabilityIndex, department: str, weeks) -> Dict[str, Any]:
+        department_id = self._department(index, department)
+        try:
+            end = index.start_date + timedelta(weeks=int(weeks))
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid number of weeks: {weeks}")
+        now = datetime.now()
+        dates: List[Dict[str, Any]] = []
+        for day, free in index.grid().free_days(department_id):
+            if day >= end:
+                break
+            if day == now.date():
+                free = sum(1 for s in index.free_slots(department_id, day) if s > now.strftime("%H:%M"))
+            if free:
+                dates.append({"date": day.isoformat(), "day": DAYS[day.weekday()], "free_slots": free})
+        return {
+            "department": index.department_name(department_id),
+            "dates": dates,
+            "known_until": index.dates()[-1].isoformat(),
+        }
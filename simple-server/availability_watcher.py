@@ -0,0 +1,174 @@
+"""Keeps the shared availability index fresh from MongoDB change streams.
+
+Each change event on ``bookings`` or ``departments`` is applied to the index
+one document at a time, so running bots see new bookings and schedule edits
+without re-scanning either collection. The stream starts at the cluster time
+the index was read at, so changes made while it was being built are replayed
+rather than missed; applying a change twice is harmless. When the oplog no
+longer holds the point the stream would resume from, the index is rebuilt and
+the stream reopened from the cluster time of the new index.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from bson import Timestamp
+from loguru import logger
+from pymongo.errors import OperationFailure
+
+from availability import AvailabilityIndex
+
+WATCHED_COLLECTIONS = ("bookings", "departments")
+
+# Server error code returned when change streams are not supported (standalone mongod)
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+# Server error codes returned when the resume point has rolled off the oplog
+# (ChangeStreamHistoryLost, and ChangeStreamFatalError before MongoDB 4.4)
+CHANGE_STREAM_HISTORY_LOST = (286, 280)
+
+ChangeSource = Callable[[Optional[Dict[str, Any]], Optional[Timestamp]], AsyncIterator[Dict[str, Any]]]
+
+
+def mongo_change_source(database) -> ChangeSource:
+    """Change source reading the database change stream.
+
+    The stream resumes after ``resume_token`` when there is one, and otherwise
+    starts at ``start_at``, the cluster time the availability index was read at.
+    """
+
+    async def source(resume_token: Optional[Dict[str, Any]], start_at: Optional[Timestamp]):
+        pipeline = [{"$match": {"ns.coll": {"$in": list(WATCHED_COLLECTIONS)}}}]
+        async with database.watch(
+            pipeline,
+            full_document="updateLookup",
+            resume_after=resume_token,
+            start_at_operation_time=start_at if resume_token is None else None,
+        ) as stream:
+            async for change in stream:
+                yield change
+
+    return source
+
+
+def apply_change(index: AvailabilityIndex, change: Dict[str, Any]) -> bool:
+    """Applies one change event to the index.
+
+    Returns:
+        bool: ``False`` when the event cannot be applied incrementally and the
+        index has to be rebuilt.
+    """
+    operation = change.get("operationType")
+    collection = change.get("ns", {}).get("coll")
+    document = change.get("fullDocument")
+    document_id = change.get("documentKey", {}).get("_id")
+
+    if operation in ("insert", "update", "replace"):
+        if collection == "bookings":
+            if document is None:
+                index.remove_booking(document_id)
+            else:
+                index.add_booking(document)
+        elif collection == "departments":
+            if document is None:
+                index.remove_department(document_id)
+            else:
+                index.upsert_department(document)
+        return True
+    if operation == "delete":
+        if collection == "bookings":
+            index.remove_booking(document_id)
+        elif collection == "departments":
+            index.remove_department(document_id)
+        return True
+    # drop, rename, dropDatabase and invalidate all leave the index unusable
+    return False
+
+
+class AvailabilityWatcher:
+    """Applies change events to the shared availability index of a ``DataEnricher``.
+
+    Args:
+        enricher: Connected ``DataEnricher`` owning the availability index.
+        source: Callable returning an async iterator of change events, given the
+            last resume token and, without one, the cluster time the index was
+            read at. Defaults to the MongoDB change stream.
+        retry_delay: Seconds to wait before reopening a failed stream.
+    """
+
+    def __init__(self, enricher, source: Optional[ChangeSource] = None, retry_delay: float = 2.0):
+        self._enricher = enricher
+        self._source = source or mongo_change_source(enricher.connection)
+        self._retry_delay = retry_delay
+        self._resume_token: Optional[Dict[str, Any]] = None
+        self._listeners: List[Callable[[AvailabilityIndex], Awaitable[None]]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def add_listener(self, listener: Callable[[AvailabilityIndex], Awaitable[None]]):
+        """Registers a coroutine called with the index after every applied change."""
+        self._listeners.append(listener)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        while True:
+            try:
+                reopen = False
+                start_at = None
+                if self._resume_token is None:
+                    # Replay what changed since the index was read, so no booking is missed
+                    start_at = (await self._enricher.get_availability_index()).operation_time
+                async for change in self._source(self._resume_token, start_at):
+                    reopen = not await self._handle(change)
+                    self._resume_token = None if reopen else change.get("_id")
+                if not reopen:
+                    return
+                continue
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                    logger.warning("Change streams are not supported by this MongoDB deployment.")
+                    return
+                if e.code in CHANGE_STREAM_HISTORY_LOST:
+                    # Resuming from the same point would fail forever; start over from a fresh index
+                    logger.warning(f"Availability change stream history lost, rebuilding the index: {e}")
+                    self._resume_token = None
+                    try:
+                        await self._notify(await self._enricher.get_availability_index(refresh=True))
+                        continue
+                    except Exception as error:
+                        logger.error(f"Failed to rebuild the availability index: {error}")
+                else:
+                    logger.error(f"Availability change stream failed: {e}")
+            except Exception as e:
+                logger.error(f"Availability change stream failed: {e}")
+            await asyncio.sleep(self._retry_delay)
+
+    async def _handle(self, change: Dict[str, Any]) -> bool:
+        """Applies a change and notifies listeners. Returns ``False`` if the index was rebuilt."""
+        index = await self._enricher.get_availability_index()
+        applied = apply_change(index, change)
+        if not applied:
+            logger.info(f"Rebuilding availability index after '{change.get('operationType')}' event.")
+            index = await self._enricher.get_availability_index(refresh=True)
+        await self._notify(index)
+        return applied
+
+    async def _notify(self, index: AvailabilityIndex):
+        for listener in self._listeners:
+            try:
+                await listener(index)
+            except Exception as e:
+                logger.error(f"Availability listener failed: {e}")
@@ -0,0 +1,253 @@
+"""Benchmark of the booking data layer (``mongo_loader.DataEnricher``).
+
+Seeds a database with departments and bookings scaled up from
+``init_departments.json``, then times the operations the bot performs during a
+call and reports latency percentiles, queries per call and, with the
+in-process stand-in, documents examined and collection scans per call. A
+rising query count points at an N+1 pattern, and collection scans point at a
+query that no longer uses an index.
+
+By default everything runs in process against ``fake_mongo.FakeDatabase``.
+Pass ``--mongo-uri`` to run against a local mongod instead; the target
+database is dropped and reseeded.
+
+Examples:
+    python benchmark_data_layer.py
+    python benchmark_data_layer.py --scale 10x1000 --scale 100x100000 --scale 1000x1000000
+    python benchmark_data_layer.py --mongo-uri mongodb://localhost:27017 --scale 100x10000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+from loguru import logger
+from pymongo import monitoring
+
+import mongo_loader
+from availability import DAYS
+from fake_mongo import FakeDatabase
+from mongo_loader import DataEnricher
+from seed_data import generate_bookings, generate_departments
+from seed_db import insert_batches, parse_scale
+from slot_grid import SlotGrid
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts the commands a real MongoDB client sends, by command name."""
+
+    def __init__(self):
+        self.stats: Counter = Counter()
+
+    def started(self, event):
+        self.stats[event.command_name] += 1
+        if event.command_name not in ("endSessions", "ping", "hello", "isMaster"):
+            self.stats["queries"] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def seed(database, departments: List[Dict[str, Any]], booking_count: int, seed_value: int) -> int:
+    """Replaces the contents of ``database`` with the generated data set."""
+    await database["departments"].drop()
+    await database["bookings"].drop()
+    await database["departments"].insert_many(departments)
+    inserted, _ = await insert_batches(database["bookings"], generate_bookings(departments, booking_count, seed=seed_value))
+    return inserted
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+async def measure(
+    name: str,
+    operation: Callable[[], Any],
+    iterations: int,
+    stats: Counter,
+    scans_tracked: bool,
+) -> Dict[str, Any]:
+    """Runs ``operation`` ``iterations`` times and summarises latency and query statistics."""
+    before = Counter(stats)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await operation()
+        samples.append(time.perf_counter() - start)
+    delta = Counter(stats)
+    delta.subtract(before)
+    return {
+        "operation": name,
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "queries": delta["queries"] / iterations,
+        "docs_examined": delta["docs_examined"] / iterations if scans_tracked else None,
+        "collection_scans": delta["collection_scans"] / iterations if scans_tracked else None,
+    }
+
+
+def _open_slots(department: Dict[str, Any], start: date, days: int) -> List[datetime]:
+    slots = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        for oh in department["operating_hours"]:
+            if oh["day_of_week"] != DAYS[day.weekday()]:
+                continue
+            opens = datetime.combine(day, datetime.strptime(oh["start_time"], "%H:%M").time())
+            closes = datetime.combine(day, datetime.strptime(oh["end_time"], "%H:%M").time())
+            while opens < closes:
+                slots.append(opens)
+                opens += timedelta(minutes=30)
+    return slots
+
+
+async def run_scale(
+    database,
+    stats: Counter,
+    department_count: int,
+    booking_count: int,
+    iterations: int,
+    seed_value: int,
+) -> List[Dict[str, Any]]:
+    rng = random.Random(seed_value)
+    departments = generate_departments(department_count, seed=seed_value)
+    started = time.perf_counter()
+    inserted = await seed(database, departments, booking_count, seed_value)
+    print(f"\nSeeded {department_count} departments and {inserted} bookings in {time.perf_counter() - started:.1f}s")
+
+    # Start every scale from a cold process-wide state
+    mongo_loader._availability_index = None
+    mongo_loader._indexes_ensured = False
+    enricher = DataEnricher()
+    enricher.connection = database
+    await enricher.ensure_indexes()
+
+    today = date.today()
+    in_window = {d["_id"]: _open_slots(d, today, enricher.availability_horizon_days) for d in departments}
+    beyond_window = {
+        d["_id"]: _open_slots(d, today + timedelta(days=enricher.availability_horizon_days), 28)
+        for d in departments
+    }
+
+    def pick_department() -> Dict[str, Any]:
+        return rng.choice(departments)
+
+    async def build_index():
+        await enricher.get_availability_index(refresh=True)
+
+    async def slot_grid():
+        SlotGrid.from_index(await enricher.get_availability_index())
+
+    async def open_schedule():
+        enricher.open_schedule = None
+        await enricher.get_open_schedule()
+
+    async def available_times():
+        department = pick_department()
+        day = rng.choice(department["operating_hours"])["day_of_week"]
+        await enricher.get_available_times(day, department["_id"])
+
+    async def check_in_window():
+        department = pick_department()
+        slots = in_window[department["_id"]] or beyond_window[department["_id"]]
+        await enricher.check_availability(department["_id"], rng.choice(slots))
+
+    async def check_beyond_window():
+        department = pick_department()
+        await enricher.check_availability(department["_id"], rng.choice(beyond_window[department["_id"]]))
+
+    async def book():
+        department = pick_department()
+        slots = in_window[department["_id"]] or beyond_window[department["_id"]]
+        await enricher.book_appointment(department["_id"], 1, rng.choice(slots))
+
+    async def register():
+        department = pick_department()
+        slots = in_window[department["_id"]] or beyond_window[department["_id"]]
+        slot = rng.choice(slots)
+        await enricher.register_booking(
+            department["name"], slot.strftime("%Y-%m-%d"), slot.strftime("%H:%M")
+        )
+
+    operations: List[Tuple[str, Callable[[], Any], int]] = [
+        ("get_availability_index(refresh)", build_index, max(iterations // 20, 3)),
+        ("SlotGrid.from_index (horizon)", slot_grid, max(iterations // 10, 3)),
+        ("get_open_schedule", open_schedule, max(iterations // 10, 3)),
+        ("get_available_times", available_times, iterations),
+        ("get_booked_slots_per_department", enricher.get_booked_slots_per_department, max(iterations // 10, 3)),
+        ("check_availability (indexed window)", check_in_window, iterations),
+        ("check_availability (beyond window)", check_beyond_window, iterations),
+        ("book_appointment", book, iterations),
+        ("register_booking", register, iterations),
+    ]
+    await enricher.get_availability_index()
+    scans_tracked = isinstance(database, FakeDatabase)
+    return [await measure(name, op, count, stats, scans_tracked) for name, op, count in operations]
+
+
+def print_report(results: List[Dict[str, Any]]):
+    header = f"{'operation':38} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'queries':>8} {'examined':>10} {'scans':>6}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        examined = f"{r['docs_examined']:10.1f}" if r["docs_examined"] is not None else f"{'n/a':>10}"
+        scans = f"{r['collection_scans']:6.2f}" if r["collection_scans"] is not None else f"{'n/a':>6}"
+        print(
+            f"{r['operation']:38} {r['p50_ms']:9.3f} {r['p95_ms']:9.3f} {r['p99_ms']:9.3f} "
+            f"{r['mean_ms']:9.3f} {r['queries']:8.2f} {examined} {scans}"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the booking data layer")
+    parser.add_argument(
+        "--scale",
+        type=parse_scale,
+        action="append",
+        help="Data set size as DEPARTMENTSxBOOKINGS, repeatable (default: 10x1000 and 100x10000)",
+    )
+    parser.add_argument("--iterations", type=int, default=200, help="Calls per operation")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the data set and requests")
+    parser.add_argument("--mongo-uri", help="Run against this MongoDB server instead of the in-process stand-in")
+    parser.add_argument("--mongo-db", default="medassist_benchmark", help="Database dropped and seeded on --mongo-uri")
+    args = parser.parse_args()
+    scales = args.scale or [(10, 1_000), (100, 10_000)]
+
+    # DataEnricher logs every call at INFO
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    client = None
+    if args.mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        counter = CommandCounter()
+        client = AsyncIOMotorClient(args.mongo_uri, event_listeners=[counter])
+        database, stats = client[args.mongo_db], counter.stats
+    else:
+        database = FakeDatabase()
+        stats = database.stats
+
+    try:
+        for department_count, booking_count in scales:
+            results = await run_scale(database, stats, department_count, booking_count, args.iterations, args.seed)
+            print_report(results)
+    finally:
+        if client is not None:
+            client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,148 @@
+"""Benchmark of the time to first audio with and without the speech chunker.
+
+Streams typical French availability answers token by token into a fake TTS
+service through a real pipecat pipeline, once with pipecat's default
+sentence aggregation and once with ``speech_chunker.SpeechChunkAggregator``,
+and reports the time from the first LLM token to the first audio, the number
+of chunks sent to the TTS and their mean length. Runs fully offline.
+
+Examples:
+    python benchmark_tts_chunking.py
+    python benchmark_tts_chunking.py --token-ms 40 --tts-ms 200 --show-chunks
+"""
+
+import argparse
+import asyncio
+import re
+import statistics
+import sys
+import time
+from typing import AsyncGenerator, List, Optional
+
+from loguru import logger
+
+from pipecat.frames.frames import (
+    EndFrame,
+    Frame,
+    LLMFullResponseEndFrame,
+    LLMFullResponseStartFrame,
+    LLMTextFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+)
+from pipecat.pipeline.pipeline import Pipeline
+from pipecat.pipeline.runner import PipelineRunner
+from pipecat.pipeline.task import PipelineParams, PipelineTask
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+from pipecat.services.tts_service import TTSService
+from pipecat.utils.text.simple_text_aggregator import SimpleTextAggregator
+
+from speech_chunker import SpeechChunkAggregator, SpeechChunker
+
+SAMPLE_RATE = 24000
+
+ANSWERS = [
+    "Bien sûr ! Le service de cardiologie a des disponibilités le lundi 7 juillet de 9 h à 12 h 30, "
+    "puis de 14 h à 17 h 30, et le mercredi 9 juillet de 9 h 30 à 11 h. Quel horaire vous conviendrait ?",
+    "Le service de pédiatrie est ouvert le mardi et le jeudi. Le mardi 8 juillet, il reste des créneaux "
+    "de 10 h à 11 h 30 et de 15 h à 16 h 30, le jeudi 10 juillet de 9 h à 10 h. Lequel préférez-vous ?",
+    "Parfait, je récapitule : rendez-vous en dermatologie le vendredi 11 juillet à 14 h 30. "
+    "Pouvez-vous me confirmer que c'est bien cela ?",
+    "D'accord. Nous proposons la cardiologie, la dermatologie, la pédiatrie et la radiologie. "
+    "Pour quel service souhaitez-vous prendre rendez-vous ?",
+]
+
+
+def tokens(text: str) -> List[str]:
+    """Splits text roughly like an LLM tokenizer: short word pieces with their leading space."""
+    return re.findall(r"\s?[^\s]{1,5}", text)
+
+
+class FakeTTSService(TTSService):
+    """TTS returning silence after a fixed synthesis latency."""
+
+    def __init__(self, latency_secs: float, **kwargs):
+        super().__init__(sample_rate=SAMPLE_RATE, **kwargs)
+        self._latency_secs = latency_secs
+        self.chunks: List[str] = []
+
+    def can_generate_metrics(self) -> bool:
+        return False
+
+    async def run_tts(self, text: str) -> AsyncGenerator[Frame, None]:
+        self.chunks.append(text)
+        await asyncio.sleep(self._latency_secs)
+        yield TTSStartedFrame()
+        yield TTSAudioRawFrame(audio=b"\0" * 480, sample_rate=SAMPLE_RATE, num_channels=1)
+        yield TTSStoppedFrame()
+
+
+class FirstAudio(FrameProcessor):
+    """Records when the first audio frame reaches the end of the pipeline."""
+
+    def __init__(self):
+        super().__init__()
+        self.at: Optional[float] = None
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        if isinstance(frame, TTSAudioRawFrame) and self.at is None:
+            self.at = time.perf_counter()
+        await self.push_frame(frame, direction)
+
+
+async def run_answer(text: str, aggregator, token_secs: float, tts_secs: float):
+    """Streams one answer and returns (seconds to first audio, chunks sent to the TTS)."""
+    tts = FakeTTSService(tts_secs, text_aggregator=aggregator)
+    first_audio = FirstAudio()
+    task = PipelineTask(Pipeline([tts, first_audio]), params=PipelineParams())
+    runner = PipelineRunner(handle_sigint=False)
+    run = asyncio.create_task(runner.run(task))
+    await asyncio.sleep(0.05)
+
+    await task.queue_frame(LLMFullResponseStartFrame())
+    started = time.perf_counter()
+    for token in tokens(text):
+        await task.queue_frame(LLMTextFrame(token))
+        await asyncio.sleep(token_secs)
+    await task.queue_frame(LLMFullResponseEndFrame())
+    while first_audio.at is None and time.perf_counter() - started < 30:
+        await asyncio.sleep(0.005)
+    await task.queue_frame(EndFrame())
+    await run
+    return first_audio.at - started, tts.chunks
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark time to first audio with the speech chunker")
+    parser.add_argument("--token-ms", type=float, default=30.0, help="Interval between LLM tokens")
+    parser.add_argument("--tts-ms", type=float, default=150.0, help="Fake TTS latency to first audio")
+    parser.add_argument("--show-chunks", action="store_true", help="Print the chunks sent to the TTS")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    strategies = [
+        ("sentences (pipecat default)", SimpleTextAggregator),
+        ("speech chunker", lambda: SpeechChunkAggregator(chunker=SpeechChunker())),
+    ]
+    print(f"{'strategy':30} {'first audio ms':>15} {'p95 ms':>8} {'chunks':>7} {'mean chars':>11}")
+    for name, factory in strategies:
+        latencies, counts, lengths = [], [], []
+        for answer in ANSWERS:
+            latency, chunks = await run_answer(answer, factory(), args.token_ms / 1000, args.tts_ms / 1000)
+            latencies.append(latency)
+            counts.append(len(chunks))
+            lengths.extend(len(chunk) for chunk in chunks)
+            if args.show_chunks:
+                print(f"  [{name}] " + " | ".join(chunk.strip() for chunk in chunks))
+        print(
+            f"{name:30} {statistics.fmean(latencies) * 1000:15.0f} {max(latencies) * 1000:8.0f} "
+            f"{statistics.fmean(counts):7.1f} {statistics.fmean(lengths):11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
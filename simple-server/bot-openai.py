@@ -1,78 +1,125 @@
+from startup_profile import profile
+
+import argparse
 import asyncio
+import json
 import os
 import sys
-import aiohttp
-from dotenv import load_dotenv
-from loguru import logger
-from pipecat.pipeline.pipeline import Pipeline
-from pipecat.pipeline.runner import PipelineRunner
-from pipecat.pipeline.task import PipelineParams, PipelineTask
-from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
-from pipecat.processors.frameworks.rtvi import RTVIConfig, RTVIObserver, RTVIProcessor
-from pipecat.frames.frames import EndFrame
-from setup_services import setup_services
-from sprite_utils import get_static_and_talking_frames
-from event_handlers import register_event_handlers
-from confirm_logic import confirm_appointment
+import time
+
+with profile.step("import pipecat"):
+    import aiohttp
+    from dotenv import load_dotenv
+    from loguru import logger
+    from pipecat.pipeline.pipeline import Pipeline
+    from pipecat.pipeline.runner import PipelineRunner
+    from pipecat.pipeline.task import PipelineParams, PipelineTask
+    from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+    from pipecat.processors.frameworks.rtvi import RTVIConfig, RTVIObserver, RTVIProcessor
+
+with profile.step("import services"):
+    from setup_services import preload_services, setup_services, warm_up_tts_cache
+
+with profile.step("import bot modules"):
+    from availability_prefetch import AvailabilityPrefetcher
+    from availability_tools import TOOL_SCHEMAS, AvailabilityTools
+    from availability_watcher import AvailabilityWatcher
+    from bot_pool import WORKER_READY
+    from context_pruner import ContextPruner
+    from latency_observer import LatencyObserver
+    from metrics import export_snapshots, metrics
+    from mongo_pool import close_clients
+    from sprite_utils import get_static_and_talking_frames
+    from event_handlers import register_event_handlers
+    from confirm_logic import confirm_appointment
+    from prompt_builder import SystemPromptBuilder
+    from response_cache import AvailabilityResponder
+    from tts_cache import CachedSpeechProcessor, TTSAudioCache
+
+CONFIRM_APPOINTMENT_SCHEMA = {
+    "type": "function",
+    "function": {
+        "name": "confirm_appointment",
+        "description": "Confirm appointment with department, day, and time.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "department": {"type": "string"},
+                "day": {"type": "string"},
+                "time": {"type": "string"}
+            },
+            "required": ["department", "day", "time"]
+        }
+    }
+}
 
 class BotRunner:
-    def __init__(self, transport, tts, llm, enricher, quiet_frame, talking_frame):
+    """Runs one call.
+
+    The pipeline starts, and the transport joins the room, straight away. The
+    sprites, the availability index behind the system prompt and, for a cold
+    bot, the database indexes and TTS cache are prepared concurrently; the
+    first LLM turn waits for them.
+
+    Args:
+        sprites: Task loading the ``(quiet_frame, talking_frame)`` sprites.
+        cold: Whether the bot was started without preloading its services.
+    """
+
+    def __init__(self, transport, tts, llm, enricher, sprites, cold=False):
         self.transport = transport
         self.tts = tts
         self.llm = llm
         self.enricher = enricher
-        self.quiet_frame = quiet_frame
-        self.talking_frame = talking_frame
+        self.sprites = sprites
+        self.cold = cold
+        self.tts_warm_up = None
+
+    async def prepare(self, task, context, prompt_builder, watcher):
+        """Startup work that does not need to finish before joining the room."""
+
+        async def load_prompt():
+            with profile.step("prefetch availability index"):
+                index = await self.enricher.get_availability_index()
+            context.messages[0]["content"] = prompt_builder.build(index)
+            watcher.start()
+
+        async def show_sprite():
+            with profile.step("load sprites"):
+                quiet_frame, _ = await self.sprites
+            await task.queue_frame(quiet_frame)
+
+        async def prepare_database():
+            with profile.step("ensure database indexes"):
+                await self.enricher.ensure_indexes()
+
+        steps = [load_prompt(), show_sprite()]
+        if self.cold:
+            steps.append(prepare_database())
+        await asyncio.gather(*steps)
+        if self.cold:
+            # Shared with the other bots on the host; nothing waits for it
+            self.tts_warm_up = asyncio.create_task(warm_up_tts_cache(self.enricher))
 
     async def run(self):
-        context = OpenAILLMContext(messages=[])
+        prompt_builder = SystemPromptBuilder()
+        # Tools-only prompt until the availability index is loaded
+        context = OpenAILLMContext(messages=[{"role": "system", "content": prompt_builder.build(None)}])
         context_agg = self.llm.create_context_aggregator(context)
 
-        departments = await self.enricher.get_available_departments()
-        open_schedule = await self.enricher.get_open_schedule()
-        booked_slots = await self.enricher.get_booked_slots_per_department()
-
-        self.llm.register_function("confirm_appointment", confirm_appointment)
-
-        context.add_message(
-            {
-                "role": "system",
-                "content": (
-                    "You are a french MedAssist that understand french weekdays, that talks only in french and pronounces the words and the numbers and the hours in french correctly. "
-                    "You are MedAssist, a helpful and professional virtual assistant for a medical center. "
-                    "Your role is to guide patients in booking medical appointments clearly and efficiently. "
-                    "Confirm each step along the way, and always ensure final confirmation before booking. "
-                    "Only use the information provided—if something falls outside the scope of available departments or schedules, respond with 'I do not know' and refocus the conversation. "
-                    "Gather appointment details incrementally: department name, preferred day, and preferred time. "
-                    "Avoid overwhelming the user—keep communication simple, friendly, and conversational. "
-                    "Do not read or interpret special characters or symbols. "
-                    f"Available departments: {', '.join(departments)}. "
-                    f"The {open_schedule} is the open schedules for the departments, make sure to choose from these. "
-                    f"These times are time slots that are already booked per department, {booked_slots}, remember to exclude these slots for the available slots and let the user know if applicable."
-                    f"If you were to give the user time slots for availabilites, always use ranges describing the available times from the first and to. This is very important not to be verbose in this matter and be prcise"
-                    f"Always give the available times to the user using ranges and make it easy for the user to choose, make it as humanly as possible. Make sure to use the correct transitions between sentences and words"
-                    f"Remember to always give the user the available time slots for the chosen department, if a time slot is not availble per department, let the user know since it would be already booked."
-                    f"Make sure to confirm with the user before going ahead and booking the appointment."
-                )
-            }
-        )
+        with profile.step("register tools"):
+            self.llm.register_function("confirm_appointment", confirm_appointment)
+            tools = AvailabilityTools(self.enricher)
+            tools.register(self.llm)
+            context.set_tools([CONFIRM_APPOINTMENT_SCHEMA, *TOOL_SCHEMAS])
+
+        # Keep the availability in the system prompt current while the call is live
+        watcher = AvailabilityWatcher(self.enricher)
+
+        async def refresh_schedule(index):
+            context.messages[0]["content"] = prompt_builder.build(index)
 
-        context.set_tools([{
-            "type": "function",
-            "function": {
-                "name": "confirm_appointment",
-                "description": "Confirm appointment with department, day, and time.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "department": {"type": "string"},
-                        "day": {"type": "string"},
-                        "time": {"type": "string"}
-                    },
-                    "required": ["department", "day", "time"]
-                }
-            }
-        }])
+        watcher.add_listener(refresh_schedule)
 
         rtvi = RTVIProcessor(config=RTVIConfig(config=[]))
 
@@ -80,7 +127,10 @@ class BotRunner:
             self.transport.input(),
             rtvi,
             context_agg.user(),
+            ContextPruner(),
+            AvailabilityResponder(self.enricher),
             self.llm,
+            CachedSpeechProcessor(TTSAudioCache(), self.tts, os.getenv("CARTESIA_VOICE_ID", "")),
             self.tts,
             self.transport.output(),
             context_agg.assistant(),
@@ -92,14 +142,60 @@ class BotRunner:
                 enable_metrics=True,
                 enable_usage_metrics=True,
             ),
-            observers=[RTVIObserver(rtvi)]
+            observers=[RTVIObserver(rtvi), LatencyObserver(), AvailabilityPrefetcher(self.enricher, tools)]
         )
 
-        await task.queue_frame(self.quiet_frame)
-        register_event_handlers(rtvi, self.transport, task, context_agg)
+        prepared = asyncio.create_task(self.prepare(task, context, prompt_builder, watcher))
+        register_event_handlers(rtvi, self.transport, task, context_agg, ready=prepared)
+
+        @self.transport.event_handler("on_joined")
+        async def on_joined(transport, data):
+            profile.mark("joined room")
+            profile.report()
 
         runner = PipelineRunner()
-        await runner.run(task)
+        started_at = time.perf_counter()
+        profile.mark("pipeline started")
+        try:
+            await runner.run(task)
+        finally:
+            metrics.observe("bot_call_duration_seconds", time.perf_counter() - started_at)
+            if not prepared.done():
+                prepared.cancel()
+            await watcher.stop()
+
+
+async def wait_for_assignment():
+    """Signals readiness to the server and blocks until it assigns a room."""
+    print(WORKER_READY, flush=True)
+    # The server stops reading our stdout once we are ready, so anything
+    # printed from now on goes to stderr instead of filling the pipe.
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    line = await asyncio.to_thread(sys.stdin.readline)
+    if not line:
+        return None, None
+    assignment = json.loads(line)
+    return assignment["room_url"], assignment["token"]
+
+
+async def run_bot(worker, sprites):
+    async with aiohttp.ClientSession() as session:
+        room_url = token = None
+        preloaded = None
+        if worker:
+            with profile.step("preload services"):
+                preloaded = await preload_services()
+            room_url, token = await wait_for_assignment()
+            if not room_url:
+                logger.info("Bot worker released without a room, exiting")
+                return
+            profile.mark("room assigned")
+        with profile.step("set up services"):
+            transport, tts, llm, enricher = await setup_services(
+                session, room_url, token, preloaded=preloaded
+            )
+        bot = BotRunner(transport, tts, llm, enricher, sprites, cold=not worker)
+        await bot.run()
 
 
 async def main():
@@ -107,13 +203,33 @@ async def main():
     logger.remove(0)
     logger.add(sys.stderr, level="DEBUG")
 
+    parser = argparse.ArgumentParser(description="MedAssist bot")
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Preload services, then wait for a room URL and token on stdin",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Print the start-up timeline once the bot has joined the room",
+    )
+    args, _ = parser.parse_known_args()
+
+    # Decoded off the event loop while the services start and the room is joined
     asset_dir = os.path.join(os.path.dirname(__file__), "assets")
-    quiet_frame, talking_frame = get_static_and_talking_frames(asset_dir)
-
-    async with aiohttp.ClientSession() as session:
-        transport, tts, llm, enricher = await setup_services(session)
-        bot = BotRunner(transport, tts, llm, enricher, quiet_frame, talking_frame)
-        await bot.run()
+    sprites = asyncio.create_task(asyncio.to_thread(get_static_and_talking_frames, asset_dir))
+
+    exporter = asyncio.create_task(export_snapshots())
+    try:
+        await run_bot(args.worker, sprites)
+    finally:
+        exporter.cancel()
+        try:
+            await exporter
+        except asyncio.CancelledError:
+            pass
+        await close_clients()
 
 
 if __name__ == "__main__":
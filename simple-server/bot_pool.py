@@ -0,0 +1,155 @@
+"""Pool of pre-started bot worker processes.
+
+A worker is a bot child started with ``--worker``: it imports pipecat, loads
+the VAD model, the avatar sprites and the MongoDB connection up front, prints
+``WORKER_READY`` on stdout and then blocks until the server writes a single
+JSON line ``{"room_url": ..., "token": ...}`` on its stdin. Handing a session
+to an idle worker skips all of that start-up work on the ``/connect`` path.
+"""
+
+import asyncio
+import json
+import subprocess
+from collections import deque
+from typing import Deque, List, Optional, Set
+
+from loguru import logger
+
+# Line printed by a worker on stdout once it is ready to accept a room
+WORKER_READY = "BOT_WORKER_READY"
+
+
+class BotWorkerPool:
+    """Keeps ``size`` idle bot workers warm and refills the pool in the background.
+
+    Args:
+        command: Command line used to start a worker (must include ``--worker``).
+        size: Number of idle workers to keep ready. ``0`` disables the pool.
+        cwd: Working directory for the worker processes.
+        ready_timeout: Seconds a worker may take to report readiness.
+    """
+
+    def __init__(self, command: List[str], size: int, cwd: str, ready_timeout: float = 120.0):
+        self._command = command
+        self._size = max(size, 0)
+        self._cwd = cwd
+        self._ready_timeout = ready_timeout
+        self._idle: Deque[subprocess.Popen] = deque()
+        self._warming = 0
+        # Workers started but not ready yet, terminated on stop
+        self._starting: Set[subprocess.Popen] = set()
+        self._refill_event = asyncio.Event()
+        self._refill_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    @property
+    def warming_count(self) -> int:
+        return self._warming
+
+    async def start(self):
+        if self._size == 0:
+            return
+        self._refill_task = asyncio.create_task(self._refill_loop())
+        self._refill_event.set()
+
+    async def stop(self):
+        """Stops refilling and terminates every idle or still starting worker."""
+        self._closed = True
+        if self._refill_task:
+            self._refill_task.cancel()
+            try:
+                await self._refill_task
+            except asyncio.CancelledError:
+                pass
+            self._refill_task = None
+        procs = list(self._idle) + list(self._starting)
+        self._idle.clear()
+        await asyncio.gather(*(self._terminate(proc) for proc in procs))
+
+    @staticmethod
+    async def _terminate(proc: subprocess.Popen):
+        if proc.poll() is None:
+            proc.terminate()
+        await asyncio.to_thread(proc.wait)
+
+    async def acquire(self, room_url: str, token: str) -> Optional[subprocess.Popen]:
+        """Hands a room to an idle worker.
+
+        Returns:
+            The worker process now serving the room, or ``None`` when no idle
+            worker is available and the caller should cold-start a bot.
+        """
+        proc = None
+        while self._idle:
+            candidate = self._idle.popleft()
+            if candidate.poll() is not None:
+                logger.warning(f"Idle bot worker {candidate.pid} exited, discarding it")
+                continue
+            try:
+                candidate.stdin.write(json.dumps({"room_url": room_url, "token": token}) + "\n")
+                candidate.stdin.close()
+            except (BrokenPipeError, OSError) as e:
+                logger.warning(f"Failed to hand room to bot worker {candidate.pid}: {e}")
+                candidate.kill()
+                continue
+            proc = candidate
+            break
+        self._refill_event.set()
+        return proc
+
+    async def _refill_loop(self):
+        while not self._closed:
+            await self._refill_event.wait()
+            self._refill_event.clear()
+            missing = self._size - len(self._idle) - self._warming
+            if missing > 0:
+                await asyncio.gather(*(self._start_worker() for _ in range(missing)))
+
+    async def _start_worker(self):
+        self._warming += 1
+        proc = None
+        try:
+            proc = subprocess.Popen(
+                self._command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+                cwd=self._cwd,
+            )
+            self._starting.add(proc)
+            line = await asyncio.wait_for(
+                asyncio.to_thread(proc.stdout.readline), timeout=self._ready_timeout
+            )
+            if line.strip() != WORKER_READY:
+                raise RuntimeError(f"unexpected worker output: {line.strip()!r}")
+            proc.stdout.close()
+            if self._closed:
+                await self._terminate(proc)
+                return
+            self._idle.append(proc)
+            logger.info(f"Bot worker {proc.pid} ready ({len(self._idle)}/{self._size} idle)")
+        except asyncio.CancelledError:
+            # Stopped while the worker was starting: do not leave it behind
+            if proc:
+                await self._terminate(proc)
+            raise
+        except Exception as e:
+            logger.error(f"Failed to start bot worker: {e}")
+            if proc and proc.poll() is None:
+                proc.kill()
+            # Back off before the next refill attempt so a broken worker does
+            # not turn into a tight respawn loop.
+            await asyncio.sleep(5)
+            self._refill_event.set()
+        finally:
+            self._starting.discard(proc)
+            self._warming -= 1
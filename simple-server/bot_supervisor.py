@@ -0,0 +1,210 @@
+"""Supervision of the bot processes started by the server.
+
+The supervisor tracks running bots, refuses new sessions when the node is at
+capacity (bot count, CPU load or available memory), reaps exited children in
+the background and shuts every bot down in parallel.
+
+Admission reserves a slot that counts against ``MAX_BOTS`` until the bot is
+registered or the reservation is released, so a burst of requests that are
+all still creating rooms cannot start more bots than the node takes.
+"""
+
+import asyncio
+import os
+import subprocess
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+
+class AdmissionError(Exception):
+    """Raised when a new bot cannot be admitted.
+
+    Args:
+        reason: Human readable reason for the refusal.
+        retry_after: Seconds after which the client may retry.
+    """
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def available_memory_mb() -> Optional[float]:
+    """``MemAvailable`` from ``/proc/meminfo``, or ``None`` where it is not available."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def load_per_cpu() -> Optional[float]:
+    """One-minute load average divided by the number of CPUs."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except OSError:
+        return None
+
+
+class BotSupervisor:
+    """Tracks bot processes and enforces capacity limits.
+
+    Args:
+        max_bots: Maximum number of concurrently running bots (``MAX_BOTS``).
+        max_bots_per_room: Maximum number of running bots in one room.
+        max_load_per_cpu: Refuse new bots above this one-minute load per CPU (``MAX_LOAD_PER_CPU``).
+        min_available_memory_mb: Refuse new bots below this much available memory
+            (``MIN_AVAILABLE_MEMORY_MB``).
+        retry_after: Seconds suggested to refused clients (``BOT_RETRY_AFTER_SECS``).
+        reap_interval: Seconds between two reaping passes.
+        shutdown_timeout: Seconds a bot has to exit after SIGTERM before it is killed.
+        finished_history: Number of exited bots whose status is still reported.
+    """
+
+    def __init__(
+        self,
+        max_bots: Optional[int] = None,
+        max_bots_per_room: int = 1,
+        max_load_per_cpu: Optional[float] = None,
+        min_available_memory_mb: Optional[float] = None,
+        retry_after: Optional[int] = None,
+        reap_interval: float = 1.0,
+        shutdown_timeout: float = 10.0,
+        finished_history: int = 1000,
+    ):
+        if max_bots is None:
+            max_bots = int(os.getenv("MAX_BOTS", "20"))
+        self.max_bots = max_bots
+        self.max_bots_per_room = max_bots_per_room
+        if max_load_per_cpu is None:
+            max_load_per_cpu = float(os.getenv("MAX_LOAD_PER_CPU", "1.5"))
+        self.max_load_per_cpu = max_load_per_cpu
+        if min_available_memory_mb is None:
+            min_available_memory_mb = float(os.getenv("MIN_AVAILABLE_MEMORY_MB", "512"))
+        self.min_available_memory_mb = min_available_memory_mb
+        if retry_after is None:
+            retry_after = int(os.getenv("BOT_RETRY_AFTER_SECS", "10"))
+        self.retry_after = retry_after
+        self._reap_interval = reap_interval
+        self._shutdown_timeout = shutdown_timeout
+        self._finished_history = finished_history
+        # pid -> (process, room_url)
+        self.procs: Dict[int, Tuple[subprocess.Popen, str]] = {}
+        # pid -> exit code, oldest first
+        self.finished: "OrderedDict[int, int]" = OrderedDict()
+        # Admitted bots that are not registered yet
+        self.pending = 0
+        self._reaper: Optional[asyncio.Task] = None
+
+    @property
+    def active_count(self) -> int:
+        return len(self.procs)
+
+    def start(self):
+        if self._reaper is None:
+            self._reaper = asyncio.create_task(self._reap_loop())
+
+    def admit(self, room_url: Optional[str] = None):
+        """Checks that one more bot fits on this node and reserves a slot for it.
+
+        The slot is held until the bot is registered, or until ``release()``
+        when it never starts.
+
+        Raises:
+            AdmissionError: If the node is at capacity.
+        """
+        self.reap()
+        if len(self.procs) + self.pending >= self.max_bots:
+            raise AdmissionError(f"Bot capacity reached ({self.max_bots})", self.retry_after)
+        if room_url is not None:
+            self.check_room(room_url)
+        load = load_per_cpu()
+        if load is not None and load > self.max_load_per_cpu:
+            raise AdmissionError(f"CPU load too high ({load:.2f} per CPU)", self.retry_after)
+        memory = available_memory_mb()
+        if memory is not None and memory < self.min_available_memory_mb:
+            raise AdmissionError(f"Not enough memory available ({memory:.0f} MB)", self.retry_after)
+        self.pending += 1
+
+    def check_room(self, room_url: str):
+        """Checks that one more bot fits in ``room_url``, without reserving a slot.
+
+        Raises:
+            AdmissionError: If the room already has its bots.
+        """
+        in_room = sum(1 for _, url in self.procs.values() if url == room_url)
+        if in_room >= self.max_bots_per_room:
+            raise AdmissionError(f"Max bot limit reached for room: {room_url}", self.retry_after)
+
+    def release(self):
+        """Gives back the slot reserved by ``admit()`` for a bot that did not start."""
+        self.pending = max(self.pending - 1, 0)
+
+    def register(self, proc: subprocess.Popen, room_url: str):
+        """Tracks a started bot, which takes over the slot reserved for it."""
+        self.procs[proc.pid] = (proc, room_url)
+        self.release()
+
+    def status(self, pid: int) -> Optional[str]:
+        """Returns ``"running"``, ``"finished"`` or ``None`` for an unknown bot."""
+        entry = self.procs.get(pid)
+        if entry is not None:
+            return "running" if entry[0].poll() is None else "finished"
+        if pid in self.finished:
+            return "finished"
+        return None
+
+    def occupancy(self) -> Dict[str, Any]:
+        return {
+            "active": len(self.procs),
+            "pending": self.pending,
+            "max_bots": self.max_bots,
+            "recently_finished": len(self.finished),
+            "load_per_cpu": load_per_cpu(),
+            "available_memory_mb": available_memory_mb(),
+        }
+
+    def reap(self):
+        """Forgets bots that have exited, keeping their exit code for status queries."""
+        for pid, (proc, _) in list(self.procs.items()):
+            returncode = proc.poll()
+            if returncode is not None:
+                del self.procs[pid]
+                self.finished[pid] = returncode
+                logger.info(f"Bot {pid} exited with code {returncode}")
+        while len(self.finished) > self._finished_history:
+            self.finished.popitem(last=False)
+
+    async def shutdown(self):
+        """Stops the reaper and terminates every running bot in parallel."""
+        if self._reaper:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+        await asyncio.gather(*(self._stop(proc) for proc, _ in self.procs.values()))
+        self.reap()
+
+    async def _stop(self, proc: subprocess.Popen):
+        if proc.poll() is not None:
+            return
+        proc.terminate()
+        try:
+            await asyncio.to_thread(proc.wait, self._shutdown_timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"Bot {proc.pid} did not exit after SIGTERM, killing it")
+            proc.kill()
+            await asyncio.to_thread(proc.wait)
+
+    async def _reap_loop(self):
+        while True:
+            await asyncio.sleep(self._reap_interval)
+            self.reap()
@@ -1,6 +1,59 @@
 from datetime import datetime, timedelta
+from typing import Optional
+
 from loguru import logger
+
+from availability import BOOKED, CLOSED, DAYS, AvailabilityIndex
 from mongo_loader import DataEnricher
+from normalization import hhmm, parse_day, parse_time
+
+# Enricher reused by every tool call, backed by the process-wide MongoDB client
+_enricher = None
+
+async def get_enricher():
+    global _enricher
+    if _enricher is None:
+        enricher = DataEnricher()
+        await enricher.connect_to_db()
+        _enricher = enricher
+    return _enricher
+
+def booking_problem(index: AvailabilityIndex, department_id, booking_time: datetime, now: datetime) -> Optional[str]:
+    """Why a requested appointment cannot be booked, or ``None`` when its slot is free.
+
+    The date must be within the availability index horizon and not in the
+    past, and the time must start a slot within the department's opening hours.
+    """
+    day = booking_time.date()
+    if booking_time < now:
+        return f"{day.isoformat()} at {booking_time.strftime('%H:%M')} is in the past. Please ask the caller for a later day."
+    if not index.covers(day):
+        return (
+            f"Appointments can only be booked until {index.dates()[-1].isoformat()}. "
+            f"Please ask the caller for an earlier day."
+        )
+    minutes = booking_time.hour * 60 + booking_time.minute
+    if minutes % index.slot_minutes:
+        return (
+            f"{booking_time.strftime('%H:%M')} is not the start of an appointment slot; slots start every "
+            f"{index.slot_minutes} minutes. Please offer the caller one of the available times."
+        )
+    state = index.slot_states(department_id, day)[minutes // index.slot_minutes]
+    if state == CLOSED:
+        open_days = ", ".join(index.department_days(department_id)) or "no day"
+        return (
+            f"{index.department_name(department_id)} is closed on {DAYS[day.weekday()]} {day.isoformat()} at "
+            f"{booking_time.strftime('%H:%M')} (open on {open_days}). Please offer the caller a time within the opening hours."
+        )
+    if state == BOOKED:
+        return (
+            f"The slot for {index.department_name(department_id)} on {day.isoformat()} at "
+            f"{booking_time.strftime('%H:%M')} is already booked. Please offer the caller another available time."
+        )
+    return None
+
+async def _reply(result_callback, content: str):
+    await result_callback([{"role": "system", "content": content}])
 
 async def confirm_appointment(function_name, tool_call_id, args, llm, context, result_callback):
     try:
@@ -8,35 +61,52 @@ async def confirm_appointment(function_name, tool_call_id, args, llm, context, r
         day = args["day"]
         time_str = args["time"]
 
-        enricher = DataEnricher()
-        await enricher.connect_to_db()
+        # Understand "lundi", "demain" or "quatorze heures trente" rather than
+        # sending the caller round again for an exact English weekday
+        try:
+            target_date = parse_day(day)
+        except ValueError:
+            await _reply(result_callback, f"The day '{day}' could not be understood. Please ask the caller which day they would like.")
+            return
+        try:
+            minutes = parse_time(time_str)
+        except ValueError:
+            await _reply(result_callback, f"The time '{time_str}' could not be understood. Please ask the caller what time they would like.")
+            return
+
+        enricher = await get_enricher()
+        index = await enricher.get_availability_index()
+        department_id = index.department_id(department)
+        if department_id is None:
+            await _reply(result_callback, f"There is no department called '{department}'. Please ask the caller which department they need.")
+            return
+        department = index.department_name(department_id)
 
-        # Calculate the next date matching the requested day
-        today = datetime.now()
-        days_of_week = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        if day not in days_of_week:
-            raise ValueError(f"Invalid day: {day}")
+        # Check against the shared index before writing anything
+        booking_time = datetime.combine(target_date, datetime.min.time()) + timedelta(minutes=minutes)
+        problem = booking_problem(index, department_id, booking_time, datetime.now())
+        if problem:
+            logger.info(f"Appointment request rejected: {problem}")
+            await _reply(result_callback, problem)
+            return
 
-        target_weekday = days_of_week.index(day)
-        days_ahead = (target_weekday - today.weekday() + 7) % 7
-        next_day_date = (today + timedelta(days=days_ahead)).strftime("%Y-%m-%d")
+        next_day_date, time_str = target_date.isoformat(), hhmm(minutes)
 
         # Register the booking
         appointment_id = await enricher.register_booking(department, next_day_date, time_str)
+        if appointment_id is None:
+            await _reply(
+                result_callback,
+                f"The slot for {department} on {next_day_date} at {time_str} is already booked. Please offer the caller another available time.",
+            )
+            return
 
         logger.info(f"Appointment saved. ID: {appointment_id}")
-        await result_callback([
-            {
-                "role": "system",
-                "content": f"The appointment has been confirmed for {department} on {next_day_date} at {time_str}. Thank you!"
-            }
-        ])
+        await _reply(
+            result_callback,
+            f"The appointment has been confirmed for {department} on {next_day_date} at {time_str}. Thank you!",
+        )
 
     except Exception as e:
         logger.error(f"Failed to confirm appointment: {e}")
-        await result_callback([
-            {
-                "role": "system",
-                "content": "Sorry, something went wrong. Could you please confirm the department, day, and time again?"
-            }
-        ])
+        await _reply(result_callback, "Sorry, something went wrong. Could you please confirm the department, day, and time again?")
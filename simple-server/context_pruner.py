@@ -0,0 +1,198 @@
+"""Keeps the LLM context of a call small as the call grows.
+
+``ContextPruner`` sits between the user context aggregator and the LLM and
+rewrites the context before every user turn:
+
+- the system prompt stays first and untouched;
+- results of tool calls made in earlier turns are replaced by a short note,
+  since availability may have changed since and the tool can be called again;
+  ``confirm_appointment`` results are kept, and carried into the note when
+  their turn is summarised, so the model never loses track of a booking made;
+- only the last ``CONTEXT_KEEP_TURNS`` turns are kept verbatim, and fewer when
+  the context is over ``CONTEXT_MAX_TOKENS``; older turns are folded into a
+  short summary of what the caller and the bot said;
+- the booking details collected so far (department, day, time) are taken from
+  the tool call arguments and kept in a note next to the summary, so they
+  survive the turns they came from.
+
+The context size of every turn, and the tokens pruned, are recorded in the
+``bot_context_tokens`` and ``bot_context_pruned_tokens`` histograms.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from pipecat.frames.frames import Frame
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContextFrame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from metrics import MetricsRegistry, metrics
+from prompt_builder import count_tokens
+
+STALE_TOOL_RESULT = "Result from an earlier turn removed; call the tool again if it is still needed."
+
+# Tool arguments that are booking details
+BOOKING_FIELDS = ("department", "day", "time")
+
+# Tools whose results record something done, not a lookup to repeat
+KEPT_TOOLS = ("confirm_appointment",)
+
+
+def message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content")
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content if isinstance(content, str) else ""
+
+
+def shorten(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+class ContextPruner(FrameProcessor):
+    """Windows, summarises and trims the LLM context before each user turn.
+
+    Args:
+        max_tokens: Token ceiling of the context (``CONTEXT_MAX_TOKENS``, default 4000).
+        keep_turns: Most recent turns kept verbatim (``CONTEXT_KEEP_TURNS``, default 6).
+        summary_tokens: Token ceiling of the summary of older turns
+            (``CONTEXT_SUMMARY_TOKENS``, default 300).
+        model: Model name used to pick the tokenizer.
+        registry: Metrics registry, the process-wide one by default.
+    """
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        keep_turns: Optional[int] = None,
+        summary_tokens: Optional[int] = None,
+        model: str = "gpt-4o",
+        registry: Optional[MetricsRegistry] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.max_tokens = max_tokens or int(os.getenv("CONTEXT_MAX_TOKENS", "4000"))
+        self.keep_turns = max(keep_turns or int(os.getenv("CONTEXT_KEEP_TURNS", "6")), 1)
+        self.summary_tokens = summary_tokens or int(os.getenv("CONTEXT_SUMMARY_TOKENS", "300"))
+        self.model = model
+        self.registry = registry or metrics
+        self.booking: Dict[str, str] = {}
+        self.confirmations: List[str] = []
+        self._summary: List[str] = []
+        # Ids of the tool calls whose results are kept
+        self._kept_calls: set = set()
+        # The note holding the summary and booking details, once there is one
+        self._note: Optional[Dict[str, Any]] = None
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        if isinstance(frame, OpenAILLMContextFrame) and direction == FrameDirection.DOWNSTREAM:
+            try:
+                self.prune(frame.context)
+            except Exception as e:
+                logger.error(f"Failed to prune the LLM context: {e}")
+        await self.push_frame(frame, direction)
+
+    def prune(self, context):
+        messages = context.get_messages()
+        before = self.count(messages)
+
+        head = []
+        if messages and messages[0].get("role") == "system":
+            head.append(messages[0])
+        body = [m for m in messages[len(head):] if m is not self._note]
+        self._collect_booking(body)
+
+        turns = self._turns(body)
+        for turn in turns[:-1]:
+            self._drop_tool_results(turn)
+
+        while len(turns) > self.keep_turns:
+            self._summarise(turns.pop(0))
+        while len(turns) > 1 and self.count(head + self._note_messages() + sum(turns, [])) > self.max_tokens:
+            self._summarise(turns.pop(0))
+
+        pruned = head + self._note_messages() + sum(turns, [])
+        after = self.count(pruned)
+        if after > self.max_tokens:
+            logger.warning(f"LLM context is {after} tokens after pruning, over the ceiling of {self.max_tokens}")
+        context.set_messages(pruned)
+        self.registry.observe("bot_context_tokens", after)
+        self.registry.observe("bot_context_pruned_tokens", max(before - after, 0))
+        logger.debug(f"LLM context: {after} tokens in {len(pruned)} messages ({before - after} pruned)")
+
+    def count(self, messages: List[Dict[str, Any]]) -> int:
+        total = 0
+        for message in messages:
+            # Per-message overhead of the chat format
+            total += 4 + count_tokens(message_text(message), self.model)
+            if message.get("tool_calls"):
+                total += count_tokens(json.dumps(message["tool_calls"]), self.model)
+        return total
+
+    @staticmethod
+    def _turns(messages: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Groups messages into turns, each starting at a user message."""
+        turns: List[List[Dict[str, Any]]] = []
+        for message in messages:
+            if message.get("role") == "user" or not turns:
+                turns.append([])
+            turns[-1].append(message)
+        return turns
+
+    def _drop_tool_results(self, turn: List[Dict[str, Any]]):
+        for message in turn:
+            if (
+                message.get("role") == "tool"
+                and message.get("content") != STALE_TOOL_RESULT
+                and message.get("tool_call_id") not in self._kept_calls
+            ):
+                message["content"] = STALE_TOOL_RESULT
+
+    def _collect_booking(self, messages: List[Dict[str, Any]]):
+        for message in messages:
+            for call in message.get("tool_calls") or []:
+                if call.get("function", {}).get("name") in KEPT_TOOLS:
+                    self._kept_calls.add(call.get("id"))
+                try:
+                    arguments = json.loads(call.get("function", {}).get("arguments") or "{}")
+                except (TypeError, ValueError):
+                    continue
+                for field in BOOKING_FIELDS:
+                    value = arguments.get(field) if isinstance(arguments, dict) else None
+                    if isinstance(value, str) and value.strip():
+                        self.booking[field] = value.strip()
+
+    def _summarise(self, turn: List[Dict[str, Any]]):
+        for message in turn:
+            text = message_text(message)
+            if not text:
+                continue
+            if message.get("role") == "tool" and message.get("tool_call_id") in self._kept_calls:
+                self.confirmations.append(shorten(text, 300))
+            elif message.get("role") == "user":
+                self._summary.append(f"Caller: {shorten(text, 120)}")
+            elif message.get("role") == "assistant":
+                self._summary.append(f"Assistant: {shorten(text, 120)}")
+        while len(self._summary) > 1 and count_tokens(" ".join(self._summary), self.model) > self.summary_tokens:
+            self._summary.pop(0)
+
+    def _note_messages(self) -> List[Dict[str, Any]]:
+        parts = []
+        if self._summary:
+            parts.append("Summary of the earlier part of this call: " + " | ".join(self._summary))
+        if self.confirmations:
+            parts.append("Appointment confirmations earlier in this call: " + " | ".join(self.confirmations))
+        if self.booking:
+            details = ", ".join(f"{field}: {self.booking[field]}" for field in BOOKING_FIELDS if field in self.booking)
+            parts.append(f"Booking details collected so far: {details}.")
+        if not parts:
+            return []
+        if self._note is None:
+            self._note = {"role": "system", "content": ""}
+        self._note["content"] = " ".join(parts)
+        return [self._note]
@@ -1,9 +1,21 @@
+import asyncio
+from loguru import logger
 from pipecat.frames.frames import EndFrame
 
-def register_event_handlers(rtvi, transport, task, context_aggregator):
+def register_event_handlers(rtvi, transport, task, context_aggregator, ready=None):
+    """Registers the call's event handlers.
+
+    ``ready`` is an optional task the first LLM turn waits for, so the bot can
+    join the room before its startup work is done.
+    """
     @rtvi.event_handler("on_client_ready")
     async def on_client_ready(rtvi):
         await rtvi.set_bot_ready()
+        if ready is not None:
+            try:
+                await asyncio.shield(ready)
+            except Exception as e:
+                logger.error(f"Bot startup failed, continuing without it: {e}")
         await task.queue_frames([context_aggregator.user().get_context_frame()])
 
     @transport.event_handler("on_first_participant_joined")
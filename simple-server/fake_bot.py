@@ -0,0 +1,51 @@
+"""Stand-in for the bot process, used by the server load test.
+
+Accepts the same command lines as ``bot-openai.py``: ``-u ROOM -t TOKEN`` for
+a cold-started bot, or ``--worker`` to report readiness and wait for a room on
+stdin. Instead of joining a call it sleeps for a start-up and a session
+duration drawn around the values given by the environment:
+
+- ``FAKE_BOT_STARTUP_SECS``: start-up time before joining the room (default 2.0)
+- ``FAKE_BOT_SESSION_SECS``: length of the simulated call (default 30.0)
+- ``FAKE_BOT_MEMORY_MB``: memory held for the length of the call (default 0)
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from bot_pool import WORKER_READY
+
+
+def jittered(variable: str, default: float) -> float:
+    value = float(os.getenv(variable, str(default)))
+    return max(random.uniform(0.8, 1.2) * value, 0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake MedAssist bot")
+    parser.add_argument("-u", "--url", help="Daily room URL")
+    parser.add_argument("-t", "--token", help="Daily token")
+    parser.add_argument("--worker", action="store_true")
+    args, _ = parser.parse_known_args()
+
+    # A worker does its start-up work before it is handed a room
+    time.sleep(jittered("FAKE_BOT_STARTUP_SECS", 2.0))
+    if args.worker:
+        print(WORKER_READY, flush=True)
+        line = sys.stdin.readline()
+        if not line:
+            return
+        json.loads(line)
+
+    # Touch every page so the memory is actually resident
+    ballast = b"\x01" * int(float(os.getenv("FAKE_BOT_MEMORY_MB", "0")) * 1024 * 1024)
+    time.sleep(jittered("FAKE_BOT_SESSION_SECS", 30.0))
+    del ballast
+
+
+if __name__ == "__main__":
+    main()
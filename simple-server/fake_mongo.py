@@ -0,0 +1,522 @@
+"""In-process stand-in for the Motor database used by ``DataEnricher``.
+
+``FakeDatabase`` implements the subset of the ``AsyncIOMotorDatabase`` and
+``AsyncIOMotorCollection`` API the bot uses: ``find``, ``find_one``,
+``count_documents``, ``insert_one``, ``insert_many``, ``update_one`` (with
+upsert), ``update_many``, ``delete_many``, ``create_indexes`` and ``aggregate`` with the
+stages of our pipelines. It lets benchmarks and load tests run without a
+MongoDB server.
+
+Indexes are simulated closely enough to show how queries would execute: a
+query whose filter constrains the leading field of an index only examines
+the matching documents, any other query scans the whole collection. Every
+operation is counted in ``FakeDatabase.stats`` together with the number of
+documents examined and of collection scans, which makes N+1 query patterns
+and missing indexes visible. Unique (and partial unique) indexes are
+enforced and raise ``DuplicateKeyError`` like the server does.
+"""
+
+import re
+from collections import Counter, defaultdict
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+_MISSING = object()
+
+
+def _get_path(doc: Any, path: str) -> Any:
+    """Value at a dotted path, mapping over arrays like MongoDB does."""
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, list):
+            value = [v.get(part, _MISSING) for v in value if isinstance(v, dict)]
+            value = [v for v in value if v is not _MISSING]
+        elif isinstance(value, dict):
+            value = value.get(part, _MISSING)
+        else:
+            return _MISSING
+        if value is _MISSING:
+            return _MISSING
+    return value
+
+
+def _compare(value: Any, op: str, operand: Any) -> bool:
+    if op == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if op == "$in":
+        return any(_equals(value, item) for item in operand)
+    if op == "$nin":
+        return not any(_equals(value, item) for item in operand)
+    if op == "$ne":
+        return not _equals(value, operand)
+    if op == "$eq":
+        return _equals(value, operand)
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if op == "$gt":
+            return value > operand
+        if op == "$gte":
+            return value >= operand
+        if op == "$lt":
+            return value < operand
+        if op == "$lte":
+            return value <= operand
+    except TypeError:
+        return False
+    if op == "$regex":
+        return isinstance(value, str) and re.search(operand, value) is not None
+    raise NotImplementedError(f"Unsupported query operator: {op}")
+
+
+def _equals(value: Any, operand: Any) -> bool:
+    if value is _MISSING:
+        return operand is None
+    if isinstance(value, list) and not isinstance(operand, list):
+        return operand in value
+    return value == operand
+
+
+def matches(doc: Dict[str, Any], query: Optional[Dict[str, Any]]) -> bool:
+    """Whether ``doc`` matches a MongoDB query filter."""
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            if not all(matches(doc, q) for q in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, q) for q in condition):
+                return False
+        elif isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            value = _get_path(doc, key)
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        elif not _equals(_get_path(doc, key), condition):
+            return False
+    return True
+
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not projection:
+        return dict(doc)
+    included = {k for k, v in projection.items() if v and k != "_id"}
+    if included:
+        # Dotted paths keep their whole top-level field
+        top_level = {k.split(".")[0] for k in included}
+        result = {k: v for k, v in doc.items() if k in top_level}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return result
+    excluded = {k for k, v in projection.items() if not v}
+    return {k: v for k, v in doc.items() if k not in excluded}
+
+
+def _evaluate(expression: Any, doc: Dict[str, Any]) -> Any:
+    """Evaluates an aggregation expression against ``doc``."""
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = _get_path(doc, expression[1:])
+        return None if value is _MISSING else value
+    if isinstance(expression, dict) and len(expression) == 1:
+        op, args = next(iter(expression.items()))
+        if op == "$dateToString":
+            value = _evaluate(args["date"], doc)
+            return value.strftime(args["format"]) if isinstance(value, datetime) else None
+        if op == "$slice":
+            values, count = (_evaluate(a, doc) for a in args)
+            return values[:count] if count >= 0 else values[count:]
+        if op == "$arrayElemAt":
+            values, position = (_evaluate(a, doc) for a in args)
+            try:
+                return values[position]
+            except (IndexError, TypeError):
+                return None
+        if op == "$size":
+            return len(_evaluate(args, doc))
+        if op.startswith("$"):
+            raise NotImplementedError(f"Unsupported aggregation expression: {op}")
+    if isinstance(expression, dict):
+        return {k: _evaluate(v, doc) for k, v in expression.items()}
+    if isinstance(expression, list):
+        return [_evaluate(v, doc) for v in expression]
+    return expression
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(_hashable(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _hashable(v)) for k, v in value.items()))
+    return value
+
+
+class _Index:
+    def __init__(self, document: Dict[str, Any]):
+        self.name = document["name"]
+        self.fields = list(document["key"].keys())
+        self.unique = document.get("unique", False)
+        self.partial = document.get("partialFilterExpression")
+        # leading field value -> ids of documents holding it
+        self.buckets: Dict[Any, Set[Any]] = defaultdict(set)
+        # full key -> id, for unique indexes
+        self.keys: Dict[Tuple, Any] = {}
+
+    def covers(self, doc: Dict[str, Any]) -> bool:
+        return self.partial is None or matches(doc, self.partial)
+
+    def key(self, doc: Dict[str, Any]) -> Tuple:
+        values = (_get_path(doc, field) for field in self.fields)
+        return tuple(_hashable(None if value is _MISSING else value) for value in values)
+
+    def add(self, doc: Dict[str, Any]):
+        if not self.covers(doc):
+            return
+        key = self.key(doc)
+        if self.unique:
+            if key in self.keys and self.keys[key] != doc["_id"]:
+                raise DuplicateKeyError(f"E11000 duplicate key error index: {self.name} dup key: {key}")
+            self.keys[key] = doc["_id"]
+        self.buckets[key[0]].add(doc["_id"])
+
+    def discard(self, doc: Dict[str, Any]):
+        if not self.covers(doc):
+            return
+        key = self.key(doc)
+        if self.unique and self.keys.get(key) == doc["_id"]:
+            del self.keys[key]
+        bucket = self.buckets.get(key[0])
+        if bucket is not None:
+            bucket.discard(doc["_id"])
+            if not bucket:
+                del self.buckets[key[0]]
+
+    def candidates(self, query: Dict[str, Any]) -> Optional[List[Set[Any]]]:
+        """Buckets of ids matching the leading field, or ``None`` if the index does not apply."""
+        if self.partial is not None and not self._implies_partial(query):
+            return None
+        condition = query.get(self.fields[0], _MISSING)
+        if condition is _MISSING:
+            return None
+        if isinstance(condition, dict) and any(k.startswith("$") for k in condition):
+            if "$eq" in condition:
+                values = [condition["$eq"]]
+            elif "$in" in condition:
+                values = condition["$in"]
+            else:
+                # Range on the leading field: every bucket in range
+                return [
+                    ids
+                    for value, ids in self.buckets.items()
+                    if all(_compare(value, op, v) for op, v in condition.items())
+                ]
+        else:
+            values = [condition]
+        return [self.buckets[v] for v in {_hashable(value) for value in values} if v in self.buckets]
+
+    def _implies_partial(self, query: Dict[str, Any]) -> bool:
+        # Only the shape we use: the query restricts the same field to a subset
+        for field, condition in self.partial.items():
+            wanted = query.get(field)
+            allowed = condition.get("$in", []) if isinstance(condition, dict) else [condition]
+            if isinstance(wanted, dict) and "$in" in wanted:
+                if not all(v in allowed for v in wanted["$in"]):
+                    return False
+            elif wanted is None or wanted not in allowed:
+                return False
+        return True
+
+
+class FakeCursor:
+    def __init__(self, collection: "FakeCollection", query, projection):
+        self._collection = collection
+        self._query = query or {}
+        self._projection = projection
+        self._sort: List[Tuple[str, int]] = []
+        self._limit = 0
+        self._results: Optional[List[Dict[str, Any]]] = None
+
+    def sort(self, key, direction: int = 1) -> "FakeCursor":
+        self._sort = list(key) if isinstance(key, list) else [(key, direction)]
+        return self
+
+    def limit(self, count: int) -> "FakeCursor":
+        self._limit = count
+        return self
+
+    def _execute(self) -> List[Dict[str, Any]]:
+        if self._results is None:
+            docs = self._collection._select(self._query)
+            for field, direction in reversed(self._sort):
+                docs.sort(key=lambda d: _sort_key(_get_path(d, field)), reverse=direction < 0)
+            if self._limit:
+                docs = docs[: self._limit]
+            self._results = [_project(d, self._projection) for d in docs]
+        return self._results
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        results = self._execute()
+        return list(results if length is None else results[:length])
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._execute():
+            yield doc
+
+
+def _sort_key(value: Any):
+    return (value is _MISSING or value is None, value if value is not _MISSING else None)
+
+
+class FakeCollection:
+    def __init__(self, database: "FakeDatabase", name: str):
+        self.name = name
+        self._database = database
+        self._docs: Dict[Any, Dict[str, Any]] = {}
+        self._indexes: Dict[str, _Index] = {}
+
+    def _count(self, operation: str):
+        self._database.stats[f"{self.name}.{operation}"] += 1
+        self._database.stats["queries"] += 1
+
+    def _select(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if "_id" in query and not isinstance(query["_id"], dict):
+            doc = self._docs.get(query["_id"])
+            self._database.stats["docs_examined"] += int(doc is not None)
+            return [doc] if doc is not None and matches(doc, query) else []
+        best_index, best_buckets, best_size = None, None, None
+        for index in self._indexes.values():
+            buckets = index.candidates(query)
+            if buckets is None:
+                continue
+            size = sum(len(ids) for ids in buckets)
+            if best_size is None or size < best_size:
+                best_index, best_buckets, best_size = index, buckets, size
+        if best_index is None:
+            self._database.stats["collection_scans"] += 1
+            self._database.stats["docs_examined"] += len(self._docs)
+            return [doc for doc in self._docs.values() if matches(doc, query)]
+        examined: Iterable[Dict[str, Any]] = (self._docs[i] for ids in best_buckets for i in ids)
+        if len(best_index.fields) > 1 and best_index.fields[1] in query:
+            # The second key field bounds the index scan too; only documents
+            # within those bounds are fetched.
+            bounds = {best_index.fields[1]: query[best_index.fields[1]]}
+            examined = [doc for doc in examined if matches(doc, bounds)]
+        else:
+            examined = list(examined)
+        self._database.stats["docs_examined"] += len(examined)
+        return [doc for doc in examined if matches(doc, query)]
+
+    def _insert(self, doc: Dict[str, Any]):
+        doc.setdefault("_id", ObjectId())
+        if doc["_id"] in self._docs:
+            raise DuplicateKeyError(f"E11000 duplicate key error index: _id_ dup key: {doc['_id']}")
+        added = []
+        try:
+            for index in self._indexes.values():
+                index.add(doc)
+                added.append(index)
+        except DuplicateKeyError:
+            for index in added:
+                index.discard(doc)
+            raise
+        self._docs[doc["_id"]] = doc
+
+    def _replace(self, old: Dict[str, Any], new: Dict[str, Any]):
+        for index in self._indexes.values():
+            index.discard(old)
+        try:
+            for index in self._indexes.values():
+                index.add(new)
+        except DuplicateKeyError:
+            for index in self._indexes.values():
+                index.discard(new)
+                index.add(old)
+            raise
+        self._docs[new["_id"]] = new
+
+    def find(self, filter: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None) -> FakeCursor:
+        self._count("find")
+        return FakeCursor(self, filter, projection)
+
+    async def find_one(self, filter: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None):
+        self._count("find")
+        results = FakeCursor(self, filter, projection).limit(1)._execute()
+        return results[0] if results else None
+
+    async def count_documents(self, filter: Dict[str, Any]) -> int:
+        self._count("count")
+        return len(self._select(filter))
+
+    async def insert_one(self, document: Dict[str, Any]):
+        self._count("insert")
+        doc = dict(document)
+        self._insert(doc)
+        document.setdefault("_id", doc["_id"])
+        return SimpleNamespace(inserted_id=doc["_id"], acknowledged=True)
+
+    async def insert_many(self, documents: Iterable[Dict[str, Any]], ordered: bool = True):
+        self._count("insert")
+        inserted = []
+        for document in documents:
+            doc = dict(document)
+            try:
+                self._insert(doc)
+            except DuplicateKeyError:
+                if ordered:
+                    raise
+                continue
+            inserted.append(doc["_id"])
+        return SimpleNamespace(inserted_ids=inserted, acknowledged=True)
+
+    async def update_one(self, filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False):
+        self._count("update")
+        found = self._select(filter)
+        if found:
+            old = found[0]
+            new = {**old, **update.get("$set", {})}
+            if new != old:
+                self._replace(old, new)
+            return SimpleNamespace(matched_count=1, modified_count=int(new != old), upserted_id=None)
+        if not upsert:
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+        doc = {
+            k: v for k, v in filter.items()
+            if not k.startswith("$") and not (isinstance(v, dict) and any(op.startswith("$") for op in v))
+        }
+        doc.update(update.get("$setOnInsert", {}))
+        doc.update(update.get("$set", {}))
+        self._insert(doc)
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+
+    async def update_many(self, filter: Dict[str, Any], update: Dict[str, Any]):
+        self._count("update")
+        found = self._select(filter)
+        modified = 0
+        for old in found:
+            new = {**old, **update.get("$set", {})}
+            if new != old:
+                self._replace(old, new)
+                modified += 1
+        return SimpleNamespace(matched_count=len(found), modified_count=modified)
+
+    async def delete_many(self, filter: Dict[str, Any]):
+        self._count("delete")
+        found = self._select(filter)
+        for doc in found:
+            for index in self._indexes.values():
+                index.discard(doc)
+            del self._docs[doc["_id"]]
+        return SimpleNamespace(deleted_count=len(found))
+
+    async def create_indexes(self, indexes) -> List[str]:
+        self._count("createIndexes")
+        names = []
+        for model in indexes:
+            index = _Index(model.document)
+            if index.name not in self._indexes:
+                for doc in self._docs.values():
+                    index.add(doc)
+                self._indexes[index.name] = index
+            names.append(index.name)
+        return names
+
+    async def drop(self):
+        self._docs.clear()
+        self._indexes.clear()
+
+    def aggregate(self, pipeline: List[Dict[str, Any]]):
+        self._count("aggregate")
+        return self._aggregate(pipeline)
+
+    async def _aggregate(self, pipeline: List[Dict[str, Any]]):
+        stages = list(pipeline)
+        if stages and "$match" in stages[0]:
+            docs = self._select(stages.pop(0)["$match"])
+        else:
+            docs = list(self._docs.values())
+            self._database.stats["collection_scans"] += 1
+            self._database.stats["docs_examined"] += len(docs)
+        for stage in stages:
+            docs = self._run_stage(stage, docs)
+        for doc in docs:
+            yield doc
+
+    def _run_stage(self, stage: Dict[str, Any], docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        name, spec = next(iter(stage.items()))
+        if name == "$match":
+            return [d for d in docs if matches(d, spec)]
+        if name == "$sort":
+            for field, direction in reversed(list(spec.items())):
+                docs = sorted(docs, key=lambda d: _sort_key(_get_path(d, field)), reverse=direction < 0)
+            return docs
+        if name == "$limit":
+            return docs[:spec]
+        if name == "$group":
+            groups: Dict[Any, Dict[str, Any]] = {}
+            for doc in docs:
+                key = _evaluate(spec["_id"], doc)
+                group = groups.setdefault(_hashable(key), {"_id": key})
+                for field, accumulator in spec.items():
+                    if field == "_id":
+                        continue
+                    op, expression = next(iter(accumulator.items()))
+                    value = _evaluate(expression, doc)
+                    if op == "$push":
+                        group.setdefault(field, []).append(value)
+                    elif op == "$sum":
+                        group[field] = group.get(field, 0) + value
+                    elif op == "$first":
+                        group.setdefault(field, value)
+                    else:
+                        raise NotImplementedError(f"Unsupported accumulator: {op}")
+            return list(groups.values())
+        if name == "$project":
+            projected = []
+            for doc in docs:
+                result = {"_id": doc.get("_id")} if spec.get("_id", 1) else {}
+                for field, expression in spec.items():
+                    if field == "_id":
+                        continue
+                    if expression in (1, True):
+                        value = _get_path(doc, field)
+                        if value is not _MISSING:
+                            result[field] = value
+                    elif expression not in (0, False):
+                        result[field] = _evaluate(expression, doc)
+                projected.append(result)
+            return projected
+        if name == "$lookup":
+            foreign = self._database[spec["from"]]
+            joined = []
+            for doc in docs:
+                value = _get_path(doc, spec["localField"])
+                query = {spec["foreignField"]: None if value is _MISSING else value}
+                # Runs server side, so it is not a round trip of its own
+                self._database.stats[f"{foreign.name}.lookup"] += 1
+                joined.append({**doc, spec["as"]: [dict(d) for d in foreign._select(query)]})
+            return joined
+        if name == "$count":
+            return [{spec: len(docs)}]
+        raise NotImplementedError(f"Unsupported aggregation stage: {name}")
+
+
+class FakeDatabase:
+    """Dict-like database of ``FakeCollection`` objects, with operation statistics."""
+
+    def __init__(self, name: str = "fake"):
+        self.name = name
+        self.stats: Counter = Counter()
+        self._collections: Dict[str, FakeCollection] = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = FakeCollection(self, name)
+        return collection
+
+    def reset_stats(self):
+        self.stats.clear()
@@ -0,0 +1,79 @@
+"""Pipeline observer recording per-turn latencies into the metrics registry."""
+
+import time
+from typing import Dict, Optional
+
+from pipecat.frames.frames import (
+    FunctionCallInProgressFrame,
+    FunctionCallResultFrame,
+    LLMTextFrame,
+    TTSAudioRawFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.observers.base_observer import BaseObserver, FramePushed
+
+from metrics import MetricsRegistry, metrics
+
+
+class LatencyObserver(BaseObserver):
+    """Times each user turn from the end of speech to the first bot audio.
+
+    A frame is reported every time it moves between two processors, so each
+    measurement is taken on the first push of a frame and the turn state makes
+    sure it is only recorded once per turn. Tool calls are timed from their
+    in-progress frame to their result frame.
+
+    Args:
+        registry: Registry receiving the observations (the process registry by default).
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        super().__init__()
+        self._registry = registry or metrics
+        self._last_vad_frame_id: Optional[int] = None
+        self._user_stopped_at: Optional[float] = None
+        self._llm_first_token_at: Optional[float] = None
+        self._tts_pending = False
+        # tool_call_id -> start time
+        self._tool_calls: Dict[str, float] = {}
+
+    async def on_push_frame(self, data: FramePushed):
+        frame = data.frame
+        now = time.perf_counter()
+
+        if isinstance(frame, UserStartedSpeakingFrame):
+            self._user_stopped_at = None
+            self._llm_first_token_at = None
+            self._tts_pending = False
+        elif isinstance(frame, UserStoppedSpeakingFrame):
+            if frame.id != self._last_vad_frame_id:
+                self._last_vad_frame_id = frame.id
+                self._user_stopped_at = now
+                self._llm_first_token_at = None
+                self._tts_pending = True
+        elif isinstance(frame, LLMTextFrame):
+            if self._user_stopped_at is not None and self._llm_first_token_at is None:
+                self._llm_first_token_at = now
+                self._registry.observe(
+                    "bot_vad_to_llm_first_token_seconds", now - self._user_stopped_at
+                )
+        elif isinstance(frame, TTSAudioRawFrame):
+            if self._tts_pending and self._user_stopped_at is not None:
+                self._tts_pending = False
+                self._registry.observe(
+                    "bot_vad_to_tts_first_audio_seconds", now - self._user_stopped_at
+                )
+                if self._llm_first_token_at is not None:
+                    self._registry.observe(
+                        "bot_llm_first_token_to_tts_first_audio_seconds",
+                        now - self._llm_first_token_at,
+                    )
+        elif isinstance(frame, FunctionCallInProgressFrame):
+            self._tool_calls.setdefault(frame.tool_call_id, now)
+        elif isinstance(frame, FunctionCallResultFrame):
+            started_at = self._tool_calls.pop(frame.tool_call_id, None)
+            if started_at is not None:
+                self._registry.observe(
+                    "bot_tool_call_seconds", now - started_at, tool=frame.function_name
+                )
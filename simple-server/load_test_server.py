@@ -0,0 +1,342 @@
+"""Offline load test of ``server.py``.
+
+The server runs in a child process with the Daily REST API and the bot
+replaced by local fakes (``FakeDailyRESTHelper`` and ``fake_bot.py``), so no
+network access or API key is needed. The driver opens sessions on ``/connect``
+and ``/`` at a Poisson arrival rate, polls ``/status/{pid}`` for running bots
+and samples the server's process tree while the test runs. Status queries
+pick pids from that tree, so idle pool workers, which are not sessions yet,
+answer 404. At the end it reports:
+
+- request latency percentiles and status codes per endpoint
+- spawn throughput (sessions started per second)
+- bot processes, server memory, bot memory and supervisor history over time
+- the time the server takes to shut down with every bot still running
+
+Examples:
+    python load_test_server.py --rate 2 --duration 60
+    python load_test_server.py --rate 5 --duration 120 --session-secs 45 --pool-size 4 --max-bots 100
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+BOT_DIR = os.path.dirname(os.path.abspath(__file__))
+FAKE_BOT = os.path.join(BOT_DIR, "fake_bot.py")
+
+
+class FakeDailyRESTHelper:
+    """Drop-in for ``DailyRESTHelper`` that creates rooms and tokens locally.
+
+    Each call waits ``FAKE_DAILY_LATENCY_SECS`` (default 0.15) to mimic the
+    REST round-trip.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._latency = float(os.getenv("FAKE_DAILY_LATENCY_SECS", "0.15"))
+
+    async def create_room(self, params):
+        from pipecat.transports.services.helpers.daily_rest import DailyRoomObject
+
+        await asyncio.sleep(self._latency)
+        name = uuid.uuid4().hex[:12]
+        return DailyRoomObject(
+            id=name,
+            name=name,
+            api_created=True,
+            privacy="public",
+            url=f"https://fake.daily.co/{name}",
+            created_at="1970-01-01T00:00:00.000Z",
+            config=params.properties,
+        )
+
+    async def get_token(self, room_url: str, expiry_time: float = 3600, **kwargs) -> str:
+        await asyncio.sleep(self._latency)
+        return f"token-{uuid.uuid4().hex}"
+
+    async def delete_room_by_url(self, room_url: str) -> bool:
+        await asyncio.sleep(self._latency)
+        return True
+
+
+def serve(port: int):
+    """Runs ``server.app`` with the fakes in place of Daily and the bot."""
+    import uvicorn
+
+    import server
+
+    server.DailyRESTHelper = FakeDailyRESTHelper
+    server.get_bot_command = lambda *args: [sys.executable, FAKE_BOT, *args]
+    uvicorn.run(server.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def process_tree(pid: int) -> List[int]:
+    """Descendants of ``pid``, read from ``/proc``."""
+    children = defaultdict(list)
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; fields resume after ')'
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children[ppid].append(int(entry))
+    tree, pending = [], [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            tree.append(child)
+            pending.append(child)
+    return tree
+
+
+def rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+class LoadTest:
+    """Drives a server started with ``serve`` and collects measurements."""
+
+    def __init__(self, base_url: str, server_pid: int, args: argparse.Namespace):
+        self.base_url = base_url
+        self.server_pid = server_pid
+        self.args = args
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.samples: List[Dict[str, Any]] = []
+        self.started_sessions = 0
+
+    async def _request(self, session: aiohttp.ClientSession, method: str, endpoint: str, path: str):
+        start = time.perf_counter()
+        try:
+            async with session.request(method, f"{self.base_url}{path}", allow_redirects=False) as response:
+                await response.read()
+                status = response.status
+        except aiohttp.ClientError as e:
+            status = type(e).__name__
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        self.statuses[endpoint][status] += 1
+        return status
+
+    async def _open_session(self, session: aiohttp.ClientSession):
+        if random.random() < self.args.root_share:
+            status = await self._request(session, "GET", "GET /", "/")
+            ok = status == 307
+        else:
+            status = await self._request(session, "POST", "POST /connect", "/connect")
+            ok = status == 200
+        if ok:
+            self.started_sessions += 1
+
+    async def _poll_status(self, session: aiohttp.ClientSession, bots: List[int]):
+        if bots:
+            pid = random.choice(bots)
+            await self._request(session, "GET", "GET /status/{pid}", f"/status/{pid}")
+
+    async def _sample(self, session: aiohttp.ClientSession, started_at: float):
+        tree = process_tree(self.server_pid)
+        occupancy = {}
+        try:
+            async with session.get(f"{self.base_url}/status") as response:
+                occupancy = await response.json()
+        except aiohttp.ClientError:
+            pass
+        self.samples.append({
+            "t": time.perf_counter() - started_at,
+            "processes": len(tree),
+            "server_rss_mb": rss_mb(self.server_pid),
+            "bots_rss_mb": sum(rss_mb(pid) for pid in tree),
+            "active": occupancy.get("active"),
+            "recently_finished": occupancy.get("recently_finished"),
+            "idle_workers": occupancy.get("pool", {}).get("idle"),
+        })
+        return tree
+
+    async def run(self):
+        tasks = set()
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
+            started_at = time.perf_counter()
+            deadline = started_at + self.args.duration
+            next_arrival = started_at
+            next_sample = started_at
+            bots: List[int] = []
+            while time.perf_counter() < deadline:
+                now = time.perf_counter()
+                if now >= next_sample:
+                    bots = await self._sample(session, started_at)
+                    next_sample += self.args.sample_interval
+                    for _ in range(self.args.status_polls):
+                        tasks.add(asyncio.create_task(self._poll_status(session, bots)))
+                if now >= next_arrival:
+                    tasks.add(asyncio.create_task(self._open_session(session)))
+                    next_arrival += random.expovariate(self.args.rate)
+                tasks = {t for t in tasks if not t.done()}
+                await asyncio.sleep(max(min(next_arrival, next_sample) - time.perf_counter(), 0))
+            await asyncio.gather(*tasks)
+            await self._sample(session, started_at)
+            self.elapsed = time.perf_counter() - started_at
+
+    def report(self, shutdown_secs: Optional[float], leftover: int):
+        print("\nRequests")
+        header = f"{'endpoint':22} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}  statuses"
+        print(header)
+        print("-" * len(header))
+        for endpoint, samples in sorted(self.latencies.items()):
+            statuses = ", ".join(f"{k}: {v}" for k, v in sorted(self.statuses[endpoint].items(), key=str))
+            print(
+                f"{endpoint:22} {len(samples):6d} {percentile(samples, 0.5) * 1000:9.1f} "
+                f"{percentile(samples, 0.95) * 1000:9.1f} {percentile(samples, 0.99) * 1000:9.1f} "
+                f"{max(samples) * 1000:9.1f}  {statuses}"
+            )
+        print(f"\nSpawn throughput: {self.started_sessions / self.elapsed:.2f} sessions/s "
+              f"({self.started_sessions} sessions in {self.elapsed:.0f}s)")
+
+        print("\nServer process tree over time")
+        header = f"{'t s':>6} {'procs':>6} {'active':>7} {'idle':>5} {'finished':>9} {'server MB':>10} {'bots MB':>9}"
+        print(header)
+        print("-" * len(header))
+        for s in self.samples:
+            print(
+                f"{s['t']:6.0f} {s['processes']:6d} {s['active'] if s['active'] is not None else '-':>7} "
+                f"{s['idle_workers'] if s['idle_workers'] is not None else '-':>5} "
+                f"{s['recently_finished'] if s['recently_finished'] is not None else '-':>9} "
+                f"{s['server_rss_mb']:10.1f} {s['bots_rss_mb']:9.1f}"
+            )
+        if shutdown_secs is None:
+            print("\nShutdown: server did not exit in time and was killed")
+        else:
+            print(f"\nShutdown: {shutdown_secs:.2f}s, {leftover} processes left behind")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_until_up(base_url: str, proc: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.perf_counter() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.perf_counter() < deadline:
+            if proc.poll() is not None:
+                raise RuntimeError(f"Server exited with code {proc.returncode}")
+            try:
+                async with session.get(f"{base_url}/status") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not start in time")
+
+
+async def drive(args: argparse.Namespace):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "BOT_POOL_SIZE": str(args.pool_size),
+        "ROOM_POOL_SIZE": str(args.room_pool_size),
+        "MAX_BOTS": str(args.max_bots),
+        "MAX_LOAD_PER_CPU": str(args.max_load_per_cpu),
+        "SESSION_REGISTRY": "memory",
+        "METRICS_DIR": tempfile.mkdtemp(prefix="loadtest-metrics-"),
+        "FAKE_BOT_STARTUP_SECS": str(args.startup_secs),
+        "FAKE_BOT_SESSION_SECS": str(args.session_secs),
+        "FAKE_BOT_MEMORY_MB": str(args.bot_memory_mb),
+        "FAKE_DAILY_LATENCY_SECS": str(args.daily_latency_secs),
+    }
+    log_path = os.path.join(tempfile.gettempdir(), f"loadtest-server-{port}.log")
+    with open(log_path, "w") as log:
+        proc = subprocess.Popen(
+            [sys.executable, __file__, "serve", "--port", str(port)],
+            cwd=BOT_DIR,
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    print(f"Server pid {proc.pid} on {base_url}, log in {log_path}")
+    try:
+        await wait_until_up(base_url, proc)
+        # Give the worker pool time to warm up before measuring
+        await asyncio.sleep(args.warmup)
+        test = LoadTest(base_url, proc.pid, args)
+        await test.run()
+
+        tree = process_tree(proc.pid)
+        start = time.perf_counter()
+        proc.send_signal(signal.SIGTERM)
+        try:
+            await asyncio.to_thread(proc.wait, args.shutdown_timeout)
+            shutdown_secs = time.perf_counter() - start
+        except subprocess.TimeoutExpired:
+            shutdown_secs = None
+        leftover = [pid for pid in tree if os.path.exists(f"/proc/{pid}")]
+        test.report(shutdown_secs, len(leftover))
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        for pid in process_tree(proc.pid):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test of the bot server")
+    subparsers = parser.add_subparsers(dest="command")
+    serve_parser = subparsers.add_parser("serve", help="Run the server with fake Daily and bots (used by the driver)")
+    serve_parser.add_argument("--port", type=int, required=True)
+
+    parser.add_argument("--rate", type=float, default=1.0, help="New sessions per second (Poisson arrivals)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of load")
+    parser.add_argument("--root-share", type=float, default=0.1, help="Share of sessions opened on / instead of /connect")
+    parser.add_argument("--status-polls", type=int, default=2, help="/status/{pid} requests per sample interval")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Seconds between process tree samples")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds the pools get to fill before the load starts")
+    parser.add_argument("--startup-secs", type=float, default=2.0, help="Fake bot start-up time")
+    parser.add_argument("--session-secs", type=float, default=30.0, help="Fake call duration")
+    parser.add_argument("--bot-memory-mb", type=float, default=0.0, help="Memory held by each fake bot")
+    parser.add_argument("--daily-latency-secs", type=float, default=0.15, help="Fake Daily REST round-trip")
+    parser.add_argument("--pool-size", type=int, default=2, help="BOT_POOL_SIZE of the server")
+    parser.add_argument("--room-pool-size", type=int, default=2, help="ROOM_POOL_SIZE of the server")
+    parser.add_argument("--max-bots", type=int, default=50, help="MAX_BOTS of the server")
+    parser.add_argument("--max-load-per-cpu", type=float, default=100.0, help="MAX_LOAD_PER_CPU of the server")
+    parser.add_argument("--shutdown-timeout", type=float, default=60.0, help="Seconds the server has to exit")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.port)
+    else:
+        asyncio.run(drive(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Latency histograms for the bot pipeline, exported in Prometheus text format.
+
+Each bot process records into the process-wide ``metrics`` registry and
+periodically writes a JSON snapshot to ``METRICS_DIR``. The server merges the
+snapshots of every bot process with its own and serves the result on
+``/metrics``.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from loguru import logger
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HISTOGRAMS = {
+    "bot_vad_to_llm_first_token_seconds": "Time from end of user speech (VAD) to the first LLM token.",
+    "bot_llm_first_token_to_tts_first_audio_seconds": "Time from the first LLM token to the first TTS audio.",
+    "bot_vad_to_tts_first_audio_seconds": "Voice-to-voice latency, from end of user speech to the first TTS audio.",
+    "bot_tool_call_seconds": "Duration of LLM tool calls.",
+    "bot_mongo_query_seconds": "Duration of MongoDB queries issued by DataEnricher.",
+    "bot_call_duration_seconds": "Duration of whole calls.",
+    "bot_context_tokens": "Estimated tokens of the LLM context sent per turn, after pruning.",
+    "bot_context_pruned_tokens": "Estimated tokens pruned from the LLM context per turn.",
+}
+
+# Buckets of the histograms that do not measure seconds
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 3000, 4000, 6000, 8000, 16000, 32000)
+HISTOGRAM_BUCKETS = {
+    "bot_context_tokens": TOKEN_BUCKETS,
+    "bot_context_pruned_tokens": TOKEN_BUCKETS,
+}
+
+
+def metrics_dir() -> str:
+    return os.getenv("METRICS_DIR") or os.path.join(tempfile.gettempdir(), "medassist-metrics")
+
+
+class MetricsRegistry:
+    """Fixed-bucket histograms keyed by name and label set."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # name -> label key -> {"counts": [...], "sum": float, "count": int}
+        self._series: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def buckets_for(self, name: str) -> Tuple[float, ...]:
+        return HISTOGRAM_BUCKETS.get(name, self.buckets)
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = json.dumps(sorted(labels.items()))
+        buckets = self.buckets_for(name)
+        series = self._series.setdefault(name, {}).get(key)
+        if series is None:
+            series = {"counts": [0] * (len(buckets) + 1), "sum": 0.0, "count": 0}
+            self._series[name][key] = series
+        series["counts"][bisect_left(buckets, value)] += 1
+        series["sum"] += value
+        series["count"] += 1
+
+    @contextmanager
+    def timer(self, name: str, **labels: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"buckets": list(self.buckets), "series": json.loads(json.dumps(self._series))}
+
+    def merge(self, snapshot: Dict[str, Any]):
+        """Adds the counts of another registry's snapshot into this one."""
+        if tuple(snapshot.get("buckets", ())) != self.buckets:
+            logger.warning("Skipping metrics snapshot with different buckets")
+            return
+        for name, by_labels in snapshot["series"].items():
+            for key, other in by_labels.items():
+                series = self._series.setdefault(name, {}).setdefault(
+                    key, {"counts": [0] * len(other["counts"]), "sum": 0.0, "count": 0}
+                )
+                series["counts"] = [a + b for a, b in zip(series["counts"], other["counts"])]
+                series["sum"] += other["sum"]
+                series["count"] += other["count"]
+
+    def render(self) -> str:
+        """Renders every histogram in the Prometheus text exposition format."""
+        lines = []
+        for name in sorted(self._series):
+            lines.append(f"# HELP {name} {HISTOGRAMS.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, series in sorted(self._series[name].items()):
+                labels = [f'{k}="{v}"' for k, v in json.loads(key)]
+                cumulative = 0
+                for bound, count in zip((*self.buckets_for(name), "+Inf"), series["counts"]):
+                    cumulative += count
+                    bucket_labels = ",".join([*labels, f'le="{bound}"'])
+                    lines.append(f"{name}_bucket{{{bucket_labels}}} {cumulative}")
+                suffix = f"{{{','.join(labels)}}}" if labels else ""
+                lines.append(f"{name}_sum{suffix} {series['sum']}")
+                lines.append(f"{name}_count{suffix} {series['count']}")
+        return "\n".join(lines) + "\n"
+
+
+# Registry of the current process
+metrics = MetricsRegistry()
+
+
+def write_snapshot(directory: Optional[str] = None):
+    """Writes this process's snapshot to ``<directory>/bot-<pid>.json`` atomically."""
+    directory = directory or metrics_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"bot-{os.getpid()}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(metrics.snapshot(), f)
+    os.replace(tmp_path, path)
+
+
+async def export_snapshots(interval: float = 5.0):
+    """Writes a snapshot every ``interval`` seconds, and a last one when cancelled."""
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(write_snapshot)
+    finally:
+        write_snapshot()
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SnapshotCollector:
+    """Merges the snapshots written by bot processes.
+
+    Snapshots of exited bots are folded into a running total and deleted, so the
+    directory only holds files for live processes.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or metrics_dir()
+        self._retired = MetricsRegistry()
+
+    def _snapshot_files(self) -> Iterable[Tuple[int, str]]:
+        if not os.path.isdir(self.directory):
+            return []
+        files = []
+        for filename in os.listdir(self.directory):
+            if filename.startswith("bot-") and filename.endswith(".json"):
+                try:
+                    files.append((int(filename[4:-5]), os.path.join(self.directory, filename)))
+                except ValueError:
+                    continue
+        return files
+
+    def collect(self, local: Optional[MetricsRegistry] = None) -> MetricsRegistry:
+        merged = MetricsRegistry()
+        merged.merge(self._retired.snapshot())
+        if local is not None:
+            merged.merge(local.snapshot())
+        for pid, path in self._snapshot_files():
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable metrics snapshot {path}: {e}")
+                continue
+            merged.merge(snapshot)
+            if not _process_alive(pid):
+                self._retired.merge(snapshot)
+                os.remove(path)
+        return merged
@@ -1,13 +1,68 @@
-import re
-from datetime import datetime, timedelta
+import asyncio
+import time
+from datetime import date, datetime, timedelta
 from typing import Any, Dict, Optional
 from pipecat.frames.frames import Frame
 from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
 from bson import ObjectId
 from loguru import logger
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
 from dotenv import load_dotenv
 import os
+from availability import ACTIVE_STATUSES, DAYS, AvailabilityIndex
+from metrics import metrics
+from mongo_pool import get_database
+from normalization import parse_booking_time
+
+# Availability index shared by every DataEnricher in the process
+_availability_index: Optional[AvailabilityIndex] = None
+_availability_lock = asyncio.Lock()
+
+# At most one active booking per department and time. Keyed on the slot only
+# and restricted to active bookings, so cancelled ones do not hold it. Active
+# bookings carry ``active: True``, kept in step with ``status``: an equality
+# partial filter works on every MongoDB version, ``$in`` needs 6.0.
+BOOKING_SLOT_INDEX = IndexModel(
+    [("department_id", ASCENDING), ("booking_time", ASCENDING)],
+    name="department_booking_time_active_flag_unique",
+    unique=True,
+    partialFilterExpression={"active": True},
+)
+
+BOOKING_INDEXES = [
+    BOOKING_SLOT_INDEX,
+    # Active bookings within a date window, across departments
+    IndexModel([("status", ASCENDING), ("booking_time", ASCENDING)], name="status_booking_time"),
+]
+
+DEPARTMENT_INDEXES = [
+    IndexModel([("name", ASCENDING)], name="name"),
+]
+
+_indexes_ensured = False
+
+
+def with_active_flag(booking: Dict[str, Any]) -> Dict[str, Any]:
+    """Sets the ``active`` flag of a booking from its status, for the slot index."""
+    booking["active"] = booking.get("status") in ACTIVE_STATUSES
+    return booking
+
+
+async def backfill_active_flags(database) -> int:
+    """Sets ``active`` on bookings whose flag does not match their status.
+
+    Covers bookings written before the flag existed or by tools that only
+    change ``status``. Returns the number of bookings updated.
+    """
+    bookings = database["bookings"]
+    updated = 0
+    for active, statuses in ((True, {"$in": list(ACTIVE_STATUSES)}), (False, {"$nin": list(ACTIVE_STATUSES)})):
+        result = await bookings.update_many(
+            {"status": statuses, "active": {"$ne": active}}, {"$set": {"active": active}}
+        )
+        updated += result.modified_count
+    return updated
 
 class DataEnricher(FrameProcessor):
     """Handles the appointment booking logic with database integration."""
@@ -24,24 +79,45 @@ class DataEnricher(FrameProcessor):
         self.available_departments = []
         self.appointment_details = {}
         self.open_schedule = None
+        self._open_schedule_version = None
         self.get_booked_slots_sched = None
         self.days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+        self.availability_horizon_days = int(os.environ.get("AVAILABILITY_HORIZON_DAYS", "28"))
+        self.slot_minutes = int(os.environ.get("AVAILABILITY_SLOT_MINUTES", "30"))
+        self.booked_slots_window_days = int(os.environ.get("BOOKED_SLOTS_WINDOW_DAYS", "7"))
+        self.booked_slots_limit = int(os.environ.get("BOOKED_SLOTS_LIMIT", "50"))
 
     async def connect_to_db(self):
         try:
-            client = AsyncIOMotorClient(self.db_config["MONGO_URI"],
-                                        tls=True,
-                                        tlsAllowInvalidCertificates=False)
-            self.connection = client[self.db_config["MONGO_DB"]]
-            await self.connection.command("ping")
-            logger.info("Successfully connected to MongoDB.")
+            self.connection = await get_database(self.db_config["MONGO_URI"], self.db_config["MONGO_DB"])
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise
 
     async def close_connection(self):
+        # The client is shared by the whole process and closed by close_clients()
         self.connection = None
 
+    async def ensure_indexes(self):
+        """Creates the indexes the booking and availability queries rely on, once per process."""
+        global _indexes_ensured
+        if self.connection is None:
+            raise ValueError("Database connection is not established.")
+        if _indexes_ensured:
+            return
+        try:
+            flagged = await backfill_active_flags(self.connection)
+            if flagged:
+                logger.info(f"Set the active flag of {flagged} bookings.")
+            await self.connection["bookings"].create_indexes(BOOKING_INDEXES)
+            await self.connection["departments"].create_indexes(DEPARTMENT_INDEXES)
+            _indexes_ensured = True
+            logger.info("MongoDB indexes are in place.")
+        except Exception as e:
+            # Existing duplicate active bookings prevent the unique index from
+            # being built; bookings still work, but without the race guarantee.
+            logger.error(f"Failed to ensure MongoDB indexes: {e}")
+
     async def get_available_days(self):
         if self.connection is None:
             raise ValueError("Database connection is not established.")
@@ -49,9 +125,10 @@ class DataEnricher(FrameProcessor):
             departments = self.connection["departments"]
             cursor = departments.find({"operating_hours": {"$exists": True, "$ne": []}}, {"operating_hours.day_of_week": 1})
             day_set = set()
-            async for doc in cursor:
-                for oh in doc.get("operating_hours", []):
-                    day_set.add(oh["day_of_week"])
+            with metrics.timer("bot_mongo_query_seconds", operation="available_days"):
+                async for doc in cursor:
+                    for oh in doc.get("operating_hours", []):
+                        day_set.add(oh["day_of_week"])
             ordered_days = sorted(list(day_set), key=self.days.index)
             self.available_days = ordered_days
             logger.info(f"Retrieved available days: {ordered_days}")
@@ -70,8 +147,9 @@ class DataEnricher(FrameProcessor):
                 {"operating_hours": {"$exists": True, "$ne": []}},
                 {"name": 1}
             )
-            async for doc in cursor:
-                departments.append(doc["name"])
+            with metrics.timer("bot_mongo_query_seconds", operation="available_departments"):
+                async for doc in cursor:
+                    departments.append(doc["name"])
             self.available_departments = departments
             logger.info(f"Available departments: {departments}")
             return departments
@@ -79,53 +157,83 @@ class DataEnricher(FrameProcessor):
             logger.error(f"Failed to retrieve available departments: {e}")
             raise
 
+    async def get_availability_index(self, refresh: bool = False) -> AvailabilityIndex:
+        """Returns the process-wide availability index, building it on first use.
+
+        The index is rebuilt with two queries (departments, then active bookings
+        within the horizon) when ``refresh`` is set or when the day has rolled over.
+        """
+        global _availability_index
+        if self.connection is None:
+            raise ValueError("Database connection is not established.")
+        today = date.today()
+        index = _availability_index
+        if index is not None and index.start_date == today and not refresh:
+            return index
+        async with _availability_lock:
+            index = _availability_index
+            if index is not None and index.start_date == today and not refresh:
+                return index
+            try:
+                # Read before the data, so changes made during the build are replayed
+                operation_time = await self._operation_time()
+                with metrics.timer("bot_mongo_query_seconds", operation="availability_departments"):
+                    departments = await self.connection["departments"].find(
+                        {}, {"name": 1, "operating_hours": 1}
+                    ).to_list(None)
+                index = AvailabilityIndex(today, self.availability_horizon_days, self.slot_minutes)
+                index.operation_time = operation_time
+                for department in departments:
+                    index.upsert_department(department)
+                cursor = self.connection["bookings"].find(
+                    {
+                        "status": {"$in": list(ACTIVE_STATUSES)},
+                        "booking_time": {
+                            "$gte": datetime.combine(index.start_date, datetime.min.time()),
+                            "$lt": datetime.combine(index.end_date, datetime.min.time()),
+                        },
+                    },
+                    {"department_id": 1, "booking_time": 1, "status": 1},
+                )
+                with metrics.timer("bot_mongo_query_seconds", operation="availability_bookings"):
+                    async for booking in cursor:
+                        index.add_booking(booking)
+                _availability_index = index
+                logger.info(
+                    f"Built availability index for {len(departments)} departments "
+                    f"from {index.start_date} to {index.end_date}."
+                )
+                return index
+            except Exception as e:
+                logger.error(f"Failed to build availability index: {e}")
+                raise
+
+    async def _operation_time(self):
+        """Current cluster time, or ``None`` where there is none (standalone mongod, in-process stand-in)."""
+        try:
+            reply = await self.connection.command("ping")
+        except Exception as e:
+            logger.debug(f"No cluster time available: {e}")
+            return None
+        return reply.get("operationTime")
+
     async def get_open_schedule(self):
         if self.connection is None:
             raise ValueError("Database connection is not established.")
         try:
-            departments_collection = self.connection["departments"]
-            bookings_collection = self.connection["bookings"]
-            cursor = departments_collection.find({"operating_hours": {"$exists": True}})
-            schedule = {}
-            async for department in cursor:
-                name = department["name"]
-                operating_hours = department.get("operating_hours", [])
-                schedule[name] = {}
-                for oh in operating_hours:
-                    day = oh["day_of_week"]
-                    start_time = datetime.strptime(oh["start_time"], "%H:%M").time()
-                    end_time = datetime.strptime(oh["end_time"], "%H:%M").time()
-                    today = datetime.today()
-                    day_index = self.days.index(day)
-                    today_index = today.weekday()
-                    days_ahead = (day_index - today_index + 7) % 7
-                    next_day = today + timedelta(days=days_ahead)
-                    booked_cursor = bookings_collection.find({
-                        "department_id": department["_id"],
-                        "status": "booked",
-                        "booking_time": {
-                            "$gte": datetime.combine(next_day.date(), start_time),
-                            "$lt": datetime.combine(next_day.date(), end_time)
-                        }
-                    })
-                    booked_times_set = set()
-                    async for booking in booked_cursor:
-                        booked_times_set.add(booking["booking_time"].time())
-                    current_time = start_time
-                    slots = []
-                    while current_time < end_time:
-                        if current_time not in booked_times_set:
-                            slots.append(current_time.strftime("%H:%M"))
-                        current_time = (datetime.combine(today, current_time) + timedelta(minutes=30)).time()
-                    schedule[name][day] = slots
+            index = await self.get_availability_index()
+            if self.open_schedule is not None and self._open_schedule_version == (id(index), index.version):
+                return self.open_schedule
             schedule_str = "Here are the available appointment slots: "
-            for dept, day_slots in schedule.items():
-                schedule_str += f"{dept}: "
-                for day, slots in day_slots.items():
+            for department_id in index.department_ids():
+                schedule_str += f"{index.department_name(department_id)}: "
+                for day in index.department_days(department_id):
+                    slots = index.free_slots(department_id, index.next_date(day))
                     if slots:
                         schedule_str += f"{day} ({', '.join(slots)}), "
                 schedule_str = schedule_str.rstrip(", ") + ". "
             self.open_schedule = schedule_str.rstrip()
+            self._open_schedule_version = (id(index), index.version)
             logger.info("Retrieved and formatted open schedule.")
             return self.open_schedule
         except Exception as e:
@@ -136,85 +244,96 @@ class DataEnricher(FrameProcessor):
         if self.connection is None:
             raise ValueError("Database connection is not established.")
         try:
-            departments_collection = self.connection["departments"]
-            bookings_collection = self.connection["bookings"]
-            department = await departments_collection.find_one({"_id": department_id})
-            if not department:
+            index = await self.get_availability_index()
+            if index.department_name(department_id) is None:
                 logger.info(f"No department found with ID: {department_id}")
                 return []
-            matching_hours = [
-                oh for oh in department.get("operating_hours", [])
-                if oh["day_of_week"].lower() == day.lower()
-            ]
-            if not matching_hours:
+            target_date = index.next_date(day)
+            if DAYS[target_date.weekday()] not in index.department_days(department_id):
                 logger.info(f"No operating hours found for {day} and department ID {department_id}")
                 return []
-            available_times = []
-            today = datetime.today()
-            day_index = self.days.index(day)
-            today_index = today.weekday()
-            days_ahead = (day_index - today_index + 7) % 7
-            target_date = today + timedelta(days=days_ahead)
-            target_date_only = target_date.date()
-            for hours in matching_hours:
-                start = datetime.strptime(hours["start_time"], "%H:%M").time()
-                end = datetime.strptime(hours["end_time"], "%H:%M").time()
-                booked_cursor = bookings_collection.find({
-                    "department_id": department_id,
-                    "status": "confirmed",
-                    "booking_time": {
-                        "$gte": datetime.combine(target_date_only, start),
-                        "$lt": datetime.combine(target_date_only, end)
-                    }
-                })
-                booked_times_set = set()
-                async for booking in booked_cursor:
-                    booked_times_set.add(booking["booking_time"].time())
-                current_time = start
-                while current_time < end:
-                    if current_time not in booked_times_set:
-                        available_times.append(current_time.strftime("%H:%M"))
-                    current_time = (datetime.combine(today, current_time) + timedelta(minutes=30)).time()
+            if target_date < index.start_date:
+                logger.info(f"{target_date} is in the past, no available times for department ID {department_id}")
+                return []
+            if not index.covers(target_date):
+                # Bookings beyond the horizon are not in the index
+                index = await self._day_index(department_id, target_date)
+            available_times = index.free_slots(department_id, target_date)
             logger.info(f"Available times for {day} and department ID {department_id}: {available_times}")
             return available_times
         except Exception as e:
             logger.error(f"Failed to retrieve available times for {day} and department ID {department_id}: {e}")
             raise
 
+    async def _day_index(self, department_id, day: date) -> AvailabilityIndex:
+        """Availability of one department on one day, read from MongoDB."""
+        start = datetime.combine(day, datetime.min.time())
+        with metrics.timer("bot_mongo_query_seconds", operation="day_availability"):
+            department = await self.connection["departments"].find_one(
+                {"_id": department_id}, {"name": 1, "operating_hours": 1}
+            )
+            bookings = await self.connection["bookings"].find(
+                {
+                    "department_id": department_id,
+                    "status": {"$in": list(ACTIVE_STATUSES)},
+                    "booking_time": {"$gte": start, "$lt": start + timedelta(days=1)},
+                },
+                {"department_id": 1, "booking_time": 1, "status": 1},
+            ).to_list(None)
+        return AvailabilityIndex.build([department] if department else [], bookings, day, 1, self.slot_minutes)
+
     async def get_department_id(self, department_name):
         if self.connection is None:
             raise ValueError("Database connection is not established.")
         try:
-            doc = await self.connection["departments"].find_one({"name": department_name})
+            with metrics.timer("bot_mongo_query_seconds", operation="department_id"):
+                doc = await self.connection["departments"].find_one({"name": department_name})
             return doc["_id"] if doc else None
         except Exception as e:
             logger.error(f"Failed to retrieve department ID for {department_name}: {e}")
             raise
 
-    async def get_booked_slots_per_department(self):
+    async def iter_booked_slots_per_department(self, window_days: Optional[int] = None, limit: Optional[int] = None):
+        """Streams ``(department name, booked slots)`` pairs from one server-side aggregation.
+
+        Only active bookings from today up to ``window_days`` ahead are read, and
+        each department contributes at most ``limit`` slots, earliest first.
+        """
         if self.connection is None:
             raise ValueError("Database connection is not established.")
+        window_days = window_days or self.booked_slots_window_days
+        limit = limit or self.booked_slots_limit
+        start = datetime.combine(date.today(), datetime.min.time())
+        pipeline = [
+            {"$match": {
+                "status": {"$in": list(ACTIVE_STATUSES)},
+                "booking_time": {"$gte": start, "$lt": start + timedelta(days=window_days)},
+            }},
+            {"$sort": {"booking_time": 1}},
+            {"$group": {
+                "_id": "$department_id",
+                "slots": {"$push": {"$dateToString": {"format": "%Y-%m-%d %H:%M:%S", "date": "$booking_time"}}},
+            }},
+            {"$project": {"slots": {"$slice": ["$slots", limit]}}},
+            {"$lookup": {"from": "departments", "localField": "_id", "foreignField": "_id", "as": "department"}},
+            {"$project": {"_id": 0, "name": {"$arrayElemAt": ["$department.name", 0]}, "slots": 1}},
+        ]
+        start_time = time.perf_counter()
         try:
-            departments_collection = self.connection["departments"]
-            bookings_collection = self.connection["bookings"]
+            async for doc in self.connection["bookings"].aggregate(pipeline):
+                if doc.get("name"):
+                    yield doc["name"], doc["slots"]
+        finally:
+            metrics.observe(
+                "bot_mongo_query_seconds", time.perf_counter() - start_time, operation="booked_slots"
+            )
 
+    async def get_booked_slots_per_department(self):
+        if self.connection is None:
+            raise ValueError("Database connection is not established.")
+        try:
             booked_slots = {}
-
-            async for dept in departments_collection.find():
-                department_id = dept["_id"]
-                department_name = dept["name"]
-
-                bookings_cursor = bookings_collection.find({
-                    "department_id": department_id,
-                    "status": {"$in": ["booked", "confirmed"]}
-                })
-
-                slots = []
-                async for booking in bookings_cursor:
-                    time = booking.get("booking_time")
-                    if isinstance(time, datetime):
-                        slots.append(time.strftime("%Y-%m-%d %H:%M:%S"))
-
+            async for department_name, slots in self.iter_booked_slots_per_department():
                 booked_slots[department_name] = slots
 
             logger.info("Booked slots retrieved per department.")
@@ -230,103 +349,105 @@ class DataEnricher(FrameProcessor):
         try:
             if isinstance(booking_time, str):
                 booking_time = datetime.strptime(booking_time, "%Y-%m-%d %H:%M:%S")
+            index = await self.get_availability_index()
+            if index.covers(booking_time.date()):
+                return index.is_free(department_id, booking_time)
             collection = self.connection["bookings"]
-            count = await collection.count_documents({
-                "department_id": department_id,
-                "booking_time": booking_time,
-                "status": "booked"
-            })
+            with metrics.timer("bot_mongo_query_seconds", operation="check_availability"):
+                count = await collection.count_documents({
+                    "department_id": department_id,
+                    "booking_time": booking_time,
+                    "status": {"$in": list(ACTIVE_STATUSES)}
+                })
             return count == 0
         except Exception as e:
             logger.error(f"Failed to check availability: {e}")
             raise
 
+    async def claim_slot(self, department_id, booking_time: datetime, user_id=None) -> Optional[str]:
+        """Books a slot with a single atomic write.
+
+        Returns:
+            The new booking ID, or ``None`` when the slot already holds an active booking.
+        """
+        if self.connection is None:
+            raise ValueError("Database connection is not established.")
+        booking = {
+            "department_id": department_id,
+            "booking_time": booking_time,
+            "status": "booked",
+            "active": True,
+            "created_at": datetime.utcnow(),
+        }
+        if user_id is not None:
+            booking["user_id"] = user_id
+        try:
+            with metrics.timer("bot_mongo_query_seconds", operation="claim_slot"):
+                result = await self.connection["bookings"].update_one(
+                    {
+                        "department_id": department_id,
+                        "booking_time": booking_time,
+                        "active": True,
+                    },
+                    {"$setOnInsert": {k: v for k, v in booking.items() if k not in ("department_id", "booking_time")}},
+                    upsert=True,
+                )
+        except DuplicateKeyError:
+            # Another caller claimed the slot between our match and insert
+            return None
+        except Exception as e:
+            logger.error(f"Failed to claim slot: {e}")
+            raise
+        if result.upserted_id is None:
+            return None
+        booking["_id"] = result.upserted_id
+        if _availability_index is not None:
+            _availability_index.add_booking(booking)
+        return str(result.upserted_id)
+
     async def book_appointment(self, department_id, user_id, booking_time):
         if not self.connection:
             raise ValueError("Database connection is not established.")
         try:
             if isinstance(booking_time, str):
                 booking_time = datetime.strptime(booking_time, "%Y-%m-%d %H:%M:%S")
-            collection = self.connection["bookings"]
-            result = await collection.insert_one({
-                "department_id": department_id,
-                "user_id": user_id,
-                "booking_time": booking_time,
-                "status": "booked"
-            })
-            logger.info(f"Appointment booked successfully. Appointment ID: {result.inserted_id}")
-            return str(result.inserted_id)
+            appointment_id = await self.claim_slot(department_id, booking_time, user_id)
+            if appointment_id is None:
+                logger.warning(f"Time slot not available: {booking_time}")
+            else:
+                logger.info(f"Appointment booked successfully. Appointment ID: {appointment_id}")
+            return appointment_id
         except Exception as e:
             logger.error(f"Failed to book appointment: {e}")
             raise
 
-    def _extract_appointment_info(self, text: str) -> Optional[Dict[str, Any]]:
-        pattern = r"Appointment for (?P<department>.+) on (?P<day>.+) at (?P<time>.+)"
-        match = re.match(pattern, text)
-        if match:
-            return match.groupdict()
-        return None
-    
     async def register_booking(self, department_name: str, date_str: str, time_str: str):
         if self.connection is None:
             raise ValueError("Database connection is not established.")
         try:
             departments_collection = self.connection["departments"]
-            bookings_collection = self.connection["bookings"]
 
-            department = await departments_collection.find_one({"name": department_name})
+            with metrics.timer("bot_mongo_query_seconds", operation="department_by_name"):
+                department = await departments_collection.find_one({"name": department_name})
             if not department:
                 raise ValueError(f"Department '{department_name}' not found.")
 
-            booking_time = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+            booking_time = parse_booking_time(date_str, time_str)
 
-            booking = {
-                "department_id": department["_id"],
-                "booking_time": booking_time,
-                "status": "booked",
-                "created_at": datetime.utcnow()
-            }
-
-            result = await bookings_collection.insert_one(booking)
-            logger.info(f"Booking registered with ID {result.inserted_id}")
-            return str(result.inserted_id)
+            booking_id = await self.claim_slot(department["_id"], booking_time)
+            if booking_id is None:
+                logger.info(f"Slot already taken for {department_name} at {booking_time}")
+            else:
+                logger.info(f"Booking registered with ID {booking_id}")
+            return booking_id
 
         except Exception as e:
             logger.error(f"Failed to register booking: {e}")
             raise
 
-    async def _handle_appointment(self, appointment_info: Dict[str, Any]):
-        department = appointment_info.get("department")
-        day = appointment_info.get("day")
-        time = appointment_info.get("time")
-        if not department or not day or not time:
-            logger.error("Incomplete appointment information.")
-            return
-        try:
-            department_id = await self.get_department_id(department)
-            if not department_id:
-                logger.error(f"Department not found: {department}")
-                return
-            booking_time = datetime.strptime(f"{day} {time}", "%Y-%m-%d %H:%M:%S")
-            is_available = await self.check_availability(department_id, booking_time)
-            if not is_available:
-                logger.warning(f"Time slot not available: {booking_time}")
-                return
-            user_id = 1
-            appointment_id = await self.book_appointment(department_id, user_id, booking_time)
-            logger.info(f"Appointment booked successfully. ID: {appointment_id}")
-        except Exception as e:
-            logger.error(f"Failed to handle appointment: {e}")
-
     async def process_frame(self, frame: Frame, direction: FrameDirection):
-        try:
-            await super().process_frame(frame, direction)
-            if direction == FrameDirection.OUTBOUND:
-                if hasattr(frame, 'text') and frame.text:
-                    appointment_info = self._extract_appointment_info(frame.text)
-                    if appointment_info:
-                        logger.info(f"Appointment detected: {appointment_info}")
-                        await self._handle_appointment(appointment_info)
-        except Exception as e:
-            logger.error(f"Error during frame processing: {e}")
+        # Appointments are booked by the confirm_appointment tool (confirm_logic),
+        # which needs the outcome before the bot answers, so nothing is detected
+        # in the frames any more; the enricher only passes them on.
+        await super().process_frame(frame, direction)
         await self.push_frame(frame, direction)
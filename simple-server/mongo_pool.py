@@ -0,0 +1,63 @@
+"""Process-wide MongoDB client.
+
+Every ``DataEnricher`` in a bot process, including the one used by the
+``confirm_appointment`` tool, shares a single ``AsyncIOMotorClient`` per URI.
+The TLS handshake and ``ping`` round-trip happen once per process instead of
+once per tool call, and the driver's connection pool is sized and reaped
+according to the environment:
+
+- ``MONGO_MAX_POOL_SIZE``: maximum connections per server (default 10)
+- ``MONGO_MIN_POOL_SIZE``: connections kept open when idle (default 0)
+- ``MONGO_MAX_IDLE_TIME_MS``: idle time before a pooled connection is closed (default 60000)
+"""
+
+import asyncio
+import os
+from typing import Dict
+
+from loguru import logger
+from motor.motor_asyncio import AsyncIOMotorClient
+
+_clients: Dict[str, AsyncIOMotorClient] = {}
+_lock = asyncio.Lock()
+
+
+def client_options() -> Dict[str, int]:
+    return {
+        "maxPoolSize": int(os.environ.get("MONGO_MAX_POOL_SIZE", "10")),
+        "minPoolSize": int(os.environ.get("MONGO_MIN_POOL_SIZE", "0")),
+        "maxIdleTimeMS": int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", "60000")),
+    }
+
+
+async def get_client(uri: str) -> AsyncIOMotorClient:
+    """Returns the shared client for ``uri``, connecting and pinging it on first use."""
+    client = _clients.get(uri)
+    if client is not None:
+        return client
+    async with _lock:
+        client = _clients.get(uri)
+        if client is not None:
+            return client
+        client = AsyncIOMotorClient(uri, tls=True, tlsAllowInvalidCertificates=False, **client_options())
+        try:
+            await client.admin.command("ping")
+        except Exception:
+            client.close()
+            raise
+        _clients[uri] = client
+        logger.info("Successfully connected to MongoDB.")
+        return client
+
+
+async def get_database(uri: str, name: str):
+    client = await get_client(uri)
+    return client[name]
+
+
+async def close_clients():
+    """Closes every shared client. Called once when the bot process shuts down."""
+    async with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
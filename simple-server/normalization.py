@@ -0,0 +1,267 @@
+"""Turns the days and times of a conversation into dates and minutes.
+
+The bot speaks French and the model is told to pass English weekdays and ISO
+dates, but callers say "lundi prochain" or "quatorze heures trente" and the
+model often passes them on as is. Every booking and availability path goes
+through this module so they all understand the same phrases:
+
+- days: French and English weekdays in any case, with or without accents,
+  ``prochain``/``next`` and ``semaine prochaine``/``next week``; relative days
+  (``aujourd'hui``, ``demain``, ``après-demain``, ``dans 3 jours``); dates as
+  ``2025-07-07``, ``07/07``, ``7 juillet`` or ``July 7``;
+- times: ``14:30``, ``14h30``, ``14 h 30``, ``2:30 pm``, ``midi``, and times
+  in words such as ``quatorze heures trente``, ``neuf heures et demie`` or
+  ``quinze heures moins le quart``.
+
+The tables and patterns are built once at import, so a lookup is a couple of
+regex scans of a short string.
+"""
+
+import re
+import unicodedata
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from availability import DAYS
+
+FRENCH_DAYS = ["lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche"]
+FRENCH_MONTHS = [
+    "janvier", "février", "mars", "avril", "mai", "juin",
+    "juillet", "août", "septembre", "octobre", "novembre", "décembre",
+]
+ENGLISH_MONTHS = [
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december",
+]
+
+
+def fold(text: str) -> str:
+    """Casefolds ``text`` and strips accents, for matching spoken French."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _number_words() -> Dict[str, int]:
+    """Folded French and English number words from 0 to 59, hyphens as spaces."""
+    french = [
+        "zero", "un", "deux", "trois", "quatre", "cinq", "six", "sept", "huit", "neuf", "dix",
+        "onze", "douze", "treize", "quatorze", "quinze", "seize", "dix sept", "dix huit", "dix neuf",
+    ]
+    english = [
+        "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+        "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen",
+    ]
+    words = {word: n for n, word in enumerate(english)}
+    words.update({word: n for n, word in enumerate(french)})
+    words["une"] = 1
+    for tens, french_tens, english_tens in ((20, "vingt", "twenty"), (30, "trente", "thirty"),
+                                            (40, "quarante", "forty"), (50, "cinquante", "fifty")):
+        words[french_tens] = words[english_tens] = tens
+        for unit in range(1, 10):
+            if unit == 1:
+                words[f"{french_tens} et un"] = words[f"{french_tens} et une"] = tens + 1
+            else:
+                words[f"{french_tens} {french[unit]}"] = tens + unit
+            words[f"{english_tens} {english[unit]}"] = tens + unit
+    return words
+
+
+NUMBER_WORDS = _number_words()
+WEEKDAY_WORDS: Dict[str, int] = {
+    **{fold(name): i for i, name in enumerate(FRENCH_DAYS)},
+    **{name.lower(): i for i, name in enumerate(DAYS)},
+}
+MONTH_WORDS: Dict[str, int] = {
+    **{fold(name): i + 1 for i, name in enumerate(FRENCH_MONTHS)},
+    **{name: i + 1 for i, name in enumerate(ENGLISH_MONTHS)},
+}
+RELATIVE_DAYS = {
+    "aujourd'hui": 0, "aujourd hui": 0, "today": 0,
+    "demain": 1, "tomorrow": 1,
+    "apres demain": 2, "day after tomorrow": 2,
+}
+# Phrases replaced before numbers are read; the afternoon ones before ``midi``
+_TIME_WORDS = {
+    "de l'apres midi": "pm", "l'apres midi": "pm", "apres midi": "pm", "in the afternoon": "pm",
+    "du soir": "pm", "in the evening": "pm", "du matin": "am", "in the morning": "am",
+    "midi": "12 h", "noon": "12 h", "minuit": "0 h", "midnight": "0 h",
+}
+
+
+def _alternation(words) -> str:
+    return "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+_WORD_HYPHEN = re.compile(r"(?<=[a-z])-(?=[a-z])")
+_NUMBER_PATTERN = re.compile(rf"\b(?:{_alternation(NUMBER_WORDS)})\b")
+_TIME_WORDS_PATTERN = re.compile(rf"\b(?:{_alternation(_TIME_WORDS)})\b")
+
+# A weekday before a date is part of it; the date wins if they disagree
+_WEEKDAY_BEFORE_DATE = rf"(?:(?:{_alternation(WEEKDAY_WORDS)}),?\s+)?(?:(?:le|the)\s+)?"
+
+_DAY_PATTERN = re.compile(
+    rf"""
+    \b{_WEEKDAY_BEFORE_DATE}(?P<iso>(?P<iso_year>\d{{4}})-(?P<iso_month>\d{{2}})-(?P<iso_day>\d{{2}}))\b
+    | \b{_WEEKDAY_BEFORE_DATE}(?P<numeric>(?P<num_day>\d{{1,2}})/(?P<num_month>\d{{1,2}})(?:/(?P<num_year>\d{{4}}|\d{{2}}))?)\b
+    | \b{_WEEKDAY_BEFORE_DATE}(?P<fr_day>\d{{1,2}})(?:er)?\s+
+        (?P<fr_month>{_alternation(MONTH_WORDS)})(?:\s+(?P<fr_year>\d{{4}}))?\b
+    | \b{_WEEKDAY_BEFORE_DATE}(?P<en_month>{_alternation(ENGLISH_MONTHS)})\s+(?P<en_day>\d{{1,2}})(?:st|nd|rd|th)?
+        (?:,?\s+(?P<en_year>\d{{4}}))?\b
+    | \b(?:dans|in)\s+(?P<in_days>\d{{1,2}})\s+(?:jours?|days?)\b
+    | \b(?P<relative>{_alternation(RELATIVE_DAYS)})\b
+    | \b(?P<next>next\s+)?(?P<weekday>{_alternation(WEEKDAY_WORDS)})
+        (?:\s+(?:(?P<next_week>(?:de\s+)?(?:la\s+)?semaine\s+prochaine|next\s+week)|(?P<coming>prochaine?)))?\b
+    | \b(?P<week>(?:la\s+)?semaine\s+prochaine|next\s+week)\b
+    """,
+    re.VERBOSE,
+)
+
+_TIME_PATTERN = re.compile(
+    r"""
+    \b(?P<hour>\d{1,2})\s*(?:heures?|hours?|h|:)\s*
+    (?:(?P<minute>\d{1,2})\b(?:\s*:\s*\d{2}\b)?
+      | et\s+(?P<half>demie?)\b
+      | et\s+(?P<quarter>quart)\b
+      | moins\s+(?:le\s+)?(?P<less_quarter>quart)\b
+      | moins\s+(?P<less>\d{1,2})\b)?
+    (?:\s*(?P<meridiem>am|pm)\b)?
+    | \b(?P<bare_hour>\d{1,2})\s*(?P<bare_meridiem>am|pm)\b
+    """,
+    re.VERBOSE,
+)
+
+
+def normalize_text(text: str) -> str:
+    """Folds ``text``, turns hyphens between words and curly apostrophes into spaces and ``'``."""
+    folded = _WORD_HYPHEN.sub(" ", fold(text).replace("’", "'"))
+    return " ".join(folded.split())
+
+
+def _spoken_numbers(text: str) -> str:
+    """Replaces time phrases and number words of normalised text by digits."""
+    text = _TIME_WORDS_PATTERN.sub(lambda m: _TIME_WORDS[m.group()], text)
+    return _NUMBER_PATTERN.sub(lambda m: str(NUMBER_WORDS[m.group()]), text)
+
+
+def _date_in_year(day: int, month: int, year: Optional[str], today: date) -> date:
+    """A date from its parts; without a year, the next such date from ``today`` on."""
+    if year:
+        return date(int(year) + (2000 if len(year) == 2 else 0), month, day)
+    candidate = date(today.year, month, day)
+    return candidate if candidate >= today else date(today.year + 1, month, day)
+
+
+def _resolve(match: re.Match, today: date) -> date:
+    if match.group("iso"):
+        return date(int(match.group("iso_year")), int(match.group("iso_month")), int(match.group("iso_day")))
+    if match.group("numeric"):
+        return _date_in_year(int(match.group("num_day")), int(match.group("num_month")), match.group("num_year"), today)
+    if match.group("fr_month"):
+        return _date_in_year(int(match.group("fr_day")), MONTH_WORDS[match.group("fr_month")], match.group("fr_year"), today)
+    if match.group("en_month"):
+        return _date_in_year(int(match.group("en_day")), MONTH_WORDS[match.group("en_month")], match.group("en_year"), today)
+    if match.group("in_days"):
+        return today + timedelta(days=int(match.group("in_days")))
+    if match.group("relative"):
+        return today + timedelta(days=RELATIVE_DAYS[match.group("relative")])
+    next_monday = today + timedelta(days=7 - today.weekday())
+    if match.group("weekday"):
+        weekday = WEEKDAY_WORDS[match.group("weekday")]
+        if match.group("next_week"):
+            return next_monday + timedelta(days=weekday)
+        days_ahead = (weekday - today.weekday() + 7) % 7
+        # "lundi prochain" said on a Monday is a week away; a bare weekday may be today
+        if days_ahead == 0 and (match.group("next") or match.group("coming")):
+            days_ahead = 7
+        return today + timedelta(days=days_ahead)
+    return next_monday
+
+
+def days_in(text: str, today: Optional[date] = None) -> List[date]:
+    """Dates named in ``text``, in the order they are mentioned, without repeats.
+
+    Impossible dates, such as ``31/02``, are left out.
+    """
+    today = today or date.today()
+    found: List[date] = []
+    for match in _DAY_PATTERN.finditer(_spoken_numbers(normalize_text(text))):
+        try:
+            day = _resolve(match, today)
+        except ValueError:
+            continue
+        if day not in found:
+            found.append(day)
+    return found
+
+
+def parse_day(day: str, today: Optional[date] = None) -> date:
+    """Date a weekday, relative day or date refers to, from ``today`` on.
+
+    A bare weekday is its next occurrence, today included. A weekday followed
+    by a date (``lundi 2 novembre``, ``monday 2026-11-02``) is that date.
+
+    Raises:
+        ValueError: When ``day`` names no date.
+    """
+    found = days_in(day, today)
+    if not found:
+        raise ValueError(f"Invalid day: {day}")
+    return found[0]
+
+
+def _minutes(match: re.Match) -> int:
+    if match.group("bare_hour"):
+        hour, minute, meridiem = int(match.group("bare_hour")), 0, match.group("bare_meridiem")
+    else:
+        hour, meridiem = int(match.group("hour")), match.group("meridiem")
+        if match.group("minute"):
+            minute = int(match.group("minute"))
+        elif match.group("half"):
+            minute = 30
+        elif match.group("quarter"):
+            minute = 15
+        elif match.group("less_quarter") or match.group("less"):
+            hour, minute = hour - 1, 60 - (15 if match.group("less_quarter") else int(match.group("less")))
+        else:
+            minute = 0
+    if meridiem == "pm" and hour < 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Invalid time: {hour}:{minute}")
+    return hour * 60 + minute
+
+
+def parse_time(time: str) -> int:
+    """Minutes since midnight of a written or spoken time.
+
+    Raises:
+        ValueError: When ``time`` names no valid time.
+    """
+    text = _spoken_numbers(normalize_text(time))
+    if text.isdigit() and int(text) < 24:
+        # The hour alone, as the model sometimes passes it
+        return int(text) * 60
+    match = _TIME_PATTERN.search(text)
+    if not match:
+        raise ValueError(f"Invalid time: {time}")
+    return _minutes(match)
+
+
+def mentions_time(text: str) -> bool:
+    """Whether ``text`` names a time of day, in digits or in words."""
+    return _TIME_PATTERN.search(_spoken_numbers(normalize_text(text))) is not None
+
+
+def hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def parse_booking_time(day: str, time: str, today: Optional[date] = None) -> datetime:
+    """Start of an appointment from its day and time, in any of the forms above.
+
+    Raises:
+        ValueError: When either names no valid day or time.
+    """
+    return datetime.combine(parse_day(day, today), datetime.min.time()) + timedelta(minutes=parse_time(time))
@@ -0,0 +1,157 @@
+"""Compact, token-budgeted system prompt for the MedAssist bot.
+
+Availability is rendered from the availability index as merged time ranges
+per department and day, e.g. ``Cardiology: Monday 2025-07-07 09:00-10:30,
+11:00-17:00``. Booked slots are already subtracted from those ranges, so they
+are not listed separately. When the prompt exceeds the token budget, the
+latest days are dropped first.
+"""
+
+import os
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from loguru import logger
+
+from availability import DAYS, FREE, AvailabilityIndex
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+INSTRUCTIONS = (
+    "You are a french MedAssist that understand french weekdays, that talks only in french and pronounces the words and the numbers and the hours in french correctly. "
+    "You are MedAssist, a helpful and professional virtual assistant for a medical center. "
+    "Your role is to guide patients in booking medical appointments clearly and efficiently. "
+    "Confirm each step along the way, and always ensure final confirmation before booking. "
+    "Only use the information provided—if something falls outside the scope of available departments or schedules, respond with 'I do not know' and refocus the conversation. "
+    "Gather appointment details incrementally: department name, preferred day, and preferred time. "
+    "Avoid overwhelming the user—keep communication simple, friendly, and conversational. "
+    "Do not read or interpret special characters or symbols. "
+    "Always give the available times to the user using ranges and make it easy for the user to choose, make it as humanly as possible. "
+    "Any time outside the listed ranges is closed or already booked; let the user know if they ask for one. "
+    "Make sure to confirm with the user before going ahead and booking the appointment."
+)
+
+TOOLS_INSTRUCTIONS = (
+    "Use the list_departments, get_available_times, get_available_dates and get_next_free_slot tools to look up open times "
+    "whenever the user asks about availability; never guess a time that a tool did not return."
+)
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Counts tokens with tiktoken when installed, otherwise estimates ~4 characters per token."""
+    if tiktoken is not None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        return len(encoding.encode(text))
+    return -(-len(text) // 4)
+
+
+def free_ranges(
+    index: AvailabilityIndex, department_id, day: date, now: Optional[datetime] = None
+) -> List[Tuple[str, str]]:
+    """Merges consecutive free slots into ``(start, end)`` time ranges.
+
+    With ``now``, slots that start before it are left out, as they can no
+    longer be booked.
+    """
+    states = index.slot_states(department_id, day)
+    first = 0
+    if now is not None and now.date() > day:
+        first = len(states)
+    elif now is not None and now.date() == day:
+        minutes = now.hour * 60 + now.minute + (1 if now.second or now.microsecond else 0)
+        first = -(-minutes // index.slot_minutes)
+    ranges = []
+    start = None
+    for slot in range(len(states) + 1):
+        free = first <= slot < len(states) and states[slot] == FREE
+        if free and start is None:
+            start = slot
+        elif not free and start is not None:
+            end_minutes = slot * index.slot_minutes
+            end = "24:00" if end_minutes == 24 * 60 else index.label(slot)
+            ranges.append((index.label(start), end))
+            start = None
+    return ranges
+
+
+class SystemPromptBuilder:
+    """Builds the system prompt from the availability index within a token budget.
+
+    Args:
+        token_budget: Maximum prompt size in tokens (``PROMPT_TOKEN_BUDGET``, default 1500).
+        schedule_days: Number of days of availability to include (``PROMPT_SCHEDULE_DAYS``, default 7).
+        preload_schedule: Whether to include availability at all (``PROMPT_PRELOAD_SCHEDULE``,
+            default off). When off, the model is told to use the availability tools instead.
+        model: Model name used to pick the tokenizer.
+    """
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        schedule_days: Optional[int] = None,
+        preload_schedule: Optional[bool] = None,
+        model: str = "gpt-4o",
+    ):
+        self.token_budget = token_budget or int(os.getenv("PROMPT_TOKEN_BUDGET", "1500"))
+        self.schedule_days = schedule_days or int(os.getenv("PROMPT_SCHEDULE_DAYS", "7"))
+        if preload_schedule is None:
+            preload_schedule = os.getenv("PROMPT_PRELOAD_SCHEDULE", "").lower() in ("1", "true", "yes")
+        self.preload_schedule = preload_schedule
+        self.model = model
+        self.token_count = 0
+
+    def schedule_lines(self, index: AvailabilityIndex, max_days: int) -> List[str]:
+        lines = []
+        dates = index.dates()[:max_days]
+        for department_id in index.department_ids():
+            entries = []
+            for day in dates:
+                ranges = free_ranges(index, department_id, day)
+                if ranges:
+                    joined = ", ".join(f"{start}-{end}" for start, end in ranges)
+                    entries.append(f"{DAYS[day.weekday()]} {day.isoformat()} {joined}")
+            if entries:
+                lines.append(f"{index.department_name(department_id)}: {'; '.join(entries)}.")
+        return lines
+
+    def build(self, index: Optional[AvailabilityIndex]) -> str:
+        """Builds the prompt; without an index yet, the model is pointed at the tools."""
+        if index is None:
+            prompt = f"{INSTRUCTIONS} {TOOLS_INSTRUCTIONS}"
+            self.token_count = count_tokens(prompt, self.model)
+            return prompt
+        departments = [index.department_name(d) for d in index.department_ids()]
+        header = f"{INSTRUCTIONS} Available departments: {', '.join(departments)}. "
+        if not self.preload_schedule:
+            prompt = header + TOOLS_INSTRUCTIONS
+            self.token_count = count_tokens(prompt, self.model)
+            logger.info(f"System prompt: {self.token_count} tokens (availability served by tools).")
+            return prompt
+        prompt = header
+        full_days = min(self.schedule_days, index.horizon_days)
+        max_days = full_days
+        while max_days > 0:
+            lines = self.schedule_lines(index, max_days)
+            prompt = header + "Open appointment times (booked slots already removed): " + " ".join(lines)
+            if max_days < full_days:
+                prompt += f" Availability after {index.dates()[max_days - 1].isoformat()} is not listed; say you will check if asked."
+            self.token_count = count_tokens(prompt, self.model)
+            if self.token_count <= self.token_budget:
+                break
+            max_days -= 1
+        else:
+            prompt = header
+            self.token_count = count_tokens(prompt, self.model)
+            if self.token_count > self.token_budget:
+                logger.warning(
+                    f"System prompt instructions alone use {self.token_count} tokens, "
+                    f"over the budget of {self.token_budget}."
+                )
+        logger.info(f"System prompt: {self.token_count} tokens ({max_days} days of availability).")
+        return prompt
@@ -0,0 +1,189 @@
+"""Templated answers to the most common availability questions.
+
+``AvailabilityResponder`` sits between the user context aggregator and the
+LLM. When the caller's last turn asks which departments exist, or what a
+department has free on a given day, it answers in French straight from the
+availability index instead of sending the turn to the LLM. The answer is
+added to the conversation context and spoken with a ``TTSSpeakFrame``, which
+``tts_cache.CachedSpeechProcessor`` can serve from pre-rendered audio.
+Anything else, or any doubt about the intent, falls through to the LLM
+unchanged.
+
+Rendered answers are cached for ``RESPONSE_CACHE_TTL`` seconds, keyed on the
+availability index version, so a booking made by any caller invalidates them.
+"""
+
+import os
+import re
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from loguru import logger
+
+from pipecat.frames.frames import Frame, TTSSpeakFrame
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContextFrame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from availability import DAYS, AvailabilityIndex
+from normalization import FRENCH_DAYS, FRENCH_MONTHS, days_in, fold, mentions_time
+from prompt_builder import free_ranges
+from ttl_cache import TTLCache
+
+_DEPARTMENTS_QUESTION = re.compile(
+    r"\b(quel(le)?s? (sont les )?(services?|departements?|specialites?)"
+    r"|liste des (services|departements|specialites)"
+    r"|(which|what) (departments|services|specialties))\b"
+)
+_AVAILABILITY_QUESTION = re.compile(
+    r"\b(disponib\w*|dispo|libres?|creneaux?|horaires?|places?"
+    r"|available|availability|free|open slots?)\b"
+)
+
+
+def french_department_name(name: str) -> str:
+    """Spoken French form of a department name, e.g. ``Cardiology`` -> ``cardiologie``."""
+    lowered = name.lower()
+    if lowered.endswith("ology"):
+        return lowered[: -len("y")] + "ie"
+    return name
+
+
+def spoken_time(hhmm: str) -> str:
+    hours, minutes = (int(part) for part in hhmm.split(":"))
+    if minutes == 0:
+        return f"{hours} heures"
+    return f"{hours} heures {minutes}"
+
+
+def spoken_date(day: date) -> str:
+    return f"{FRENCH_DAYS[day.weekday()]} {day.day} {FRENCH_MONTHS[day.month - 1]}"
+
+
+def join_french(items: List[str]) -> str:
+    """``a, b et c``."""
+    return ", ".join(items[:-1]) + f" et {items[-1]}" if len(items) > 1 else items[0]
+
+
+def departments_in(index: AvailabilityIndex, text: str) -> List:
+    """Departments named in ``text``, in English or in their spoken French form."""
+    folded = fold(text)
+    found = []
+    for department_id in index.department_ids():
+        name = index.department_name(department_id)
+        forms = {fold(name), fold(french_department_name(name))}
+        if any(re.search(rf"\b{re.escape(form)}\b", folded) for form in forms):
+            found.append(department_id)
+    return found
+
+
+def _last_user_text(context) -> Optional[str]:
+    messages = context.get_messages()
+    if not messages or messages[-1].get("role") != "user":
+        return None
+    content = messages[-1].get("content")
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content if isinstance(content, str) else None
+
+
+class AvailabilityResponder(FrameProcessor):
+    """Answers department and availability questions without the LLM.
+
+    Args:
+        enricher: Connected ``DataEnricher`` owning the availability index.
+        ttl: Seconds a rendered answer is reused (``RESPONSE_CACHE_TTL``, default 30).
+    """
+
+    def __init__(self, enricher, ttl: Optional[float] = None, **kwargs):
+        super().__init__(**kwargs)
+        self._enricher = enricher
+        self.cache = TTLCache(ttl or float(os.getenv("RESPONSE_CACHE_TTL", "30")))
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        if isinstance(frame, OpenAILLMContextFrame) and direction == FrameDirection.DOWNSTREAM:
+            answer = await self._answer(frame.context)
+            if answer is not None:
+                frame.context.add_message({"role": "assistant", "content": answer})
+                await self.push_frame(TTSSpeakFrame(answer))
+                return
+        await self.push_frame(frame, direction)
+
+    async def _answer(self, context) -> Optional[str]:
+        text = _last_user_text(context)
+        if not text:
+            return None
+        try:
+            index = await self._enricher.get_availability_index()
+            intent = self.match_intent(index, text)
+            if intent is None:
+                return None
+            key = (intent, id(index), index.version)
+            answer = self.cache.get(key)
+            if answer is None:
+                answer = self.render(index, intent)
+                self.cache.set(key, answer)
+            logger.debug(f"Answered {intent} from the availability index")
+            return answer
+        except Exception as e:
+            logger.error(f"Availability responder failed, falling back to the LLM: {e}")
+            return None
+
+    def match_intent(self, index: AvailabilityIndex, text: str) -> Optional[Tuple]:
+        """Returns ``("departments",)``, ``("times", department_id, date)`` or ``None``."""
+        folded = fold(text)
+        # A time in the turn means the caller is picking a slot: leave it to the LLM
+        if mentions_time(text):
+            return None
+        departments = departments_in(index, text)
+        days = days_in(text, index.start_date)
+        if not departments and _DEPARTMENTS_QUESTION.search(folded):
+            return ("departments",)
+        if (
+            len(departments) == 1 and len(days) == 1 and index.covers(days[0])
+            and _AVAILABILITY_QUESTION.search(folded)
+        ):
+            return ("times", departments[0], days[0])
+        return None
+
+    def fixed_answers(self, index: AvailabilityIndex) -> List[str]:
+        """Answers that only change with the departments and their opening days, worth pre-rendering."""
+        answers = [self.render(index, ("departments",))]
+        for department_id in index.department_ids():
+            open_days = index.department_days(department_id)
+            answers.extend(
+                self.render(index, ("times", department_id, index.next_date(day)))
+                for day in DAYS
+                if day not in open_days
+            )
+        return answers
+
+    def render(self, index: AvailabilityIndex, intent: Tuple) -> str:
+        if intent[0] == "departments":
+            names = [french_department_name(index.department_name(d)) for d in index.department_ids()]
+            if not names:
+                return "Je suis désolé, aucun service ne prend de rendez-vous pour le moment."
+            return f"Nous proposons les services suivants : {join_french(names)}. Lequel vous intéresse ?"
+
+        _, department_id, day = intent
+        name = french_department_name(index.department_name(department_id))
+        weekday = day.weekday()
+        open_days = index.department_days(department_id)
+        if DAYS[weekday] not in open_days:
+            opened = join_french([f"le {FRENCH_DAYS[DAYS.index(d)]}" for d in open_days])
+            return (
+                f"Le service de {name} n'est pas ouvert le {FRENCH_DAYS[weekday]}. "
+                f"Il est ouvert {opened}. Quel jour vous conviendrait ?"
+            )
+        # Without the part of today that is already over
+        ranges: List[Tuple[str, str]] = free_ranges(index, department_id, day, datetime.now())
+        if not ranges:
+            return (
+                f"Il n'y a plus de créneau libre en {name} le {spoken_date(day)}. "
+                f"Souhaitez-vous un autre jour ?"
+            )
+        spoken = [f"de {spoken_time(start)} à {spoken_time(end)}" for start, end in ranges]
+        return (
+            f"Le {spoken_date(day)}, le service de {name} a des disponibilités {join_french(spoken)}. "
+            f"Quel horaire vous conviendrait ?"
+        )
@@ -0,0 +1,143 @@
+"""Pool of pre-provisioned Daily rooms and meeting tokens.
+
+Creating a room and a token costs two sequential Daily REST round-trips.
+The pool keeps ``size`` ready-to-use ``(room_url, token)`` pairs, refills
+them in the background and drops pairs before their expiry, so ``/connect``
+can hand one out immediately.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Optional, Set, Tuple
+
+from loguru import logger
+
+from pipecat.transports.services.helpers.daily_rest import (
+    DailyRESTHelper,
+    DailyRoomParams,
+    DailyRoomProperties,
+)
+
+
+class DailyRoomPool:
+    """Keeps Daily rooms and tokens ready ahead of demand.
+
+    Args:
+        helper: Daily REST helper used to create rooms and tokens.
+        size: Number of ready pairs to keep. ``0`` creates every room on demand.
+        ttl: Lifetime in seconds of pooled rooms and tokens.
+        expiry_margin: Pairs this close to their expiry are never handed out.
+        check_interval: Seconds between two expiry checks.
+    """
+
+    def __init__(
+        self,
+        helper: DailyRESTHelper,
+        size: int,
+        ttl: float = 60 * 60,
+        expiry_margin: float = 10 * 60,
+        check_interval: float = 30.0,
+    ):
+        self._helper = helper
+        self._size = max(size, 0)
+        self._ttl = ttl
+        self._expiry_margin = expiry_margin
+        self._check_interval = check_interval
+        # (expires_at, room_url, token), oldest first
+        self._ready: Deque[Tuple[float, str, str]] = deque()
+        self._creating = 0
+        self._refill_event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._deletions: Set[asyncio.Task] = set()
+
+    @property
+    def ready_count(self) -> int:
+        return len(self._ready)
+
+    async def start(self):
+        if self._size > 0 and self._task is None:
+            self._task = asyncio.create_task(self._refill_loop())
+            self._refill_event.set()
+
+    async def stop(self):
+        """Stops refilling and deletes the rooms that were never handed out."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        rooms = [room_url for _, room_url, _ in self._ready]
+        self._ready.clear()
+        await asyncio.gather(*(self._delete(room_url) for room_url in rooms))
+
+    async def acquire(self) -> Tuple[str, str]:
+        """Returns a ``(room_url, token)`` pair, from the pool when one is ready.
+
+        Raises:
+            RuntimeError: If a room has to be created on demand and that fails.
+        """
+        self._drop_expired()
+        self._refill_event.set()
+        if self._ready:
+            _, room_url, token = self._ready.popleft()
+            return room_url, token
+        _, room_url, token = await self._create()
+        return room_url, token
+
+    async def _create(self) -> Tuple[float, str, str]:
+        expires_at = time.time() + self._ttl
+        room = await self._helper.create_room(
+            DailyRoomParams(properties=DailyRoomProperties(exp=expires_at))
+        )
+        if not room.url:
+            raise RuntimeError("Failed to create room")
+        token = await self._helper.get_token(room.url, self._ttl)
+        if not token:
+            raise RuntimeError(f"Failed to get token for room: {room.url}")
+        return expires_at, room.url, token
+
+    def _drop_expired(self):
+        deadline = time.time() + self._expiry_margin
+        while self._ready and self._ready[0][0] <= deadline:
+            _, room_url, _ = self._ready.popleft()
+            logger.debug(f"Dropping pooled room close to expiry: {room_url}")
+            task = asyncio.create_task(self._delete(room_url))
+            self._deletions.add(task)
+            task.add_done_callback(self._deletions.discard)
+
+    async def _delete(self, room_url: str):
+        try:
+            await self._helper.delete_room_by_url(room_url)
+        except Exception as e:
+            logger.warning(f"Failed to delete pooled room {room_url}: {e}")
+
+    async def _refill_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._refill_event.wait(), timeout=self._check_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._refill_event.clear()
+            self._drop_expired()
+            missing = self._size - len(self._ready) - self._creating
+            if missing <= 0:
+                continue
+            self._creating += missing
+            results = await asyncio.gather(
+                *(self._create() for _ in range(missing)), return_exceptions=True
+            )
+            self._creating -= missing
+            failed = False
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to pre-provision Daily room: {result}")
+                    failed = True
+                else:
+                    self._ready.append(result)
+            if failed:
+                # Back off instead of hammering the Daily API while it fails
+                await asyncio.sleep(5)
+                self._refill_event.set()
@@ -0,0 +1,111 @@
+"""Seed data for the ``departments`` and ``bookings`` collections.
+
+``init_departments.json`` and ``init_bookings.json`` are MongoDB Extended JSON
+exports. Besides loading them, this module scales them up into synthetic data
+sets (thousands of departments, up to millions of bookings) for benchmarks and
+load tests. Generated bookings fall on the departments' operating hours and
+never put two active bookings on the same slot, so they satisfy the unique
+active-slot index.
+"""
+
+import os
+import random
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from bson import ObjectId, json_util
+
+from availability import ACTIVE_STATUSES, DAYS, SLOT_MINUTES, parse_hhmm
+
+SEED_DIR = os.path.dirname(os.path.abspath(__file__))
+DEPARTMENTS_FILE = os.path.join(SEED_DIR, "init_departments.json")
+BOOKINGS_FILE = os.path.join(SEED_DIR, "init_bookings.json")
+
+
+def load_extended_json(path: str) -> List[Dict[str, Any]]:
+    """Loads a JSON array exported in MongoDB Extended JSON (``$oid``, ``$date``...)."""
+    with open(path) as f:
+        return json_util.loads(f.read())
+
+
+def generate_departments(count: int, templates: Optional[List[Dict[str, Any]]] = None, seed: int = 0) -> List[Dict[str, Any]]:
+    """Generates ``count`` departments modelled on ``templates``.
+
+    Templates are used in turn; from the second round on, names get a numeric
+    suffix and operating hours are shuffled across weekdays so departments do
+    not all open on the same days.
+    """
+    templates = templates or load_extended_json(DEPARTMENTS_FILE)
+    rng = random.Random(seed)
+    # Ids depend on the seed only, so a data set can be loaded again or resumed
+    ids = random.Random(f"department-ids-{seed}")
+    departments = []
+    for i in range(count):
+        template = templates[i % len(templates)]
+        round_number = i // len(templates)
+        name = template["name"] if round_number == 0 else f"{template['name']} {round_number + 1}"
+        hours = [dict(oh) for oh in template["operating_hours"]]
+        if round_number:
+            for oh, day in zip(hours, sorted(rng.sample(DAYS[:6], len(hours)), key=DAYS.index)):
+                oh["day_of_week"] = day
+        departments.append({"_id": ObjectId(ids.randbytes(12)), "name": name, "operating_hours": hours})
+    return departments
+
+
+def _department_slots(department: Dict[str, Any], start: date, days: int) -> List[datetime]:
+    slots = []
+    hours_by_day = {}
+    for oh in department.get("operating_hours", []):
+        hours_by_day.setdefault(oh["day_of_week"], []).append(
+            (parse_hhmm(oh["start_time"]), parse_hhmm(oh["end_time"]))
+        )
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        for opens, closes in hours_by_day.get(DAYS[day.weekday()], []):
+            midnight = datetime.combine(day, datetime.min.time())
+            for minute in range(opens, closes, SLOT_MINUTES):
+                slots.append(midnight + timedelta(minutes=minute))
+    return slots
+
+
+def generate_bookings(
+    departments: List[Dict[str, Any]],
+    count: int,
+    today: Optional[date] = None,
+    days_ahead: int = 14,
+    cancelled_ratio: float = 0.1,
+    fill_ratio: float = 0.6,
+    seed: int = 0,
+) -> Iterator[Dict[str, Any]]:
+    """Yields ``count`` bookings spread evenly over ``departments``.
+
+    Each department's bookings cover its open slots up to ``days_ahead`` days
+    from ``today``, filled at ``fill_ratio``; the window extends into the past
+    as far as needed to hold them all. A ``cancelled_ratio`` share of bookings
+    is cancelled. Bookings are yielded lazily so millions can be streamed
+    into a collection.
+    """
+    today = today or date.today()
+    rng = random.Random(seed)
+    per_department, extra = divmod(count, len(departments))
+    user_id = 100
+    for i, department in enumerate(departments):
+        wanted = per_department + (1 if i < extra else 0)
+        if not wanted:
+            continue
+        weekly = len(_department_slots(department, today, 7))
+        if not weekly:
+            continue
+        weeks = -(-wanted // max(int(weekly * fill_ratio), 1))
+        start = today + timedelta(days=days_ahead - 7 * weeks)
+        slots = _department_slots(department, start, 7 * weeks)
+        for booking_time in sorted(rng.sample(slots, min(wanted, len(slots)))):
+            user_id += 1
+            cancelled = rng.random() < cancelled_ratio
+            yield {
+                "department_id": department["_id"],
+                "user_id": user_id,
+                "booking_time": booking_time,
+                "status": "cancelled" if cancelled else rng.choice(ACTIVE_STATUSES),
+                "active": not cancelled,
+            }
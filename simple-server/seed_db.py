@@ -0,0 +1,388 @@
+"""Bulk loads seed data into MongoDB.
+
+Loads the Extended JSON exports (``init_departments.json``,
+``init_bookings.json`` or much larger ones) or a synthetic data set of N
+departments and M bookings generated with ``seed_data``:
+
+- files are read as a stream, one array element at a time, so memory stays
+  bounded whatever their size; ``$oid``, ``$date`` and the other Extended JSON
+  types are converted to their BSON types;
+- documents are inserted in batches with unordered ``insert_many``, the next
+  batch being read while the previous one is written;
+- documents without an ``_id`` get one derived from their source and position,
+  and duplicate key errors are skipped, so loading the same data twice leaves
+  one copy; bookings refer to departments by ``_id``, so departments that
+  bookings point to must keep their ``_id`` in the export, and bookings whose
+  department is not loaded are reported;
+- progress is saved after each batch, and a run interrupted for any reason
+  resumes after the last saved batch when started again with the same
+  arguments;
+- bookings get the ``active`` flag the unique slot index is filtered on;
+- the ``mongo_loader`` indexes are created before loading, or after it with
+  ``--index-after``, which is faster for large loads but does not stop
+  duplicate active bookings on the way in.
+
+Examples:
+    python seed_db.py
+    python seed_db.py --bookings-file exports/bookings.json --no-departments
+    python seed_db.py --generate 1000x1000000 --drop
+    python seed_db.py --generate 100x100000 --dry-run
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import date
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from bson import ObjectId, json_util
+from dotenv import load_dotenv
+from loguru import logger
+from pymongo.errors import BulkWriteError
+
+from mongo_loader import BOOKING_INDEXES, DEPARTMENT_INDEXES, backfill_active_flags, with_active_flag
+from seed_data import BOOKINGS_FILE, DEPARTMENTS_FILE, generate_bookings, generate_departments
+
+load_dotenv(override=True)
+
+BATCH_SIZE = 10_000
+READ_CHUNK_SIZE = 1 << 20
+PROGRESS_FILE = ".seed-progress.json"
+DUPLICATE_KEY = 11000
+
+_SEPARATORS = " \t\r\n,"
+
+
+def iter_json_array(path: str, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Any]:
+    """Yields the elements of a JSON array file in Extended JSON, reading it in chunks.
+
+    Only the current chunk and the element being decoded are held in memory.
+    """
+    decoder = json.JSONDecoder(object_hook=json_util.object_hook)
+    with open(path, encoding="utf-8") as f:
+        buffer, position, eof = "", 0, False
+
+        def fill() -> bool:
+            nonlocal buffer, position, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            return not eof
+
+        def skip(characters: str) -> bool:
+            """Moves past ``characters``; False at the end of the file."""
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in characters:
+                    position += 1
+                if position < len(buffer):
+                    return True
+                if not fill():
+                    return False
+
+        if not skip(" \t\r\n\ufeff") or buffer[position] != "[":
+            raise ValueError(f"{path} is not a JSON array")
+        position += 1
+        while True:
+            if not skip(_SEPARATORS):
+                raise ValueError(f"{path} ends before the end of its JSON array")
+            if buffer[position] == "]":
+                return
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The element runs past the buffer, or the file is malformed
+                if fill():
+                    continue
+                raise
+            if end == len(buffer) and fill():
+                # A number may continue in the next chunk: decode it again
+                continue
+            position = end
+            yield element
+
+
+def batched(documents: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(documents)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def with_ids(documents: Iterable[Dict[str, Any]], namespace: str, start: int = 0) -> Iterator[Dict[str, Any]]:
+    """Gives documents without an ``_id`` one derived from ``namespace`` and their position."""
+    for position, document in enumerate(documents, start):
+        if "_id" not in document:
+            digest = hashlib.blake2b(f"{namespace}:{position}".encode(), digest_size=12).digest()
+            document["_id"] = ObjectId(digest)
+        yield document
+
+
+async def _insert_batch(collection, batch: List[Dict[str, Any]]) -> int:
+    """Inserts a batch and returns the number of documents inserted, skipping duplicates."""
+    try:
+        result = await collection.insert_many(batch, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        if any(error.get("code") != DUPLICATE_KEY for error in e.details.get("writeErrors", [])):
+            raise
+        return e.details.get("nInserted", 0)
+
+
+async def insert_batches(
+    collection,
+    documents: Iterable[Dict[str, Any]],
+    batch_size: int = BATCH_SIZE,
+    on_batch: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[int, int]:
+    """Inserts ``documents`` in unordered batches, one batch in flight while the next is built.
+
+    Args:
+        collection: Motor (or ``fake_mongo``) collection.
+        documents: Documents to insert, read lazily.
+        batch_size: Documents per ``insert_many``.
+        on_batch: Called with the size of each batch and the documents inserted,
+            once the batch is written, in order.
+
+    Returns:
+        The number of documents inserted and of duplicates skipped.
+    """
+    inserted = duplicates = 0
+    pending: Optional[Tuple[asyncio.Task, int]] = None
+
+    async def finish():
+        nonlocal inserted, duplicates
+        task, size = pending
+        count = await task
+        inserted += count
+        duplicates += size - count
+        if on_batch:
+            on_batch(size, count)
+
+    for batch in batched(documents, batch_size):
+        if pending:
+            await finish()
+        pending = (asyncio.create_task(_insert_batch(collection, batch)), len(batch))
+        # Let the insert start before building the next batch
+        await asyncio.sleep(0)
+    if pending:
+        await finish()
+    return inserted, duplicates
+
+
+class SeedProgress:
+    """Documents loaded per step, saved to a JSON file after each batch.
+
+    A step resumes only if its source (file, size and modification time, or
+    generator parameters) is the one recorded.
+    """
+
+    def __init__(self, path: Optional[str], database: str):
+        self.path = path
+        self.state: Dict[str, Any] = {"database": database, "steps": {}}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            if saved.get("database") == database:
+                self.state = saved
+
+    def done(self, step: str, source: Dict[str, Any]) -> Tuple[int, bool]:
+        """Documents already loaded by ``step`` and whether it is complete."""
+        entry = self.state["steps"].get(step)
+        if not entry or entry.get("source") != source:
+            return 0, False
+        return entry["done"], entry.get("complete", False)
+
+    def update(self, step: str, source: Dict[str, Any], done: int, complete: bool = False):
+        self.state["steps"][step] = {"source": source, "done": done, "complete": complete}
+        self.save()
+
+    def source(self, step: str) -> Optional[Dict[str, Any]]:
+        entry = self.state["steps"].get(step)
+        return entry["source"] if entry else None
+
+    def clear(self):
+        self.state["steps"] = {}
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(temporary, self.path)
+
+
+def file_source(path: str) -> Dict[str, Any]:
+    stat = os.stat(path)
+    return {"file": os.path.abspath(path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+async def load_step(
+    database,
+    progress: SeedProgress,
+    step: str,
+    collection: str,
+    source: Dict[str, Any],
+    documents: Callable[[], Iterable[Dict[str, Any]]],
+    batch_size: int,
+):
+    """Loads one source into a collection, resuming after the documents already loaded."""
+    done, complete = progress.done(step, source)
+    if complete:
+        logger.info(f"{step}: already loaded ({done} documents)")
+        return
+    if done:
+        logger.info(f"{step}: resuming after {done} documents")
+
+    started = time.perf_counter()
+    namespace = json.dumps(source, sort_keys=True)
+    remaining = with_ids(islice(documents(), done, None), namespace, start=done)
+
+    def on_batch(size: int, count: int):
+        nonlocal done
+        done += size
+        progress.update(step, source, done)
+        logger.debug(f"{step}: {done} documents")
+
+    inserted, duplicates = await insert_batches(database[collection], remaining, batch_size, on_batch)
+    progress.update(step, source, done, complete=True)
+    elapsed = time.perf_counter() - started
+    rate = inserted / elapsed if elapsed else 0.0
+    logger.info(
+        f"{step}: {inserted} documents inserted into {collection}, {duplicates} duplicates skipped "
+        f"in {elapsed:.1f}s ({rate:,.0f}/s)"
+    )
+
+
+async def create_indexes(database):
+    flagged = await backfill_active_flags(database)
+    if flagged:
+        logger.info(f"Set the active flag of {flagged} bookings")
+    await database["departments"].create_indexes(DEPARTMENT_INDEXES)
+    await database["bookings"].create_indexes(BOOKING_INDEXES)
+    logger.info("Indexes created")
+
+
+async def check_department_references(database) -> int:
+    """Logs and returns the number of bookings whose department is not loaded."""
+    department_ids = [d["_id"] async for d in database["departments"].find({}, {"_id": 1})]
+    orphans = await database["bookings"].count_documents({"department_id": {"$nin": department_ids}})
+    if orphans:
+        logger.warning(f"{orphans} bookings reference a department that is not in the departments collection")
+    return orphans
+
+
+async def seed(database, args: argparse.Namespace, progress: SeedProgress):
+    if args.drop:
+        await database["departments"].drop()
+        await database["bookings"].drop()
+        progress.clear()
+        logger.info(f"Dropped the departments and bookings collections of {args.mongo_db}")
+    if not args.index_after:
+        await create_indexes(database)
+
+    if args.generate:
+        department_count, booking_count = args.generate
+        source = {"departments": department_count, "bookings": booking_count, "seed": args.seed}
+        # The bookings of a resumed run must fall on the same dates as before
+        saved = progress.source("generated bookings") or {}
+        today = date.today().isoformat()
+        if {key: value for key, value in saved.items() if key != "today"} == source:
+            today = saved["today"]
+        departments = generate_departments(department_count, seed=args.seed)
+        await load_step(
+            database, progress, "generated departments", "departments",
+            {"departments": department_count, "seed": args.seed},
+            lambda: (dict(d) for d in departments), args.batch_size,
+        )
+        await load_step(
+            database, progress, "generated bookings", "bookings",
+            {**source, "today": today},
+            lambda: generate_bookings(departments, booking_count, today=date.fromisoformat(today), seed=args.seed),
+            args.batch_size,
+        )
+    else:
+        if args.departments_file:
+            await load_step(
+                database, progress, f"departments from {args.departments_file}", "departments",
+                file_source(args.departments_file), lambda: iter_json_array(args.departments_file), args.batch_size,
+            )
+        if args.bookings_file:
+            await load_step(
+                database, progress, f"bookings from {args.bookings_file}", "bookings",
+                file_source(args.bookings_file),
+                lambda: (with_active_flag(b) for b in iter_json_array(args.bookings_file)), args.batch_size,
+            )
+            await check_department_references(database)
+
+    if args.index_after:
+        await create_indexes(database)
+
+
+def parse_scale(value: str) -> Tuple[int, int]:
+    try:
+        departments, bookings = value.lower().split("x")
+        return int(departments), int(bookings)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid scale: {value}. Expected DEPARTMENTSxBOOKINGS, e.g. 100x10000")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Bulk load departments and bookings into MongoDB")
+    parser.add_argument("--departments-file", default=DEPARTMENTS_FILE, help="Extended JSON array of departments")
+    parser.add_argument("--bookings-file", default=BOOKINGS_FILE, help="Extended JSON array of bookings")
+    parser.add_argument("--no-departments", action="store_true", help="Do not load a departments file")
+    parser.add_argument("--no-bookings", action="store_true", help="Do not load a bookings file")
+    parser.add_argument(
+        "--generate", type=parse_scale, metavar="DEPARTMENTSxBOOKINGS",
+        help="Load a synthetic data set instead of files, e.g. 1000x1000000",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic data set")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Documents per insert_many")
+    parser.add_argument("--drop", action="store_true", help="Drop both collections and the saved progress first")
+    parser.add_argument("--index-after", action="store_true", help="Create the indexes after loading")
+    parser.add_argument("--progress-file", default=PROGRESS_FILE, help="Where progress is saved for resuming")
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI"), help="MongoDB URI (defaults to MONGO_URI)")
+    parser.add_argument("--mongo-db", default=os.getenv("MONGO_DB"), help="Database name (defaults to MONGO_DB)")
+    parser.add_argument("--dry-run", action="store_true", help="Load into the in-process stand-in to time the load")
+    parser.add_argument("--verbose", action="store_true", help="Log every batch")
+    args = parser.parse_args()
+    if args.no_departments:
+        args.departments_file = None
+    if args.no_bookings:
+        args.bookings_file = None
+
+    logger.remove()
+    logger.add(sys.stderr, level="DEBUG" if args.verbose else "INFO")
+
+    client = None
+    if args.dry_run:
+        from fake_mongo import FakeDatabase
+
+        args.mongo_db = args.mongo_db or "fake"
+        database, progress = FakeDatabase(args.mongo_db), SeedProgress(None, args.mongo_db)
+    else:
+        if not args.mongo_uri or not args.mongo_db:
+            parser.error("--mongo-uri and --mongo-db (or MONGO_URI and MONGO_DB) are required")
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        client = AsyncIOMotorClient(args.mongo_uri)
+        database, progress = client[args.mongo_db], SeedProgress(args.progress_file, args.mongo_db)
+
+    started = time.perf_counter()
+    try:
+        await seed(database, args, progress)
+    finally:
+        if client is not None:
+            client.close()
+    logger.info(f"Seeded {args.mongo_db} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
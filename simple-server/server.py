@@ -12,6 +12,7 @@ direct browser access and RTVI client connections. It handles:
 - Managing bot processes
 - Providing connection credentials
 - Monitoring bot status
+- Exporting bot latency metrics
 
 Requirements:
 - Daily API key (set in .env file)
@@ -21,18 +22,27 @@ Requirements:
 """
 
 import argparse
+import asyncio
 import os
 import subprocess
+import sys
 from contextlib import asynccontextmanager
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 import aiohttp
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse
 
-from pipecat.transports.services.helpers.daily_rest import DailyRESTHelper, DailyRoomParams
+from pipecat.transports.services.helpers.daily_rest import DailyRESTHelper
+
+from bot_pool import BotWorkerPool
+from bot_supervisor import AdmissionError, BotSupervisor
+from metrics import SnapshotCollector, metrics
+from room_pool import DailyRoomPool
+from session_dispatcher import DISPATCH_HEADER, SessionDispatcher
+from session_registry import create_registry
 
 # Load environment variables from .env file
 load_dotenv(override=True)
@@ -40,22 +50,26 @@ load_dotenv(override=True)
 # Maximum number of bot instances allowed per room
 MAX_BOTS_PER_ROOM = 1
 
-# Dictionary to track bot processes: {pid: (process, room_url)}
-bot_procs = {}
+# Tracks bot processes and enforces node capacity
+supervisor = BotSupervisor(max_bots_per_room=MAX_BOTS_PER_ROOM)
 
 # Store Daily API helpers
 daily_helpers = {}
 
+# Pool of pre-started bot workers, created on startup
+bot_pool: Optional[BotWorkerPool] = None
 
-def cleanup():
-    """Cleanup function to terminate all bot processes.
+# Pool of pre-provisioned Daily rooms and tokens, created on startup
+room_pool: Optional[DailyRoomPool] = None
 
-    Called during server shutdown.
-    """
-    for entry in bot_procs.values():
-        proc = entry[0]
-        proc.terminate()
-        proc.wait()
+# Places sessions across server replicas, created on startup
+dispatcher: Optional[SessionDispatcher] = None
+
+# Merges the metrics snapshots written by the bot processes
+metrics_collector = SnapshotCollector()
+
+# Directory the bot processes are started from
+BOT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
 def get_bot_file():
@@ -70,23 +84,98 @@ def get_bot_file():
     return f"bot-{bot_implementation}"
 
 
+def get_bot_command(*args: str) -> List[str]:
+    """Command line used to start a bot process with the given arguments."""
+    return [sys.executable, "-m", get_bot_file(), *args]
+
+
+async def spawn_bot(room_url: str, token: str) -> subprocess.Popen:
+    """Starts a bot for the given room.
+
+    The room is handed to an idle pre-started worker when one is available,
+    otherwise a new bot process is cold-started. The bot takes over the slot
+    reserved by ``admit_bot()``, which is released if it fails to start or its
+    session cannot be recorded; in the latter case the bot is terminated.
+
+    Returns:
+        subprocess.Popen: The bot process serving the room
+    """
+    proc = None
+    try:
+        proc = await bot_pool.acquire(room_url, token) if bot_pool else None
+        if proc is None:
+            proc = subprocess.Popen(
+                get_bot_command("-u", room_url, "-t", token),
+                bufsize=1,
+                cwd=BOT_DIR,
+            )
+        await dispatcher.record_session(proc.pid, room_url)
+    except BaseException:
+        if proc is not None:
+            proc.terminate()
+        supervisor.release()
+        raise
+    supervisor.register(proc, room_url)
+    return proc
+
+
+def admit_bot(room_url: Optional[str] = None):
+    """Checks that the node can take one more bot and reserves a slot for it.
+
+    With ``room_url``, only checks that the room can take one more bot.
+
+    Raises:
+        HTTPException: 503 with a Retry-After header if the node is at capacity
+    """
+    try:
+        if room_url is None:
+            supervisor.admit()
+        else:
+            supervisor.check_room(room_url)
+    except AdmissionError as e:
+        raise HTTPException(
+            status_code=503, detail=e.reason, headers={"Retry-After": str(e.retry_after)}
+        )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """FastAPI lifespan manager that handles startup and shutdown tasks.
 
     - Creates aiohttp session
-    - Initializes Daily API helper
+    - Initializes Daily API helper and the pool of pre-provisioned rooms
+    - Starts the pool of pre-started bot workers
+    - Starts reaping exited bot processes
+    - Registers this node in the session registry
     - Cleans up resources on shutdown
     """
+    global bot_pool, room_pool, dispatcher
+
     aiohttp_session = aiohttp.ClientSession()
     daily_helpers["rest"] = DailyRESTHelper(
         daily_api_key=os.getenv("DAILY_API_KEY", ""),
         daily_api_url=os.getenv("DAILY_API_URL", "https://api.daily.co/v1"),
         aiohttp_session=aiohttp_session,
     )
+    room_pool = DailyRoomPool(
+        daily_helpers["rest"],
+        size=int(os.getenv("ROOM_POOL_SIZE", "2")),
+        ttl=float(os.getenv("ROOM_POOL_TTL_SECS", "3600")),
+    )
+    await room_pool.start()
+    bot_pool = BotWorkerPool(
+        get_bot_command("--worker"),
+        size=int(os.getenv("BOT_POOL_SIZE", "2")),
+        cwd=BOT_DIR,
+    )
+    await bot_pool.start()
+    supervisor.start()
+    dispatcher = SessionDispatcher(create_registry(), supervisor, aiohttp_session)
+    await dispatcher.start()
     yield
+    await asyncio.gather(bot_pool.stop(), supervisor.shutdown(), room_pool.stop())
+    await dispatcher.stop()
     await aiohttp_session.close()
-    cleanup()
 
 
 # Initialize FastAPI app with lifespan manager
@@ -103,7 +192,10 @@ app.add_middleware(
 
 
 async def create_room_and_token() -> tuple[str, str]:
-    """Helper function to create a Daily room and generate an access token.
+    """Helper function to get a Daily room and an access token.
+
+    The pair comes from the pool of pre-provisioned rooms when one is ready,
+    otherwise the room and token are created on demand.
 
     Returns:
         tuple[str, str]: A tuple containing (room_url, token)
@@ -111,15 +203,10 @@ async def create_room_and_token() -> tuple[str, str]:
     Raises:
         HTTPException: If room creation or token generation fails
     """
-    room = await daily_helpers["rest"].create_room(DailyRoomParams())
-    if not room.url:
-        raise HTTPException(status_code=500, detail="Failed to create room")
-
-    token = await daily_helpers["rest"].get_token(room.url)
-    if not token:
-        raise HTTPException(status_code=500, detail=f"Failed to get token for room: {room.url}")
-
-    return room.url, token
+    try:
+        return await room_pool.acquire()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/")
@@ -127,34 +214,36 @@ async def start_agent(request: Request):
     """Endpoint for direct browser access to the bot.
 
     Creates a room, starts a bot instance, and redirects to the Daily room URL.
+    Like ``/connect``, the session is forwarded to another server replica when
+    it is less loaded, and the browser is redirected to the room created there.
 
     Returns:
         RedirectResponse: Redirects to the Daily room URL
 
     Raises:
-        HTTPException: If room creation, token generation, or bot startup fails
+        HTTPException: If the node is at capacity, or room creation, token generation,
+            or bot startup fails
     """
-    print("Creating room")
-    room_url, token = await create_room_and_token()
-    print(f"Room URL: {room_url}")
+    bundle = await dispatcher.dispatch_connect()
+    if bundle is not None and bundle.get("room_url"):
+        return RedirectResponse(bundle["room_url"])
 
-    # Check if there is already an existing process running in this room
-    num_bots_in_room = sum(
-        1 for proc in bot_procs.values() if proc[1] == room_url and proc[0].poll() is None
-    )
-    if num_bots_in_room >= MAX_BOTS_PER_ROOM:
-        raise HTTPException(status_code=500, detail=f"Max bot limit reached for room: {room_url}")
+    admit_bot()
+
+    try:
+        print("Creating room")
+        room_url, token = await create_room_and_token()
+        print(f"Room URL: {room_url}")
+
+        # Check if there is already an existing process running in this room
+        admit_bot(room_url)
+    except BaseException:
+        supervisor.release()
+        raise
 
     # Spawn a new bot process
     try:
-        bot_file = get_bot_file()
-        proc = subprocess.Popen(
-            [f"python3 -m {bot_file} -u {room_url} -t {token}"],
-            shell=True,
-            bufsize=1,
-            cwd=os.path.dirname(os.path.abspath(__file__)),
-        )
-        bot_procs[proc.pid] = (proc, room_url)
+        await spawn_bot(room_url, token)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start subprocess: {e}")
 
@@ -165,28 +254,34 @@ async def start_agent(request: Request):
 async def rtvi_connect(request: Request) -> Dict[Any, Any]:
     """RTVI connect endpoint that creates a room and returns connection credentials.
 
-    This endpoint is called by RTVI clients to establish a connection.
+    This endpoint is called by RTVI clients to establish a connection. When
+    another server replica is less loaded, the request is forwarded to it.
 
     Returns:
         Dict[Any, Any]: Authentication bundle containing room_url and token
 
     Raises:
-        HTTPException: If room creation, token generation, or bot startup fails
+        HTTPException: If the node is at capacity, or room creation, token generation,
+            or bot startup fails
     """
-    print("Creating room for RTVI connection")
-    room_url, token = await create_room_and_token()
-    print(f"Room URL: {room_url}")
+    if DISPATCH_HEADER not in request.headers:
+        bundle = await dispatcher.dispatch_connect()
+        if bundle is not None:
+            return bundle
+
+    admit_bot()
+
+    try:
+        print("Creating room for RTVI connection")
+        room_url, token = await create_room_and_token()
+        print(f"Room URL: {room_url}")
+    except BaseException:
+        supervisor.release()
+        raise
 
     # Start the bot process
     try:
-        bot_file = get_bot_file()
-        proc = subprocess.Popen(
-            [f"python3 -m {bot_file} -u {room_url} -t {token}"],
-            shell=True,
-            bufsize=1,
-            cwd=os.path.dirname(os.path.abspath(__file__)),
-        )
-        bot_procs[proc.pid] = (proc, room_url)
+        await spawn_bot(room_url, token)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start subprocess: {e}")
 
@@ -195,11 +290,12 @@ async def rtvi_connect(request: Request) -> Dict[Any, Any]:
 
 
 @app.get("/status/{pid}")
-def get_status(pid: int):
-    """Get the status of a specific bot process.
+async def get_status(pid: int, node: Optional[str] = None):
+    """Get the status of a specific bot process started by any server replica.
 
     Args:
         pid (int): Process ID of the bot
+        node (str, optional): Replica that started the bot, when pids collide
 
     Returns:
         JSONResponse: Status information for the bot
@@ -207,16 +303,43 @@ def get_status(pid: int):
     Raises:
         HTTPException: If the specified bot process is not found
     """
-    # Look up the subprocess
-    proc = bot_procs.get(pid)
+    # Look up the subprocess, locally first and then in the session registry
+    status = await dispatcher.session_status(pid, node)
 
     # If the subprocess doesn't exist, return an error
-    if not proc:
+    if status is None:
         raise HTTPException(status_code=404, detail=f"Bot with process id: {pid} not found")
 
-    # Check the status of the subprocess
-    status = "running" if proc[0].poll() is None else "finished"
-    return JSONResponse({"bot_id": pid, "status": status})
+    return JSONResponse(status)
+
+
+@app.get("/status")
+def get_occupancy():
+    """Get the bot occupancy of this node.
+
+    Returns:
+        JSONResponse: Running bots, capacity, host load and worker pool state
+    """
+    occupancy = supervisor.occupancy()
+    occupancy["node_id"] = dispatcher.node_id if dispatcher else None
+    occupancy["pool"] = {
+        "size": bot_pool.size if bot_pool else 0,
+        "idle": bot_pool.idle_count if bot_pool else 0,
+        "warming": bot_pool.warming_count if bot_pool else 0,
+    }
+    occupancy["rooms_ready"] = room_pool.ready_count if room_pool else 0
+    return JSONResponse(occupancy)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Latency histograms of every bot started by this node, in Prometheus text format.
+
+    Returns:
+        PlainTextResponse: Histograms merged from the snapshots of running and exited bots
+    """
+    merged = await asyncio.to_thread(metrics_collector.collect, metrics)
+    return PlainTextResponse(merged.render(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
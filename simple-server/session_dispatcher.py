@@ -0,0 +1,158 @@
+"""Places bot sessions across server replicas through the session registry.
+
+Every replica publishes a heartbeat with its bot occupancy and the status of
+the sessions it started. ``/connect`` on any replica asks the dispatcher for
+the least-loaded node and, when that is another replica, forwards the request
+to it; ``/status/{pid}`` falls back to the registry for bots started elsewhere.
+"""
+
+import asyncio
+import os
+import socket
+from typing import Any, Dict, Optional, Set
+
+import aiohttp
+from loguru import logger
+
+from bot_supervisor import BotSupervisor
+from session_registry import SessionRegistry
+
+# Header marking a /connect request forwarded by another replica
+DISPATCH_HEADER = "X-Bot-Dispatched-By"
+
+
+class SessionDispatcher:
+    """Publishes this node to the registry and picks a node for new sessions.
+
+    Args:
+        registry: Registry shared by the replicas.
+        supervisor: Supervisor of the bots running on this node.
+        aiohttp_session: Session used to forward requests to other replicas.
+        node_id: Identifier of this node (``NODE_ID``, defaults to the host name and pid).
+        node_url: Base URL other replicas use to reach this node (``NODE_URL``). A
+            node without a URL never receives forwarded sessions.
+        heartbeat_interval: Seconds between two heartbeats.
+        session_retention: Seconds finished sessions stay queryable.
+        node_timeout: Seconds without a heartbeat after which a node is
+            considered dead and its running sessions are reported as lost.
+    """
+
+    def __init__(
+        self,
+        registry: SessionRegistry,
+        supervisor: BotSupervisor,
+        aiohttp_session: aiohttp.ClientSession,
+        node_id: Optional[str] = None,
+        node_url: Optional[str] = None,
+        heartbeat_interval: float = 5.0,
+        session_retention: float = 60 * 60,
+        node_timeout: float = 60.0,
+    ):
+        self.registry = registry
+        self.supervisor = supervisor
+        self.node_id = node_id or os.getenv("NODE_ID") or f"{socket.gethostname()}-{os.getpid()}"
+        self.node_url = (node_url or os.getenv("NODE_URL") or "").rstrip("/") or None
+        self._aiohttp_session = aiohttp_session
+        self._heartbeat_interval = heartbeat_interval
+        self._session_retention = session_retention
+        self._node_timeout = node_timeout
+        self._running: Set[int] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await self.heartbeat()
+        self._task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.heartbeat()
+
+    def local_node(self) -> Dict[str, Any]:
+        occupancy = self.supervisor.occupancy()
+        return {
+            "node_id": self.node_id,
+            "url": self.node_url,
+            "active": occupancy["active"] + occupancy["pending"],
+            "max_bots": occupancy["max_bots"],
+            "load_per_cpu": occupancy["load_per_cpu"],
+        }
+
+    async def record_session(self, pid: int, room_url: str):
+        self._running.add(pid)
+        await self.registry.put_session(self.node_id, pid, room_url, "running")
+
+    async def heartbeat(self):
+        """Publishes this node's load and the final status of its finished sessions."""
+        self.supervisor.reap()
+        for pid in list(self._running):
+            status = self.supervisor.status(pid)
+            if status != "running":
+                self._running.discard(pid)
+                await self.registry.set_session_status(self.node_id, pid, status or "finished")
+        await self.registry.put_node(self.local_node())
+        await self.registry.prune(self._session_retention, self._node_timeout)
+
+    async def choose_node(self) -> Optional[Dict[str, Any]]:
+        """Returns the least-loaded remote node, or ``None`` when this node should take the session."""
+        local = self.local_node()
+        candidates = [local]
+        for node in await self.registry.list_nodes(max_age=3 * self._heartbeat_interval):
+            if node["node_id"] != self.node_id and node.get("url"):
+                candidates.append(node)
+
+        def score(node):
+            occupancy = node["active"] / max(node["max_bots"] or 1, 1)
+            return (occupancy, node.get("load_per_cpu") or 0.0, node["node_id"] != self.node_id)
+
+        best = min(candidates, key=score)
+        return None if best["node_id"] == self.node_id else best
+
+    async def dispatch_connect(self) -> Optional[Dict[str, Any]]:
+        """Forwards a ``/connect`` or ``/`` session to a less-loaded replica's ``/connect``.
+
+        Returns:
+            The replica's authentication bundle, or ``None`` when the session
+            should be served locally (this node is the best choice or forwarding failed).
+        """
+        node = await self.choose_node()
+        if node is None:
+            return None
+        try:
+            async with self._aiohttp_session.post(
+                f"{node['url']}/connect",
+                headers={DISPATCH_HEADER: self.node_id},
+                timeout=aiohttp.ClientTimeout(total=30),
+            ) as response:
+                if response.status == 200:
+                    logger.info(f"Dispatched session to node {node['node_id']}")
+                    return await response.json()
+                logger.warning(f"Node {node['node_id']} refused session with status {response.status}")
+        except Exception as e:
+            logger.warning(f"Failed to dispatch session to node {node['node_id']}: {e}")
+        return None
+
+    async def session_status(self, pid: int, node_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Status of a bot started by any node, from this node's supervisor or the registry."""
+        if node_id in (None, self.node_id):
+            status = self.supervisor.status(pid)
+            if status is not None:
+                return {"bot_id": pid, "node_id": self.node_id, "status": status}
+        sessions = await self.registry.find_sessions(pid, node_id)
+        if not sessions:
+            return None
+        session = sessions[0]
+        return {"bot_id": pid, "node_id": session["node_id"], "status": session["status"]}
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self._heartbeat_interval)
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.error(f"Session registry heartbeat failed: {e}")
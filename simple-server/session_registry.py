@@ -0,0 +1,209 @@
+"""Session registry shared by the server replicas.
+
+The registry records which node runs which bot session and how loaded each
+node is, so any replica can place new sessions and answer status queries.
+Two backends are provided:
+
+- ``InMemorySessionRegistry``: process-local, for a single server process.
+- ``SQLiteSessionRegistry``: a SQLite file shared by every server process on
+  the host (several uvicorn workers or replicas behind a local balancer).
+
+``create_registry`` picks one from ``SESSION_REGISTRY`` (``memory`` or
+``sqlite:///path/to/registry.db``).
+
+A node that stops sending heartbeats (crashed, killed, partitioned) never
+reports its sessions as finished, so pruning marks the running sessions of
+nodes silent for too long as ``lost``; they then age out like finished ones.
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+
+# Status of a session whose node stopped sending heartbeats
+LOST = "lost"
+
+
+class SessionRegistry(ABC):
+    """Interface of a session registry backend.
+
+    Sessions are dicts with ``node_id``, ``pid``, ``room_url``, ``status`` and
+    ``updated_at``. Nodes are dicts with ``node_id``, ``url``, ``active``,
+    ``max_bots``, ``load_per_cpu`` and ``updated_at``.
+    """
+
+    @abstractmethod
+    async def put_session(self, node_id: str, pid: int, room_url: str, status: str):
+        """Records a session, replacing any previous one with the same node and pid."""
+
+    @abstractmethod
+    async def set_session_status(self, node_id: str, pid: int, status: str):
+        """Updates the status of a recorded session."""
+
+    @abstractmethod
+    async def find_sessions(self, pid: int, node_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Sessions with the given pid, most recently updated first."""
+
+    @abstractmethod
+    async def put_node(self, node: Dict[str, Any]):
+        """Records a node heartbeat."""
+
+    @abstractmethod
+    async def list_nodes(self, max_age: float) -> List[Dict[str, Any]]:
+        """Nodes that sent a heartbeat within the last ``max_age`` seconds."""
+
+    @abstractmethod
+    async def prune(self, older_than: float, node_timeout: float):
+        """Cleans up after finished sessions and dead nodes.
+
+        Running sessions of nodes without a heartbeat for ``node_timeout``
+        seconds are marked ``lost``. Sessions that are not running and nodes
+        last updated more than ``older_than`` seconds ago are forgotten.
+        """
+
+
+class InMemorySessionRegistry(SessionRegistry):
+    def __init__(self):
+        self._sessions: Dict[tuple, Dict[str, Any]] = {}
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+
+    async def put_session(self, node_id: str, pid: int, room_url: str, status: str):
+        self._sessions[(node_id, pid)] = {
+            "node_id": node_id,
+            "pid": pid,
+            "room_url": room_url,
+            "status": status,
+            "updated_at": time.time(),
+        }
+
+    async def set_session_status(self, node_id: str, pid: int, status: str):
+        session = self._sessions.get((node_id, pid))
+        if session is not None:
+            session.update(status=status, updated_at=time.time())
+
+    async def find_sessions(self, pid: int, node_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        sessions = [
+            dict(s)
+            for (node, session_pid), s in self._sessions.items()
+            if session_pid == pid and (node_id is None or node == node_id)
+        ]
+        return sorted(sessions, key=lambda s: s["updated_at"], reverse=True)
+
+    async def put_node(self, node: Dict[str, Any]):
+        self._nodes[node["node_id"]] = {**node, "updated_at": time.time()}
+
+    async def list_nodes(self, max_age: float) -> List[Dict[str, Any]]:
+        cutoff = time.time() - max_age
+        return [dict(n) for n in self._nodes.values() if n["updated_at"] >= cutoff]
+
+    async def prune(self, older_than: float, node_timeout: float):
+        now = time.time()
+        alive = {node_id for node_id, n in self._nodes.items() if n["updated_at"] >= now - node_timeout}
+        for key, session in list(self._sessions.items()):
+            if session["status"] == "running" and session["node_id"] not in alive:
+                session.update(status=LOST, updated_at=now)
+            elif session["status"] != "running" and session["updated_at"] < now - older_than:
+                del self._sessions[key]
+        for node_id, node in list(self._nodes.items()):
+            if node["updated_at"] < now - older_than:
+                del self._nodes[node_id]
+
+
+class SQLiteSessionRegistry(SessionRegistry):
+    """Registry stored in a SQLite database file, safe to share between processes."""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._execute("PRAGMA journal_mode=WAL")
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " node_id TEXT NOT NULL, pid INTEGER NOT NULL, room_url TEXT, status TEXT,"
+            " updated_at REAL, PRIMARY KEY (node_id, pid))"
+        )
+        self._execute("CREATE INDEX IF NOT EXISTS sessions_pid ON sessions (pid)")
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS nodes ("
+            " node_id TEXT PRIMARY KEY, url TEXT, active INTEGER, max_bots INTEGER,"
+            " load_per_cpu REAL, updated_at REAL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self._path, timeout=5.0, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return db
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        db = self._connect()
+        try:
+            return [dict(row) for row in db.execute(sql, params).fetchall()]
+        finally:
+            db.close()
+
+    async def _run(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._execute, sql, params)
+
+    async def put_session(self, node_id: str, pid: int, room_url: str, status: str):
+        await self._run(
+            "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)",
+            (node_id, pid, room_url, status, time.time()),
+        )
+
+    async def set_session_status(self, node_id: str, pid: int, status: str):
+        await self._run(
+            "UPDATE sessions SET status = ?, updated_at = ? WHERE node_id = ? AND pid = ?",
+            (status, time.time(), node_id, pid),
+        )
+
+    async def find_sessions(self, pid: int, node_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        if node_id is None:
+            return await self._run(
+                "SELECT * FROM sessions WHERE pid = ? ORDER BY updated_at DESC", (pid,)
+            )
+        return await self._run(
+            "SELECT * FROM sessions WHERE pid = ? AND node_id = ? ORDER BY updated_at DESC",
+            (pid, node_id),
+        )
+
+    async def put_node(self, node: Dict[str, Any]):
+        await self._run(
+            "INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                node["node_id"],
+                node.get("url"),
+                node["active"],
+                node["max_bots"],
+                node.get("load_per_cpu"),
+                time.time(),
+            ),
+        )
+
+    async def list_nodes(self, max_age: float) -> List[Dict[str, Any]]:
+        return await self._run(
+            "SELECT * FROM nodes WHERE updated_at >= ?", (time.time() - max_age,)
+        )
+
+    async def prune(self, older_than: float, node_timeout: float):
+        now = time.time()
+        await self._run(
+            "UPDATE sessions SET status = ?, updated_at = ? WHERE status = 'running'"
+            " AND node_id NOT IN (SELECT node_id FROM nodes WHERE updated_at >= ?)",
+            (LOST, now, now - node_timeout),
+        )
+        await self._run(
+            "DELETE FROM sessions WHERE status != 'running' AND updated_at < ?", (now - older_than,)
+        )
+        await self._run("DELETE FROM nodes WHERE updated_at < ?", (now - older_than,))
+
+
+def create_registry(spec: Optional[str] = None) -> SessionRegistry:
+    """Creates the registry described by ``spec`` or the ``SESSION_REGISTRY`` variable."""
+    spec = spec or os.getenv("SESSION_REGISTRY", "memory")
+    if spec == "memory":
+        return InMemorySessionRegistry()
+    if spec.startswith("sqlite:///"):
+        return SQLiteSessionRegistry(spec[len("sqlite:///"):])
+    raise ValueError(f"Invalid SESSION_REGISTRY: {spec}. Must be 'memory' or 'sqlite:///<path>'")
@@ -1,18 +1,22 @@
+import asyncio
 import os
+import aiohttp
+from loguru import logger
 from dotenv import load_dotenv
-from pipecat.services.cartesia import CartesiaTTSService
+from pipecat.services.cartesia.tts import CartesiaTTSService
 from pipecat.services.openai.llm import OpenAILLMService
 from mongo_loader import DataEnricher
 from pipecat.transports.services.daily import DailyTransport, DailyParams
 from pipecat.audio.vad.silero import SileroVADAnalyzer
 from runner import configure
+from response_cache import AvailabilityResponder
+from speech_chunker import SpeechChunkAggregator
+from tts_cache import TTSAudioCache, cartesia_synthesizer, load_phrases, warm_up
 
 load_dotenv(override=True)
 
-async def setup_services(session):
-    room_url, token = await configure(session)
-
-    transport = DailyTransport(
+def create_transport(room_url, token, vad_analyzer=None):
+    return DailyTransport(
         room_url, token, "Chatbot",
         DailyParams(
             audio_in_enabled=True,
@@ -20,19 +24,65 @@ async def setup_services(session):
             video_out_enabled=True,
             video_out_width=1024,
             video_out_height=576,
-            vad_analyzer=SileroVADAnalyzer(),
+            vad_analyzer=vad_analyzer or SileroVADAnalyzer(),
             transcription_enabled=True,
         )
     )
 
+async def warm_up_tts_cache(enricher):
+    """Pre-renders the fixed utterances missing from the shared TTS cache."""
+    api_key = os.getenv("CARTESIA_API_KEY")
+    voice_id = os.getenv("CARTESIA_VOICE_ID")
+    if not api_key or not voice_id or os.getenv("TTS_CACHE_WARMUP", "true").lower() != "true":
+        return
+    try:
+        index = await enricher.get_availability_index()
+        phrases = load_phrases() + AvailabilityResponder(enricher).fixed_answers(index)
+        async with aiohttp.ClientSession() as session:
+            await warm_up(TTSAudioCache(), cartesia_synthesizer(session, api_key, voice_id), phrases, voice_id)
+    except Exception as e:
+        logger.warning(f"TTS cache warm-up failed: {e}")
+
+async def preload_services(prepare_data=True):
+    """Builds everything that does not depend on the Daily room.
+
+    Pre-started bot workers call this before they are assigned a room, so the
+    VAD model, service clients and database connection are ready up front.
+    A cold bot passes ``prepare_data=False`` and leaves the database indexes
+    and the TTS cache warm-up until the call is under way.
+    """
+    vad_analyzer = SileroVADAnalyzer()
+
+    enricher = DataEnricher()
+    await enricher.connect_to_db()
+
     tts = CartesiaTTSService(
         api_key=os.getenv("CARTESIA_API_KEY"),
-        voice_id=os.getenv("CARTESIA_VOICE_ID")
+        voice_id=os.getenv("CARTESIA_VOICE_ID"),
+        text_aggregator=SpeechChunkAggregator(enricher),
     )
 
     llm = OpenAILLMService(api_key=os.getenv("OPENAI_API_KEY"))
 
-    enricher = DataEnricher()
-    await enricher.connect_to_db()
+    if prepare_data:
+        await enricher.ensure_indexes()
+        await warm_up_tts_cache(enricher)
+
+    return vad_analyzer, tts, llm, enricher
+
+async def setup_services(session, room_url=None, token=None, preloaded=None):
+    if preloaded:
+        vad_analyzer, tts, llm, enricher = preloaded
+        if not room_url:
+            room_url, token = await configure(session)
+    elif room_url:
+        vad_analyzer, tts, llm, enricher = await preload_services(prepare_data=False)
+    else:
+        # Create the room while the services load
+        (vad_analyzer, tts, llm, enricher), (room_url, token) = await asyncio.gather(
+            preload_services(prepare_data=False), configure(session)
+        )
+
+    transport = create_transport(room_url, token, vad_analyzer)
 
     return transport, tts, llm, enricher
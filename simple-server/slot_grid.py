@@ -0,0 +1,177 @@
+"""Vectorised slot grid for availability over a range of dates.
+
+Operating hours and bookings are turned into integer minute-offset arrays, and
+the slot states of every department on every date of the range are computed
+in one NumPy pass, so looking several weeks ahead costs no more Python work
+than looking at one day. States use the ``availability`` constants
+(``CLOSED``, ``FREE``, ``BOOKED``).
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from availability import ACTIVE_STATUSES, BOOKED, FREE, SLOT_MINUTES, parse_hhmm, weekday_index
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def operating_hours_array(departments: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """Operating hours as rows of ``(department position, weekday, start minute, end minute)``."""
+    rows = [
+        (position, weekday_index(oh["day_of_week"]), parse_hhmm(oh["start_time"]), parse_hhmm(oh["end_time"]))
+        for position, department in enumerate(departments)
+        for oh in department.get("operating_hours") or []
+    ]
+    return np.array(rows, dtype=np.int64).reshape(-1, 4)
+
+
+def bookings_array(
+    bookings: Iterable[Dict[str, Any]], positions: Dict[Any, int], start_date: date
+) -> np.ndarray:
+    """Active bookings as rows of ``(department position, minutes since start_date)``."""
+    start = datetime.combine(start_date, datetime.min.time())
+    rows = []
+    for booking in bookings:
+        position = positions.get(booking.get("department_id"))
+        booking_time = booking.get("booking_time")
+        if position is None or booking.get("status") not in ACTIVE_STATUSES or not isinstance(booking_time, datetime):
+            continue
+        rows.append((position, (booking_time - start) // timedelta(minutes=1)))
+    return np.array(rows, dtype=np.int64).reshape(-1, 2)
+
+
+class SlotGrid:
+    """Slot states of a set of departments over consecutive dates.
+
+    Args:
+        department_ids: Department of each row of ``states``.
+        start_date: Date of the first column of ``states``.
+        states: ``uint8`` array of shape (departments, days, slots per day).
+        slot_minutes: Length of a slot.
+    """
+
+    def __init__(self, department_ids: List[Any], start_date: date, states: np.ndarray, slot_minutes: int = SLOT_MINUTES):
+        self.department_ids = department_ids
+        self.start_date = start_date
+        self.states = states
+        self.slot_minutes = slot_minutes
+        self._positions = {department_id: i for i, department_id in enumerate(department_ids)}
+
+    @classmethod
+    def build(
+        cls,
+        department_ids: List[Any],
+        hours: np.ndarray,
+        bookings: np.ndarray,
+        start_date: date,
+        days: int,
+        slot_minutes: int = SLOT_MINUTES,
+    ) -> "SlotGrid":
+        """Computes the grid from the arrays of ``operating_hours_array`` and ``bookings_array``."""
+        if MINUTES_PER_DAY % slot_minutes:
+            raise ValueError(f"Slot length must divide a day: {slot_minutes} minutes")
+        slots_per_day = MINUTES_PER_DAY // slot_minutes
+        slots = np.arange(slots_per_day)
+
+        # Open slots per department and weekday; a slot partly inside the hours is open
+        weekly = np.zeros((len(department_ids), 7, slots_per_day), dtype=bool)
+        if len(hours):
+            first = hours[:, 2] // slot_minutes
+            last = -(-hours[:, 3] // slot_minutes)
+            opened = (slots >= first[:, None]) & (slots < last[:, None])
+            np.logical_or.at(weekly, (hours[:, 0], hours[:, 1]), opened)
+
+        weekdays = (start_date.weekday() + np.arange(days)) % 7
+        states = weekly[:, weekdays, :].astype(np.uint8) * FREE
+
+        if len(bookings):
+            day = bookings[:, 1] // MINUTES_PER_DAY
+            slot = bookings[:, 1] % MINUTES_PER_DAY // slot_minutes
+            inside = (bookings[:, 1] >= 0) & (day < days)
+            position, day, slot = bookings[inside, 0], day[inside], slot[inside]
+            # Bookings outside the opening hours do not open the slot
+            held = states[position, day, slot] == FREE
+            states[position[held], day[held], slot[held]] = BOOKED
+
+        return cls(department_ids, start_date, states, slot_minutes)
+
+    @classmethod
+    def from_documents(
+        cls,
+        departments: Sequence[Dict[str, Any]],
+        bookings: Iterable[Dict[str, Any]],
+        start_date: date,
+        days: int,
+        slot_minutes: int = SLOT_MINUTES,
+    ) -> "SlotGrid":
+        """Computes the grid from ``departments`` and ``bookings`` documents."""
+        department_ids = [department["_id"] for department in departments]
+        positions = {department_id: i for i, department_id in enumerate(department_ids)}
+        return cls.build(
+            department_ids,
+            operating_hours_array(departments),
+            bookings_array(bookings, positions, start_date),
+            start_date,
+            days,
+            slot_minutes,
+        )
+
+    @classmethod
+    def from_index(cls, index) -> "SlotGrid":
+        """Computes the grid of an ``AvailabilityIndex`` over its horizon."""
+        department_ids = index.department_ids()
+        positions = {department_id: i for i, department_id in enumerate(department_ids)}
+        hours = np.array(
+            [(positions[d], weekday, start, end) for d, weekday, start, end in index.operating_hours()],
+            dtype=np.int64,
+        ).reshape(-1, 4)
+        bookings = np.array(
+            [(positions[d], offset) for d, offset in index.booking_offsets() if d in positions],
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        return cls.build(department_ids, hours, bookings, index.start_date, index.horizon_days, index.slot_minutes)
+
+    @property
+    def days(self) -> int:
+        return self.states.shape[1]
+
+    def dates(self) -> List[date]:
+        return [self.start_date + timedelta(days=i) for i in range(self.days)]
+
+    def label(self, slot: int) -> str:
+        minutes = slot * self.slot_minutes
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+    def free_counts(self) -> np.ndarray:
+        """Number of free slots per department and date, shape (departments, days)."""
+        return np.count_nonzero(self.states == FREE, axis=2)
+
+    def free_days(self, department_id) -> List[Tuple[date, int]]:
+        """Dates on which a department has free slots, with the number of free slots."""
+        position = self._positions.get(department_id)
+        if position is None:
+            return []
+        counts = np.count_nonzero(self.states[position] == FREE, axis=1)
+        return [(self.start_date + timedelta(days=int(i)), int(counts[i])) for i in np.flatnonzero(counts)]
+
+    def free_slots(self, department_id, day: date) -> List[str]:
+        position = self._positions.get(department_id)
+        offset = (day - self.start_date).days
+        if position is None or not 0 <= offset < self.days:
+            return []
+        return [self.label(int(slot)) for slot in np.flatnonzero(self.states[position, offset] == FREE)]
+
+    def next_free(self, department_id, after: datetime) -> Optional[datetime]:
+        """Start of the first free slot of a department starting after ``after`` (to the minute)."""
+        position = self._positions.get(department_id)
+        if position is None:
+            return None
+        start = datetime.combine(self.start_date, datetime.min.time())
+        minutes = (after.replace(second=0, microsecond=0) - start) // timedelta(minutes=1)
+        first = max(minutes // self.slot_minutes + 1, 0)
+        free = np.flatnonzero(self.states[position].ravel()[first:] == FREE)
+        if not len(free):
+            return None
+        return start + timedelta(minutes=int(first + free[0]) * self.slot_minutes)
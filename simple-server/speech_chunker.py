@@ -0,0 +1,230 @@
+"""Splits streamed LLM text into speakable chunks for the TTS.
+
+By default the TTS service waits for a full sentence before synthesising, and
+the bot's answers are long sentences of time ranges. ``SpeechChunker`` cuts
+the stream as soon as a chunk can be spoken on its own:
+
+- at the end of a sentence (``. ! ? … ; :`` followed by a space), except after
+  abbreviations such as ``Dr.`` or ``M.``;
+- at a comma or a dash once the chunk is long enough (shorter for the first
+  chunk of a response, so the first audio starts early);
+- at a space once the chunk is too long, but not after a number, before a
+  number or after a word that needs the next one (``de``, ``à``, ``le`` ...).
+
+It never cuts inside a time (``9 h 30``, ``12:00``), a time range (``de 9 h à
+12 h 30``), a date (``lundi 7 juillet``, ``2025-07-07``) or a department name.
+
+Like the ``SkipTagsAggregator`` it replaces in the Cartesia service, it never
+cuts between ``<spell>`` and ``</spell>`` either: text after an opening tag is
+held back until the tag is closed, so spelled-out content reaches the TTS in
+one piece.
+
+``SpeechChunkAggregator`` plugs the chunker into the TTS service as its text
+aggregator.
+"""
+
+import os
+import re
+from typing import Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from pipecat.utils.text.base_text_aggregator import BaseTextAggregator
+
+from normalization import FRENCH_DAYS, FRENCH_MONTHS
+from response_cache import french_department_name
+
+_TIME = r"\d{1,2}\s?(?:heures?|h)\b(?:\s?\d{2}\b)?|\d{1,2}:\d{2}"
+_TIME_RANGE = rf"(?:(?:de|entre|from|between)\s+)?(?:{_TIME})\s*(?:à|a|et|-|–|to|and)\s*(?:{_TIME})"
+_DATE = (
+    rf"(?:(?:{'|'.join(FRENCH_DAYS)})\s+)?(?:le\s+)?\d{{1,2}}(?:er)?\s+(?:{'|'.join(FRENCH_MONTHS)})(?:\s+\d{{4}})?"
+    r"|\d{1,2}/\d{1,2}(?:/\d{2,4})?|\d{4}-\d{2}-\d{2}"
+)
+PROTECTED_PATTERN = re.compile(rf"\b(?:{_TIME_RANGE}|{_DATE}|{_TIME})", re.IGNORECASE)
+
+# Tags whose content is sent to the TTS in one piece
+SKIP_TAGS: Tuple[Tuple[str, str], ...] = (("<spell>", "</spell>"),)
+
+# Punctuation ending a sentence or a clause, with closing quotes, then spaces
+_BOUNDARY = re.compile(r"(?:[.!?…;:,]+|\s[-–—])[»\")\]]*\s+")
+_SENTENCE_END = set(".!?…;:")
+_ABBREVIATION = re.compile(
+    r"(?:^|\s)(?:mme|mlle|mm|dr|pr|me|st|ste|etc|ex|cf|env|av|bd|tél|tel|no|n°)\.$", re.IGNORECASE
+)
+# Initials and ``M.``; a lowercase letter may be a unit, as in ``9 h.``
+_INITIAL = re.compile(r"(?:^|\s)[A-Z]\.$")
+
+# Words that need the next word to be spoken naturally
+GLUE_WORDS = {
+    "à", "a", "au", "aux", "avec", "ce", "cette", "d'", "dans", "de", "des", "du", "en", "entre", "et",
+    "l'", "la", "le", "les", "ma", "mon", "ou", "par", "pour", "sur", "un", "une", "vos", "votre",
+    "an", "and", "at", "between", "from", "of", "on", "or", "the", "to",
+}
+
+
+def _tag_spans(text: str, tags: Iterable[Tuple[str, str]]) -> List[Tuple[int, int]]:
+    spans = []
+    for start_tag, end_tag in tags:
+        position = 0
+        while (start := text.find(start_tag, position)) != -1:
+            end = text.find(end_tag, start + len(start_tag))
+            if end == -1:
+                # Not closed yet: nothing after the tag may be cut
+                spans.append((start, len(text) + 1))
+                break
+            position = end + len(end_tag)
+            spans.append((start, position))
+    return spans
+
+
+def _spans(text: str, terms: Optional[re.Pattern], tags: Iterable[Tuple[str, str]] = ()) -> List[Tuple[int, int]]:
+    spans = [m.span() for m in PROTECTED_PATTERN.finditer(text)]
+    if terms is not None:
+        spans.extend(m.span() for m in terms.finditer(text))
+    spans.extend(_tag_spans(text, tags))
+    return spans
+
+
+def _inside(spans: List[Tuple[int, int]], position: int) -> bool:
+    return any(start < position < end for start, end in spans)
+
+
+class SpeechChunker:
+    """Buffers streamed text and returns the chunks ready to be spoken.
+
+    Args:
+        first_min_chars: Shortest first chunk of a response cut at a comma
+            (``TTS_CHUNK_FIRST_MIN_CHARS``, default 12).
+        min_chars: Shortest later chunk cut at a comma (``TTS_CHUNK_MIN_CHARS``, default 40).
+        max_chars: Length above which a chunk is cut at a space (``TTS_CHUNK_MAX_CHARS``, default 160).
+        split_on_commas: Whether to cut at commas and dashes at all (``TTS_CHUNK_SPLIT_ON_COMMAS``,
+            default true).
+        protected_terms: Phrases never cut, such as department names.
+        skip_tags: Start and end tags whose content is never cut, ``<spell>`` by default.
+    """
+
+    def __init__(
+        self,
+        first_min_chars: Optional[int] = None,
+        min_chars: Optional[int] = None,
+        max_chars: Optional[int] = None,
+        split_on_commas: Optional[bool] = None,
+        protected_terms: Iterable[str] = (),
+        skip_tags: Iterable[Tuple[str, str]] = SKIP_TAGS,
+    ):
+        self.first_min_chars = first_min_chars or int(os.getenv("TTS_CHUNK_FIRST_MIN_CHARS", "12"))
+        self.min_chars = min_chars or int(os.getenv("TTS_CHUNK_MIN_CHARS", "40"))
+        self.max_chars = max_chars or int(os.getenv("TTS_CHUNK_MAX_CHARS", "160"))
+        if split_on_commas is None:
+            split_on_commas = os.getenv("TTS_CHUNK_SPLIT_ON_COMMAS", "true").lower() == "true"
+        self.split_on_commas = split_on_commas
+        self.skip_tags = list(skip_tags)
+        self._terms: Optional[re.Pattern] = None
+        self.set_protected_terms(protected_terms)
+        self.buffer = ""
+        self._first = True
+
+    def set_protected_terms(self, terms: Iterable[str]):
+        terms = sorted({t.strip() for t in terms if t and t.strip()}, key=len, reverse=True)
+        self._terms = re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE) if terms else None
+
+    def feed(self, text: str) -> List[str]:
+        """Adds streamed text and returns the chunks that can be spoken now."""
+        self.buffer += text
+        chunks = []
+        while True:
+            cut = self._next_cut()
+            if not cut:
+                return chunks
+            chunks.append(self.buffer[:cut])
+            self.buffer = self.buffer[cut:]
+            self._first = False
+
+    def flush(self) -> str:
+        """Returns the rest of the response and starts a new one."""
+        text = self.buffer
+        self.reset()
+        return text
+
+    def reset(self):
+        self.buffer = ""
+        self._first = True
+
+    def _next_cut(self) -> int:
+        text = self.buffer
+        spans = _spans(text, self._terms, self.skip_tags)
+        min_chars = self.first_min_chars if self._first else self.min_chars
+        for match in _BOUNDARY.finditer(text):
+            if _inside(spans, match.start()) or len(text[: match.end()].strip()) < 2:
+                continue
+            punctuation = match.group().strip()
+            if punctuation[:1] in _SENTENCE_END:
+                head = text[: match.start() + 1]
+                if punctuation[0] == "." and (_ABBREVIATION.search(head) or _INITIAL.search(head)):
+                    continue
+                return match.end()
+            if self.split_on_commas and len(text[: match.end()].strip()) >= min_chars:
+                return match.end()
+        if len(text) > self.max_chars:
+            return self._space_cut(text, spans)
+        return 0
+
+    def _space_cut(self, text: str, spans: List[Tuple[int, int]]) -> int:
+        """Cuts after the last space before ``max_chars`` that keeps related words together."""
+        spaces = [m for m in re.finditer(r"\s+", text) if 0 < m.start() and m.end() < len(text)]
+        for space in reversed(spaces):
+            if space.start() > self.max_chars or _inside(spans, space.start()):
+                continue
+            before = text[: space.start()].split()[-1].casefold()
+            after = text[space.end():].split()[0].casefold()
+            if before in GLUE_WORDS or before.endswith("'") or before[-1].isdigit() or after[0].isdigit():
+                continue
+            return space.end()
+        # Nowhere natural to cut: don't hold the audio back indefinitely
+        spaces = [space for space in spaces if not _inside(spans, space.start())]
+        if len(text) > 2 * self.max_chars and spaces:
+            return spaces[-1].end()
+        return 0
+
+
+class SpeechChunkAggregator(BaseTextAggregator):
+    """TTS text aggregator cutting LLM text with a ``SpeechChunker``.
+
+    Department names of the enricher's availability index are protected.
+
+    Args:
+        enricher: Optional ``DataEnricher`` owning the availability index.
+        chunker: Chunker to use, built from the environment by default.
+    """
+
+    def __init__(self, enricher=None, chunker: Optional[SpeechChunker] = None):
+        self._enricher = enricher
+        self._chunker = chunker or SpeechChunker()
+        self._terms_version = None
+
+    @property
+    def text(self) -> str:
+        return self._chunker.buffer
+
+    async def aggregate(self, text: str) -> Optional[str]:
+        await self._refresh_terms()
+        return "".join(self._chunker.feed(text)) or None
+
+    async def handle_interruption(self):
+        self._chunker.reset()
+
+    async def reset(self):
+        self._chunker.reset()
+
+    async def _refresh_terms(self):
+        if self._enricher is None or self._enricher.connection is None:
+            return
+        try:
+            index = await self._enricher.get_availability_index()
+        except Exception as e:
+            logger.warning(f"Department names unavailable to the speech chunker: {e}")
+            return
+        if self._terms_version != (id(index), index.version):
+            names = [index.department_name(d) for d in index.department_ids()]
+            self._chunker.set_protected_terms(names + [french_department_name(n) for n in names])
+            self._terms_version = (id(index), index.version)
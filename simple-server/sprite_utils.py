@@ -1,14 +1,101 @@
+import json
+import mmap
 import os
-from PIL import Image
+import struct
+from typing import List, Tuple
 from pipecat.frames.frames import OutputImageRawFrame, SpriteFrame
 
-def load_robot_sprites(asset_dir: str):
-    sprites = []
-    for i in range(1, 26):
-        path = os.path.join(asset_dir, f"robot0{i}.png")
+SPRITE_COUNT = 25
+
+# Raw-frame cache layout: magic, header length, JSON header, then the raw
+# frames starting at a page boundary.
+CACHE_MAGIC = b"SPRITES1"
+CACHE_FILENAME = ".sprites.cache"
+
+# Keeps the read-only mappings alive for the lifetime of the process
+_mappings = {}
+
+def _sprite_paths(asset_dir: str) -> List[str]:
+    return [os.path.join(asset_dir, f"robot0{i}.png") for i in range(1, SPRITE_COUNT + 1)]
+
+def _fingerprint(paths: List[str]):
+    return [[os.path.basename(p), os.stat(p).st_size, os.stat(p).st_mtime_ns] for p in paths]
+
+def build_sprite_cache(asset_dir: str, cache_path: str):
+    """Decodes the sprite PNGs once and writes their raw pixels to ``cache_path``."""
+    # Only needed when the cache is (re)built, so kept off the bot's import path
+    from PIL import Image
+
+    paths = _sprite_paths(asset_dir)
+    frames = []
+    offset = 0
+    pixels = []
+    for path in paths:
         with Image.open(path) as img:
-            sprites.append(OutputImageRawFrame(image=img.tobytes(), size=img.size, format=img.format))
-    return sprites + sprites[::-1] 
+            data = img.tobytes()
+            frames.append({"offset": offset, "length": len(data), "size": list(img.size), "format": img.format})
+            pixels.append(data)
+            offset += len(data)
+    header = json.dumps({"sources": _fingerprint(paths), "frames": frames}).encode()
+    data_start = -(-(len(CACHE_MAGIC) + 4 + len(header)) // mmap.PAGESIZE) * mmap.PAGESIZE
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(CACHE_MAGIC + struct.pack("<I", len(header)) + header)
+        f.write(b"\0" * (data_start - f.tell()))
+        for data in pixels:
+            f.write(data)
+    # Atomic, so concurrent bot processes never map a half-written cache
+    os.replace(tmp_path, cache_path)
+
+def _read_header(mapping: mmap.mmap):
+    if mapping[:len(CACHE_MAGIC)] != CACHE_MAGIC:
+        return None, 0
+    (header_len,) = struct.unpack_from("<I", mapping, len(CACHE_MAGIC))
+    header_end = len(CACHE_MAGIC) + 4 + header_len
+    header = json.loads(bytes(mapping[len(CACHE_MAGIC) + 4:header_end]))
+    data_start = -(-header_end // mmap.PAGESIZE) * mmap.PAGESIZE
+    return header, data_start
+
+def load_sprite_views(asset_dir: str) -> List[Tuple[memoryview, Tuple[int, int], str]]:
+    """Maps the raw-frame cache read-only and returns a zero-copy view per sprite.
+
+    The cache is (re)built when missing or when the source PNGs changed. Every
+    bot process maps the same file, so the pixels live once in the page cache.
+    """
+    cache_path = os.getenv("SPRITE_CACHE_PATH") or os.path.join(asset_dir, CACHE_FILENAME)
+    if cache_path not in _mappings:
+        fingerprint = _fingerprint(_sprite_paths(asset_dir))
+        for attempt in range(2):
+            if not os.path.exists(cache_path):
+                build_sprite_cache(asset_dir, cache_path)
+            with open(cache_path, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            header, data_start = _read_header(mapping)
+            if header and header["sources"] == fingerprint:
+                _mappings[cache_path] = (mapping, header, data_start)
+                break
+            mapping.close()
+            try:
+                os.remove(cache_path)
+            except FileNotFoundError:
+                pass
+        else:
+            raise RuntimeError(f"Could not build a valid sprite cache at {cache_path}")
+    mapping, header, data_start = _mappings[cache_path]
+    view = memoryview(mapping)
+    return [
+        (view[data_start + f["offset"]:data_start + f["offset"] + f["length"]], tuple(f["size"]), f["format"])
+        for f in header["frames"]
+    ]
+
+def load_robot_sprites(asset_dir: str):
+    # daily-python's camera only accepts bytes, so each sprite is copied out of
+    # the mapping once; the ping-pong sequence reuses the same frame objects.
+    sprites = [
+        OutputImageRawFrame(image=bytes(view), size=size, format=fmt)
+        for view, size, fmt in load_sprite_views(asset_dir)
+    ]
+    return sprites + sprites[::-1]
 def get_static_and_talking_frames(asset_dir: str):
     sprites = load_robot_sprites(asset_dir)
     return sprites[0], SpriteFrame(images=sprites)
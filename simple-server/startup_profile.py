@@ -0,0 +1,63 @@
+"""Start-up timeline of the bot process.
+
+Enabled with ``BOT_PROFILE_STARTUP=true`` or ``--profile-startup``. Each
+import group and initialisation step is recorded with its start offset and
+duration, and the timeline is printed to stderr once the bot has joined the
+room, e.g.::
+
+       0.0 ms    2411.8 ms  import pipecat
+    2411.9 ms     182.3 ms  import bot modules
+    2594.6 ms     201.5 ms  preload services
+    ...
+
+Offsets are measured from the import of this module, which ``bot-openai.py``
+does first. For a per-module breakdown of the imports, run the bot with
+``python -X importtime``.
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+
+class StartupProfile:
+    """Records named start-up steps when ``enabled``."""
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self._steps: List[Tuple[str, float, float]] = []
+        self._reported = False
+
+    @contextmanager
+    def step(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self._steps.append((name, start - self.started, time.perf_counter() - start))
+
+    def mark(self, name: str):
+        """Records an instant, such as joining the room."""
+        if self.enabled:
+            self._steps.append((name, time.perf_counter() - self.started, 0.0))
+
+    def timeline(self) -> str:
+        return "\n".join(
+            f"{offset * 1000:10.1f} ms {duration * 1000:9.1f} ms  {name}"
+            for name, offset, duration in sorted(self._steps, key=lambda step: step[1])
+        )
+
+    def report(self):
+        """Prints the timeline to stderr, once."""
+        if self.enabled and not self._reported:
+            self._reported = True
+            print(f"Bot start-up timeline (pid {os.getpid()}):\n{self.timeline()}", file=sys.stderr, flush=True)
+
+
+profile = StartupProfile(
+    os.getenv("BOT_PROFILE_STARTUP", "false").lower() == "true" or "--profile-startup" in sys.argv
+)
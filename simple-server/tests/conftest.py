@@ -0,0 +1,16 @@
+import asyncio
+import inspect
+import os
+import sys
+
+# The server modules are flat files next to this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_pyfunc_call(pyfuncitem):
+    """Runs ``async def`` tests in a fresh event loop."""
+    if inspect.iscoroutinefunction(pyfuncitem.obj):
+        arguments = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+        asyncio.run(pyfuncitem.obj(**arguments))
+        return True
+    return None
@@ -0,0 +1,46 @@
+from datetime import date, datetime, time, timedelta
+
+import availability_tools
+from availability import DAYS, AvailabilityIndex
+from availability_tools import AvailabilityTools
+from prompt_builder import free_ranges
+
+TODAY = date.today()
+
+
+def build_index():
+    department = {
+        "_id": 1,
+        "name": "Cardiology",
+        "operating_hours": [{"day_of_week": day, "start_time": "09:00", "end_time": "17:00"} for day in DAYS],
+    }
+    return AvailabilityIndex.build([department], [], TODAY, 7)
+
+
+def frozen_now(monkeypatch, at):
+    class FrozenDateTime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return at
+
+    monkeypatch.setattr(availability_tools, "datetime", FrozenDateTime)
+
+
+def test_free_ranges_leave_out_the_slots_already_started():
+    index = build_index()
+
+    assert free_ranges(index, 1, TODAY, datetime.combine(TODAY, time(12, 10))) == [("12:30", "17:00")]
+    assert free_ranges(index, 1, TODAY, datetime.combine(TODAY, time(12, 30))) == [("12:30", "17:00")]
+    assert free_ranges(index, 1, TODAY, datetime.combine(TODAY, time(16, 45))) == []
+    tomorrow = TODAY + timedelta(days=1)
+    assert free_ranges(index, 1, tomorrow, datetime.combine(TODAY, time(12, 10))) == [("09:00", "17:00")]
+
+
+def test_times_for_today_only_offer_slots_still_ahead(monkeypatch):
+    frozen_now(monkeypatch, datetime.combine(TODAY, time(12, 10)))
+    tools = AvailabilityTools(enricher=None)
+
+    result = tools._times(build_index(), "cardiology", TODAY.isoformat())
+
+    assert result["date"] == TODAY.isoformat()
+    assert result["available"] == ["12:30-17:00"]
@@ -0,0 +1,141 @@
+from datetime import date, datetime, time
+
+from bson import ObjectId, Timestamp
+from pymongo.errors import OperationFailure
+
+from availability import BOOKED, DAYS, FREE, AvailabilityIndex
+from availability_watcher import AvailabilityWatcher
+
+DEPARTMENT_ID = ObjectId()
+TODAY = date.today()
+
+
+def build_index(operation_time=None, bookings=()):
+    department = {
+        "_id": DEPARTMENT_ID,
+        "name": "Cardiology",
+        "operating_hours": [{"day_of_week": day, "start_time": "09:00", "end_time": "17:00"} for day in DAYS],
+    }
+    index = AvailabilityIndex.build([department], bookings, TODAY, 7)
+    index.operation_time = operation_time
+    return index
+
+
+def booking(hour):
+    return {
+        "_id": ObjectId(),
+        "department_id": DEPARTMENT_ID,
+        "booking_time": datetime.combine(TODAY, time(hour)),
+        "status": "booked",
+    }
+
+
+def slot_state(index, hour):
+    return index.slot_states(DEPARTMENT_ID, TODAY)[hour * 60 // index.slot_minutes]
+
+
+def change(operation, document=None, document_id=None, collection="bookings"):
+    event = {"_id": {"_data": str(ObjectId())}, "operationType": operation, "ns": {"coll": collection}}
+    if document is not None:
+        event["fullDocument"] = document
+        document_id = document["_id"]
+    if document_id is not None:
+        event["documentKey"] = {"_id": document_id}
+    return event
+
+
+class FakeEnricher:
+    def __init__(self, index):
+        self.index = index
+        self.rebuilds = 0
+
+    async def get_availability_index(self, refresh=False):
+        if refresh:
+            self.rebuilds += 1
+            self.index = build_index(Timestamp(100 + self.rebuilds, 1))
+        return self.index
+
+
+def scripted_source(*streams):
+    """Change source yielding one list of events per time the stream is opened.
+
+    An exception in a list is raised instead of yielded.
+    """
+    calls = []
+
+    async def source(resume_token, start_at):
+        calls.append((resume_token, start_at))
+        for event in streams[len(calls) - 1]:
+            if isinstance(event, Exception):
+                raise event
+            yield event
+
+    source.calls = calls
+    return source
+
+
+async def test_insert_is_applied_from_the_index_operation_time():
+    index = build_index(Timestamp(42, 1))
+    new_booking = booking(10)
+    source = scripted_source([change("insert", new_booking)])
+    notified = []
+    watcher = AvailabilityWatcher(FakeEnricher(index), source=source)
+
+    async def listener(updated):
+        notified.append(updated)
+
+    watcher.add_listener(listener)
+    await watcher.run()
+
+    assert slot_state(index, 10) == BOOKED
+    assert notified == [index]
+    assert source.calls == [(None, Timestamp(42, 1))]
+
+
+async def test_delete_frees_the_slot():
+    existing = booking(11)
+    index = build_index(bookings=[existing])
+    assert slot_state(index, 11) == BOOKED
+    watcher = AvailabilityWatcher(FakeEnricher(index), source=scripted_source([change("delete", document_id=existing["_id"])]))
+
+    await watcher.run()
+
+    assert slot_state(index, 11) == FREE
+
+
+async def test_invalidate_rebuilds_the_index_and_reopens_from_its_operation_time():
+    enricher = FakeEnricher(build_index(Timestamp(1, 1)))
+    later = booking(14)
+    source = scripted_source(
+        [change("insert", booking(9)), {"_id": {"_data": "invalidated"}, "operationType": "invalidate"}],
+        [change("insert", later)],
+    )
+    watcher = AvailabilityWatcher(enricher, source=source)
+
+    await watcher.run()
+
+    assert enricher.rebuilds == 1
+    # The stream is reopened without a resume token, from the rebuilt index's time
+    assert source.calls[1] == (None, Timestamp(101, 1))
+    assert slot_state(enricher.index, 14) == BOOKED
+    assert slot_state(enricher.index, 9) == FREE
+
+
+async def test_history_lost_rebuilds_the_index_and_reopens_from_its_operation_time():
+    enricher = FakeEnricher(build_index(Timestamp(1, 1)))
+    history_lost = OperationFailure("Resume of change stream was not possible", code=286)
+    source = scripted_source([change("insert", booking(9)), history_lost], [change("insert", booking(14))])
+    notified = []
+    watcher = AvailabilityWatcher(enricher, source=source, retry_delay=0)
+
+    async def listener(updated):
+        notified.append(updated)
+
+    watcher.add_listener(listener)
+    await watcher.run()
+
+    assert enricher.rebuilds == 1
+    # The resume token is dropped rather than retried, and the stream reopens from the rebuilt index's time
+    assert source.calls == [(None, Timestamp(1, 1)), (None, Timestamp(101, 1))]
+    assert len(notified) == 3 and notified[1:] == [enricher.index, enricher.index]
+    assert slot_state(enricher.index, 14) == BOOKED
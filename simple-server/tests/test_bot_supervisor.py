@@ -0,0 +1,23 @@
+import pytest
+
+from bot_supervisor import AdmissionError, BotSupervisor
+
+
+def test_explicit_zero_limits_are_not_replaced_by_the_defaults(monkeypatch):
+    monkeypatch.setenv("MAX_BOTS", "20")
+    supervisor = BotSupervisor(max_bots=0, max_load_per_cpu=0.0, min_available_memory_mb=0.0, retry_after=0)
+
+    assert (supervisor.max_bots, supervisor.max_load_per_cpu, supervisor.min_available_memory_mb) == (0, 0.0, 0.0)
+    with pytest.raises(AdmissionError) as refused:
+        supervisor.admit()
+    assert refused.value.retry_after == 0
+    assert supervisor.pending == 0
+
+
+def test_limits_default_to_the_environment(monkeypatch):
+    monkeypatch.setenv("MAX_BOTS", "3")
+    monkeypatch.setenv("BOT_RETRY_AFTER_SECS", "5")
+
+    supervisor = BotSupervisor()
+
+    assert (supervisor.max_bots, supervisor.retry_after) == (3, 5)
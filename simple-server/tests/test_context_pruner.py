@@ -0,0 +1,80 @@
+import json
+
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+
+from context_pruner import STALE_TOOL_RESULT, ContextPruner
+from metrics import MetricsRegistry
+
+SYSTEM = {"role": "system", "content": "You are the booking assistant of the hospital."}
+
+
+def tool_turn(n, name, arguments, result):
+    call_id = f"call_{n}"
+    return [
+        {"role": "user", "content": f"Question {n}"},
+        {
+            "role": "assistant",
+            "tool_calls": [
+                {"id": call_id, "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+            ],
+        },
+        {"role": "tool", "tool_call_id": call_id, "content": result},
+        {"role": "assistant", "content": f"Answer {n}"},
+    ]
+
+
+def booking_call():
+    return (
+        tool_turn(1, "get_available_times", {"department": "Cardiology", "day": "2026-11-02"}, '{"available": []}')
+        + tool_turn(2, "confirm_appointment", {"time": "09:30"}, '{"confirmed": "Cardiology 2026-11-02 09:30"}')
+        + tool_turn(3, "get_available_slots", {"department": "Cardiology"}, '{"days": []}')
+        + tool_turn(4, "get_available_times", {"department": "Radiology"}, '{"available": ["10:00-11:00"]}')
+    )
+
+
+def prune(messages, **kwargs):
+    context = OpenAILLMContext(messages)
+    ContextPruner(registry=MetricsRegistry(), **kwargs).prune(context)
+    return context.get_messages()
+
+
+def test_the_system_prompt_stays_first_and_untouched():
+    messages = prune([dict(SYSTEM)] + booking_call(), keep_turns=1, max_tokens=60)
+
+    assert messages[0] == SYSTEM
+    assert [m for m in messages if m.get("content") == SYSTEM["content"]] == [SYSTEM]
+
+
+def test_confirm_appointment_results_are_never_stale():
+    messages = prune([dict(SYSTEM)] + booking_call(), keep_turns=4)
+
+    results = {m["tool_call_id"]: m["content"] for m in messages if m.get("role") == "tool"}
+    assert results["call_1"] == STALE_TOOL_RESULT
+    assert results["call_2"] == '{"confirmed": "Cardiology 2026-11-02 09:30"}'
+    assert results["call_3"] == STALE_TOOL_RESULT
+    # The last turn is the current one, its results are fresh
+    assert results["call_4"] == '{"available": ["10:00-11:00"]}'
+
+
+def test_the_note_keeps_the_booking_details_of_summarised_turns():
+    messages = prune([dict(SYSTEM)] + booking_call(), keep_turns=1)
+
+    note = messages[1]
+    assert note["role"] == "system"
+    assert "department: Radiology, day: 2026-11-02, time: 09:30" in note["content"]
+    assert "Cardiology 2026-11-02 09:30" in note["content"]
+    assert "Caller: Question 1" in note["content"]
+    assert [m.get("content") for m in messages[2:] if m.get("role") == "user"] == ["Question 4"]
+
+
+def test_windowing_keeps_tool_calls_and_their_results_together():
+    for keep_turns in range(1, 5):
+        messages = prune([dict(SYSTEM)] + booking_call(), keep_turns=keep_turns)
+
+        calls = [c["id"] for m in messages for c in m.get("tool_calls") or []]
+        results = [m["tool_call_id"] for m in messages if m.get("role") == "tool"]
+        assert calls == results
+        assert len(calls) == keep_turns
+        for i, message in enumerate(messages):
+            if message.get("role") == "tool":
+                assert messages[i - 1]["tool_calls"][0]["id"] == message["tool_call_id"]
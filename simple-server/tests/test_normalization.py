@@ -0,0 +1,89 @@
+from datetime import date, datetime
+
+import pytest
+
+from normalization import days_in, hhmm, mentions_time, parse_booking_time, parse_day, parse_time
+
+# A Wednesday
+TODAY = date(2026, 10, 14)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("aujourd'hui", date(2026, 10, 14)),
+        ("Aujourd’hui", date(2026, 10, 14)),
+        ("demain", date(2026, 10, 15)),
+        ("après-demain", date(2026, 10, 16)),
+        ("dans 3 jours", date(2026, 10, 17)),
+        ("tomorrow", date(2026, 10, 15)),
+        ("mercredi", date(2026, 10, 14)),
+        ("Wednesday", date(2026, 10, 14)),
+        ("mercredi prochain", date(2026, 10, 21)),
+        ("lundi prochain", date(2026, 10, 19)),
+        ("next monday", date(2026, 10, 19)),
+        ("vendredi de la semaine prochaine", date(2026, 10, 23)),
+        ("la semaine prochaine", date(2026, 10, 19)),
+        ("2026-11-02", date(2026, 11, 2)),
+        ("02/11", date(2026, 11, 2)),
+        ("le 2 novembre", date(2026, 11, 2)),
+        ("1er janvier", date(2027, 1, 1)),
+        ("November 2nd", date(2026, 11, 2)),
+        # A weekday before a date is part of it, and the date wins
+        ("lundi 2 novembre", date(2026, 11, 2)),
+        ("monday 2026-11-02", date(2026, 11, 2)),
+        ("Monday, November 2", date(2026, 11, 2)),
+        ("le mardi 02/11", date(2026, 11, 2)),
+    ],
+)
+def test_parse_day(text, expected):
+    assert parse_day(text, TODAY) == expected
+
+
+def test_days_in_keeps_the_order_of_mention_and_skips_impossible_dates():
+    assert days_in("lundi ou plutôt mardi, pas le 31/02", TODAY) == [date(2026, 10, 19), date(2026, 10, 20)]
+
+
+def test_parse_day_rejects_text_without_a_day():
+    with pytest.raises(ValueError):
+        parse_day("bientôt", TODAY)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("14:30", "14:30"),
+        ("14h30", "14:30"),
+        ("14 h 30", "14:30"),
+        ("14:30:00", "14:30"),
+        ("9", "09:00"),
+        ("2:30 pm", "14:30"),
+        ("2 pm", "14:00"),
+        ("quatorze heures trente", "14:30"),
+        ("neuf heures et demie", "09:30"),
+        ("dix heures et quart", "10:15"),
+        ("quinze heures moins le quart", "14:45"),
+        ("onze heures moins dix", "10:50"),
+        ("midi", "12:00"),
+        ("midi et demi", "12:30"),
+        ("trois heures de l'après-midi", "15:00"),
+        ("vingt et une heures", "21:00"),
+    ],
+)
+def test_parse_time(text, expected):
+    assert hhmm(parse_time(text)) == expected
+
+
+@pytest.mark.parametrize("text", ["plus tard", "25:00", "14h75"])
+def test_parse_time_rejects_invalid_times(text):
+    with pytest.raises(ValueError):
+        parse_time(text)
+
+
+def test_mentions_time():
+    assert mentions_time("plutôt vers quatorze heures")
+    assert not mentions_time("le service de cardiologie lundi")
+
+
+def test_parse_booking_time():
+    assert parse_booking_time("lundi 2 novembre", "neuf heures et demie", TODAY) == datetime(2026, 11, 2, 9, 30)
@@ -0,0 +1,97 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import room_pool
+from room_pool import DailyRoomPool
+
+
+class FakeDailyRESTHelper:
+    def __init__(self):
+        self.created = []
+        self.deleted = []
+
+    async def create_room(self, params):
+        url = f"https://example.daily.co/room-{len(self.created)}"
+        self.created.append(url)
+        return SimpleNamespace(url=url)
+
+    async def get_token(self, room_url, expiry_time):
+        return f"token-for-{room_url}"
+
+    async def delete_room_by_url(self, room_url):
+        self.deleted.append(room_url)
+        return True
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls the wall clock the pool uses for expiry."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(room_pool, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+async def wait_for(condition, timeout=2.0):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def test_acquire_hands_out_a_pooled_room_and_refills(clock):
+    helper = FakeDailyRESTHelper()
+    pool = DailyRoomPool(helper, size=2)
+    await pool.start()
+    await wait_for(lambda: pool.ready_count == 2)
+
+    room_url, token = await pool.acquire()
+
+    assert room_url == helper.created[0]
+    assert token == f"token-for-{room_url}"
+    await wait_for(lambda: pool.ready_count == 2)
+    assert len(helper.created) == 3
+    await pool.stop()
+
+
+async def test_rooms_close_to_expiry_are_deleted_and_never_handed_out(clock):
+    helper = FakeDailyRESTHelper()
+    pool = DailyRoomPool(helper, size=1, ttl=3600, expiry_margin=600, check_interval=3600)
+    await pool.start()
+    await wait_for(lambda: pool.ready_count == 1)
+    stale = helper.created[0]
+
+    clock[0] += 3600 - 600 + 1
+    room_url, _ = await pool.acquire()
+
+    assert room_url != stale
+    await wait_for(lambda: stale in helper.deleted)
+    await pool.stop()
+
+
+async def test_stop_deletes_the_rooms_never_handed_out(clock):
+    helper = FakeDailyRESTHelper()
+    pool = DailyRoomPool(helper, size=2)
+    await pool.start()
+    await wait_for(lambda: pool.ready_count == 2)
+    handed_out, _ = await pool.acquire()
+    await wait_for(lambda: pool.ready_count == 2)
+
+    await pool.stop()
+
+    assert pool.ready_count == 0
+    assert sorted(helper.deleted) == sorted(url for url in helper.created if url != handed_out)
+
+
+async def test_empty_pool_creates_rooms_on_demand(clock):
+    helper = FakeDailyRESTHelper()
+    pool = DailyRoomPool(helper, size=0)
+    await pool.start()
+
+    room_url, _ = await pool.acquire()
+
+    assert helper.created == [room_url]
+    assert pool.ready_count == 0
+    await pool.stop()
@@ -0,0 +1,107 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from availability import DAYS, FREE, AvailabilityIndex
+from slot_grid import SlotGrid
+
+# A Monday
+START = date(2026, 11, 2)
+
+DEPARTMENTS = [
+    {
+        "_id": 1,
+        "name": "Cardiology",
+        "operating_hours": [{"day_of_week": day, "start_time": "09:00", "end_time": "17:00"} for day in DAYS[:5]],
+    },
+    {
+        "_id": 2,
+        "name": "Radiology",
+        "operating_hours": [
+            {"day_of_week": "Tuesday", "start_time": "08:15", "end_time": "10:00"},
+            {"day_of_week": "Tuesday", "start_time": "14:00", "end_time": "15:00"},
+            {"day_of_week": "Saturday", "start_time": "10:00", "end_time": "11:00"},
+        ],
+    },
+]
+BOOKINGS = [
+    {"_id": 10, "department_id": 1, "booking_time": datetime(2026, 11, 2, 9, 0), "status": "booked"},
+    {"_id": 11, "department_id": 1, "booking_time": datetime(2026, 11, 2, 16, 30), "status": "confirmed"},
+    {"_id": 12, "department_id": 1, "booking_time": datetime(2026, 11, 3, 10, 0), "status": "cancelled"},
+    {"_id": 13, "department_id": 2, "booking_time": datetime(2026, 11, 3, 8, 0), "status": "booked"},
+    {"_id": 14, "department_id": 2, "booking_time": datetime(2026, 11, 3, 14, 30), "status": "booked"},
+]
+
+
+@pytest.fixture
+def index():
+    return AvailabilityIndex.build(DEPARTMENTS, BOOKINGS, START, 7)
+
+
+def expected_next_free(index, department_id, after):
+    """First free slot starting after ``after``, walking the index day by day."""
+    for day in index.dates():
+        for slot, state in enumerate(index.slot_states(department_id, day)):
+            start = datetime.combine(day, time()) + timedelta(minutes=slot * index.slot_minutes)
+            if state == FREE and start > after.replace(second=0, microsecond=0):
+                return start
+    return None
+
+
+def test_grid_matches_the_slot_states_of_the_index(index):
+    for grid in (index.grid(), SlotGrid.from_documents(DEPARTMENTS, BOOKINGS, START, 7)):
+        for department_id in (1, 2):
+            for day in index.dates():
+                assert grid.free_slots(department_id, day) == index.free_slots(department_id, day)
+                assert bytes(grid.states[grid.department_ids.index(department_id), (day - START).days]) == bytes(
+                    index.slot_states(department_id, day)
+                )
+
+
+def test_free_slots(index):
+    grid = index.grid()
+
+    assert grid.free_slots(1, START)[:2] == ["09:30", "10:00"]
+    assert "16:30" not in grid.free_slots(1, START)
+    # A cancelled booking leaves the slot free
+    assert "10:00" in grid.free_slots(1, START + timedelta(days=1))
+    # The slot holding the opening at 08:15 is open, and can be booked
+    assert grid.free_slots(2, START + timedelta(days=1)) == ["08:30", "09:00", "09:30", "14:00"]
+    assert grid.free_slots(1, START + timedelta(days=5)) == []
+    assert grid.free_slots(3, START) == []
+    assert grid.free_slots(1, START + timedelta(days=7)) == []
+
+
+@pytest.mark.parametrize(
+    "department_id, after",
+    [
+        (1, datetime(2026, 11, 1, 12, 0)),
+        (1, datetime(2026, 11, 2, 8, 59)),
+        (1, datetime(2026, 11, 2, 9, 0)),
+        # Mid-slot
+        (1, datetime(2026, 11, 2, 9, 10)),
+        (1, datetime(2026, 11, 2, 9, 29, 59)),
+        # Last open slot of a day, and the last slot of a day
+        (1, datetime(2026, 11, 2, 16, 0)),
+        (1, datetime(2026, 11, 3, 16, 30)),
+        (1, datetime(2026, 11, 4, 23, 30)),
+        (1, datetime(2026, 11, 4, 23, 45)),
+        (2, datetime(2026, 11, 2, 10, 0)),
+        (2, datetime(2026, 11, 3, 9, 45)),
+        (2, datetime(2026, 11, 3, 14, 15)),
+        (2, datetime(2026, 11, 7, 10, 30)),
+        (1, datetime(2026, 11, 9, 0, 0)),
+    ],
+)
+def test_next_free_matches_the_slot_states_of_the_index(index, department_id, after):
+    assert index.grid().next_free(department_id, after) == expected_next_free(index, department_id, after)
+
+
+def test_next_free(index):
+    grid = index.grid()
+
+    assert grid.next_free(1, datetime(2026, 11, 2, 9, 10)) == datetime(2026, 11, 2, 9, 30)
+    assert grid.next_free(1, datetime(2026, 11, 2, 16, 0)) == datetime(2026, 11, 3, 9, 0)
+    assert grid.next_free(2, datetime(2026, 11, 3, 9, 45)) == datetime(2026, 11, 3, 14, 0)
+    assert grid.next_free(2, datetime(2026, 11, 7, 10, 30)) is None
+    assert grid.next_free(3, datetime(2026, 11, 2, 9, 0)) is None
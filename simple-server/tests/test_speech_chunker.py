@@ -0,0 +1,68 @@
+import pytest
+
+from speech_chunker import SpeechChunkAggregator, SpeechChunker
+
+PROTECTED = [
+    "de 9 h 30 à 12 h 30",
+    "14:00",
+    "lundi 7 juillet",
+    "2025-07-07",
+    "Médecine Générale",
+    "<spell>A. B, C</spell>",
+]
+TEXT = (
+    "Bonjour, le service de Médecine Générale est ouvert de 9 h 30 à 12 h 30, puis à 14:00, "
+    "le lundi 7 juillet, soit le 2025-07-07. Votre code est <spell>A. B, C</spell>, merci. Au revoir"
+)
+
+
+def chunker():
+    return SpeechChunker(
+        first_min_chars=5, min_chars=10, max_chars=30, split_on_commas=True, protected_terms=["Médecine Générale"]
+    )
+
+
+def stream(chunker, text, size):
+    chunks = []
+    for start in range(0, len(text), size):
+        chunks.extend(chunker.feed(text[start:start + size]))
+    return chunks
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, len(TEXT)])
+def test_protected_spans_are_never_split(size):
+    c = chunker()
+    chunks = stream(c, TEXT, size) + [c.flush()]
+
+    assert "".join(chunks) == TEXT
+    assert len(chunks) > 3
+    for span in PROTECTED:
+        assert any(span in chunk for chunk in chunks), span
+
+
+def test_text_after_an_open_spell_tag_is_held_until_it_closes():
+    c = chunker()
+
+    assert c.feed("Votre code est <spell>A. B. C. D. E. F. G. H. I. J. K. ") == ["Votre code est "]
+    assert c.feed("L</spell>. Merci. ") == ["<spell>A. B. C. D. E. F. G. H. I. J. K. L</spell>. ", "Merci. "]
+
+
+def test_flush_returns_the_rest_of_the_turn_and_starts_a_new_one():
+    c = chunker()
+    assert c.feed("Le service est ouvert. Au revoir") == ["Le service est ouvert. "]
+
+    assert c.flush() == "Au revoir"
+    assert c.buffer == ""
+    # The next response starts with the shorter first chunk again
+    assert c.feed("Bien sûr, merci") == ["Bien sûr, "]
+
+
+async def test_aggregator_keeps_the_rest_of_the_turn_for_the_tts_to_flush():
+    aggregator = SpeechChunkAggregator(chunker=chunker())
+
+    assert await aggregator.aggregate("Le service est ouvert. Au ") == "Le service est ouvert. "
+    assert await aggregator.aggregate("revoir") is None
+    assert aggregator.text == "Au revoir"
+
+    await aggregator.reset()
+    assert aggregator.text == ""
@@ -0,0 +1,137 @@
+import os
+from types import SimpleNamespace
+
+from pipecat.frames.frames import (
+    LLMFullResponseEndFrame,
+    LLMFullResponseStartFrame,
+    LLMMessagesAppendFrame,
+    LLMTextFrame,
+    TextFrame,
+    TTSAudioRawFrame,
+    TTSSpeakFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+)
+from pipecat.tests.utils import run_test
+
+from tts_cache import CachedSpeechProcessor, TTSAudioCache, warm_up
+
+VOICE = "voice-1"
+RATE = 24000
+
+
+class FakeSynthesizer:
+    def __init__(self, failing=()):
+        self.calls = []
+        self.failing = set(failing)
+
+    async def __call__(self, text: str) -> bytes:
+        self.calls.append(text)
+        if text in self.failing:
+            raise RuntimeError("synthesis failed")
+        return text.encode()
+
+
+def test_get_misses_until_put_and_is_keyed_by_voice_and_sample_rate(tmp_path):
+    cache = TTSAudioCache(str(tmp_path), max_bytes=1024)
+    assert cache.get("Bonjour", VOICE, RATE) is None
+
+    cache.put("Bonjour", VOICE, RATE, b"audio")
+
+    assert cache.get("  Bonjour ", VOICE, RATE) == b"audio"
+    assert cache.get("Bonjour", "voice-2", RATE) is None
+    assert cache.get("Bonjour", VOICE, 16000) is None
+    # Entries on disk are found by a new cache, as in another bot process
+    assert TTSAudioCache(str(tmp_path)).get("Bonjour", VOICE, RATE) == b"audio"
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = TTSAudioCache(str(tmp_path), max_bytes=15)
+    cache.put("a", VOICE, RATE, b"x" * 6)
+    cache.put("b", VOICE, RATE, b"x" * 6)
+    cache.get("a", VOICE, RATE)
+
+    cache.put("c", VOICE, RATE, b"x" * 6)
+
+    assert cache.get("b", VOICE, RATE) is None
+    assert cache.get("a", VOICE, RATE) is not None
+    assert cache.size_bytes == 12
+    assert len(os.listdir(tmp_path)) == 2
+
+
+async def test_warm_up_renders_only_missing_phrases(tmp_path):
+    cache = TTSAudioCache(str(tmp_path))
+    cache.put("Bonjour", VOICE, RATE, b"cached")
+    synthesize = FakeSynthesizer(failing={"Au revoir"})
+
+    added = await warm_up(cache, synthesize, ["Bonjour", "Merci", "Merci ", "Au revoir"], VOICE, RATE)
+
+    assert added == 1
+    assert sorted(synthesize.calls) == ["Au revoir", "Merci"]
+    assert cache.get("Merci", VOICE, RATE) == b"Merci"
+    assert cache.get("Au revoir", VOICE, RATE) is None
+
+
+async def test_processor_plays_cache_hits_and_passes_misses_to_the_tts(tmp_path):
+    cache = TTSAudioCache(str(tmp_path))
+    cache.put("Bonjour", VOICE, RATE, b"\0\0" * 240)
+    tts = SimpleNamespace(sample_rate=RATE)
+
+    down, _ = await run_test(
+        CachedSpeechProcessor(cache, tts, VOICE),
+        frames_to_send=[TTSSpeakFrame("Bonjour"), TTSSpeakFrame("Pas en cache")],
+        expected_down_frames=[TTSStartedFrame, TTSAudioRawFrame, TTSStoppedFrame, TTSSpeakFrame],
+    )
+
+    assert down[1].audio == b"\0\0" * 240
+    assert down[3].text == "Pas en cache"
+
+
+async def test_processor_leaves_hits_to_the_tts_while_it_is_speaking(tmp_path):
+    cache = TTSAudioCache(str(tmp_path))
+    cache.put("Bonjour", VOICE, RATE, b"\0\0" * 240)
+
+    await run_test(
+        CachedSpeechProcessor(cache, SimpleNamespace(sample_rate=RATE), VOICE),
+        frames_to_send=[TextFrame("Un instant"), TTSSpeakFrame("Bonjour")],
+        expected_down_frames=[TextFrame, TTSSpeakFrame],
+    )
+
+
+def llm_response(*chunks):
+    return [LLMFullResponseStartFrame(), *(LLMTextFrame(chunk) for chunk in chunks), LLMFullResponseEndFrame()]
+
+
+async def test_processor_plays_llm_responses_that_are_cached_phrases(tmp_path):
+    cache = TTSAudioCache(str(tmp_path))
+    cache.put("Merci de votre appel, au revoir !", VOICE, RATE, b"\0\0" * 240)
+    processor = CachedSpeechProcessor(
+        cache, SimpleNamespace(sample_rate=RATE), VOICE, phrases=["Merci de votre appel, au revoir !"]
+    )
+
+    down, _ = await run_test(
+        processor,
+        frames_to_send=llm_response("Merci de votre", " appel,", " au revoir !"),
+        expected_down_frames=[TTSStartedFrame, TTSAudioRawFrame, TTSStoppedFrame, LLMMessagesAppendFrame],
+    )
+
+    assert down[1].audio == b"\0\0" * 240
+    assert down[3].messages == [{"role": "assistant", "content": "Merci de votre appel, au revoir !"}]
+
+
+async def test_processor_passes_on_llm_responses_that_are_not_cached_phrases(tmp_path):
+    cache = TTSAudioCache(str(tmp_path))
+    cache.put("Merci de votre appel, au revoir !", VOICE, RATE, b"\0\0" * 240)
+    processor = CachedSpeechProcessor(
+        cache, SimpleNamespace(sample_rate=RATE), VOICE, phrases=["Merci de votre appel, au revoir !"]
+    )
+
+    down, _ = await run_test(
+        processor,
+        frames_to_send=llm_response("Merci de votre", " appel,", " à lundi !"),
+        expected_down_frames=[
+            LLMFullResponseStartFrame, LLMTextFrame, LLMTextFrame, LLMTextFrame, LLMFullResponseEndFrame,
+        ],
+    )
+
+    assert "".join(frame.text for frame in down[1:4]) == "Merci de votre appel, à lundi !"
@@ -0,0 +1,48 @@
+"""Small in-process cache with per-entry expiry."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """Least-recently-used cache whose entries expire ``ttl`` seconds after being set.
+
+    Args:
+        ttl: Lifetime of an entry in seconds.
+        maxsize: Maximum number of entries kept; the least recently used is evicted first.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+
+_MISSING = object()
@@ -0,0 +1,305 @@
+"""Cache of pre-rendered TTS audio for the bot's fixed utterances.
+
+Audio is stored as raw 16-bit mono PCM, one file per utterance, in
+``TTS_CACHE_DIR`` (default ``assets/.tts-cache``), so every bot process on the
+host shares it and it survives restarts. Entries are keyed by the text, the
+voice and the sample rate, and the least recently used ones are evicted once
+the cache grows past ``TTS_CACHE_MAX_MB``.
+
+``warm_up`` synthesises the phrases that are not cached yet, and
+``CachedSpeechProcessor`` plays cache hits in the pipeline without going
+through the TTS service, both for ``TTSSpeakFrame`` answers and for LLM
+responses that are exactly one of the phrases (greeting, goodbye...).
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from typing import Awaitable, Callable, Iterable, List, Optional
+
+import aiohttp
+from loguru import logger
+
+from pipecat.frames.frames import (
+    BotStoppedSpeakingFrame,
+    Frame,
+    InterimTranscriptionFrame,
+    LLMFullResponseEndFrame,
+    LLMFullResponseStartFrame,
+    LLMMessagesAppendFrame,
+    LLMTextFrame,
+    StartInterruptionFrame,
+    SystemFrame,
+    TextFrame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    TTSSpeakFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+PHRASES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tts_phrases.txt")
+
+# Sample rate of the pipeline's audio output, which the TTS service adopts
+DEFAULT_SAMPLE_RATE = 24000
+
+Synthesizer = Callable[[str], Awaitable[bytes]]
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class TTSAudioCache:
+    """Disk-backed LRU cache of synthesised utterances.
+
+    Args:
+        directory: Where the audio files are kept (``TTS_CACHE_DIR``).
+        max_bytes: Size above which the least recently used entries are evicted
+            (``TTS_CACHE_MAX_MB``, default 64 MB).
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or os.getenv("TTS_CACHE_DIR") or os.path.join(ASSETS_DIR, ".tts-cache")
+        self.max_bytes = max_bytes or int(float(os.getenv("TTS_CACHE_MAX_MB", "64")) * 1024 * 1024)
+        os.makedirs(self.directory, exist_ok=True)
+        # key -> size in bytes, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        files = []
+        for filename in os.listdir(self.directory):
+            if filename.endswith(".pcm"):
+                stat = os.stat(os.path.join(self.directory, filename))
+                files.append((stat.st_mtime, filename[: -len(".pcm")], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._size += size
+
+    @staticmethod
+    def key(text: str, voice_id: str, sample_rate: int) -> str:
+        return hashlib.sha256(f"{voice_id}\0{sample_rate}\0{normalize_text(text)}".encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pcm")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def get(self, text: str, voice_id: str, sample_rate: int) -> Optional[bytes]:
+        key = self.key(text, voice_id, sample_rate)
+        if key not in self._entries:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                audio = f.read()
+            # Another process may evict by modification time too
+            os.utime(self._path(key))
+        except OSError:
+            self._forget(key)
+            return None
+        self._entries.move_to_end(key)
+        return audio
+
+    def __contains__(self, item) -> bool:
+        return self.key(*item) in self._entries
+
+    def put(self, text: str, voice_id: str, sample_rate: int, audio: bytes):
+        key = self.key(text, voice_id, sample_rate)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+        self._forget(key)
+        self._entries[key] = len(audio)
+        self._size += len(audio)
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            self._forget(oldest)
+            try:
+                os.remove(self._path(oldest))
+            except OSError:
+                pass
+
+    def _forget(self, key: str):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._size -= size
+
+
+def load_phrases(path: Optional[str] = None) -> List[str]:
+    """Phrases to pre-render, one per line (``TTS_CACHE_PHRASES_FILE``); ``#`` starts a comment."""
+    path = path or os.getenv("TTS_CACHE_PHRASES_FILE") or PHRASES_FILE
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = [line.strip() for line in f]
+    except OSError:
+        return []
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def cartesia_synthesizer(
+    session: aiohttp.ClientSession,
+    api_key: str,
+    voice_id: str,
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+    model: str = "sonic-2",
+    language: str = "en",
+) -> Synthesizer:
+    """Synthesiser calling Cartesia's ``/tts/bytes`` endpoint with the live service's defaults."""
+
+    async def synthesize(text: str) -> bytes:
+        async with session.post(
+            "https://api.cartesia.ai/tts/bytes",
+            json={
+                "model_id": model,
+                "transcript": text,
+                "voice": {"mode": "id", "id": voice_id},
+                "output_format": {"container": "raw", "encoding": "pcm_s16le", "sample_rate": sample_rate},
+                "language": language,
+            },
+            headers={"Cartesia-Version": "2024-11-13", "X-API-Key": api_key},
+        ) as response:
+            if response.status != 200:
+                raise RuntimeError(f"Cartesia returned {response.status}: {await response.text()}")
+            return await response.read()
+
+    return synthesize
+
+
+async def warm_up(
+    cache: TTSAudioCache,
+    synthesize: Synthesizer,
+    phrases: Iterable[str],
+    voice_id: str,
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+    concurrency: int = 4,
+) -> int:
+    """Synthesises the phrases missing from the cache.
+
+    Returns:
+        The number of phrases added.
+    """
+    missing = list(dict.fromkeys(
+        normalize_text(p) for p in phrases if (p, voice_id, sample_rate) not in cache
+    ))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def render(text: str) -> bool:
+        async with semaphore:
+            try:
+                audio = await synthesize(text)
+            except Exception as e:
+                logger.warning(f"Failed to pre-render TTS phrase {text!r}: {e}")
+                return False
+        cache.put(text, voice_id, sample_rate, audio)
+        return True
+
+    added = sum(await asyncio.gather(*(render(text) for text in missing)))
+    if missing:
+        logger.info(f"Pre-rendered {added}/{len(missing)} TTS phrases ({len(cache)} cached)")
+    return added
+
+
+class CachedSpeechProcessor(FrameProcessor):
+    """Plays cached audio for fixed utterances, ahead of the TTS service.
+
+    A hit is replaced by the cached audio between ``TTSStartedFrame`` and
+    ``TTSStoppedFrame``, which pass through the TTS service untouched. Hits are
+    only served while the TTS has nothing left to say, so cached audio never
+    overtakes audio still being synthesised; otherwise the frame goes to the
+    TTS as usual.
+
+    ``TTSSpeakFrame`` utterances are looked up as they are. An LLM response is
+    held back while its text may still be one of ``phrases``; when the whole
+    response is a cached phrase it is played from the cache and added to the
+    context with an ``LLMMessagesAppendFrame``, as the assistant aggregator
+    would have done. Otherwise the held frames are passed on unchanged.
+
+    Args:
+        cache: Audio cache to serve from.
+        tts: The pipeline's TTS service, whose sample rate selects the entries.
+        voice_id: Voice of the TTS service.
+        phrases: LLM responses worth looking up, the phrases file by default.
+    """
+
+    def __init__(self, cache: TTSAudioCache, tts, voice_id: str, phrases: Optional[Iterable[str]] = None, **kwargs):
+        super().__init__(**kwargs)
+        self._cache = cache
+        self._tts = tts
+        self._voice_id = voice_id
+        self._tts_busy = False
+        self._phrases = {normalize_text(p) for p in (load_phrases() if phrases is None else phrases)}
+        # Frames of the LLM response held back while it may be a cached phrase
+        self._held: Optional[List[Frame]] = None
+        self._held_text = ""
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, (BotStoppedSpeakingFrame, StartInterruptionFrame)):
+            self._tts_busy = False
+            if isinstance(frame, StartInterruptionFrame):
+                self._held = None
+        elif direction == FrameDirection.DOWNSTREAM:
+            if isinstance(frame, LLMFullResponseStartFrame) and self._phrases and not self._tts_busy:
+                self._held, self._held_text = [frame], ""
+                return
+            if self._held is not None and not isinstance(frame, SystemFrame):
+                if isinstance(frame, LLMTextFrame):
+                    self._held.append(frame)
+                    self._held_text += frame.text
+                    if not self._may_be_phrase(self._held_text):
+                        await self._release()
+                    return
+                if isinstance(frame, LLMFullResponseEndFrame):
+                    text = normalize_text(self._held_text)
+                    audio = self._cached_phrase(text)
+                    if audio is not None:
+                        self._held = None
+                        await self._play(audio)
+                        await self.push_frame(LLMMessagesAppendFrame(messages=[{"role": "assistant", "content": text}]))
+                        return
+                await self._release()
+            if isinstance(frame, TTSSpeakFrame) and not self._tts_busy:
+                audio = self._cache.get(frame.text, self._voice_id, self._tts.sample_rate)
+                if audio is not None:
+                    await self._play(audio)
+                    return
+            if isinstance(frame, TTSSpeakFrame) or (
+                isinstance(frame, TextFrame)
+                and not isinstance(frame, (TranscriptionFrame, InterimTranscriptionFrame))
+            ):
+                self._tts_busy = True
+
+        await self.push_frame(frame, direction)
+
+    def _may_be_phrase(self, text: str) -> bool:
+        text = normalize_text(text)
+        return any(phrase.startswith(text) for phrase in self._phrases)
+
+    def _cached_phrase(self, text: str) -> Optional[bytes]:
+        if text not in self._phrases:
+            return None
+        return self._cache.get(text, self._voice_id, self._tts.sample_rate)
+
+    async def _play(self, audio: bytes):
+        await self.push_frame(TTSStartedFrame())
+        await self.push_frame(TTSAudioRawFrame(audio=audio, sample_rate=self._tts.sample_rate, num_channels=1))
+        await self.push_frame(TTSStoppedFrame())
+
+    async def _release(self):
+        """Passes the held LLM response on to the TTS."""
+        held, self._held = self._held, None
+        for frame in held:
+            if isinstance(frame, LLMTextFrame):
+                self._tts_busy = True
+            await self.push_frame(frame)